@@ -0,0 +1,208 @@
+import gzip
+import hashlib
+import json
+import os
+import re
+
+ASSET_DIR = "assets"
+ASSET_MANIFEST = "asset-manifest.json"
+COMPRESSIBLE = (".html", ".css", ".js", ".json", ".svg", ".txt", ".xml")
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+
+INLINE_STYLE = re.compile(r"<style>(.*?)</style>", re.DOTALL)
+INLINE_SCRIPT = re.compile(r"<script>(.*?)</script>", re.DOTALL)
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def minify_css(css):
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.DOTALL)
+    css = re.sub(r"\s+", " ", css)
+    css = re.sub(r"\s*([{}:;,>])\s*", r"\1", css)
+    return css.replace(";}", "}").strip()
+
+
+def minify_js(js):
+    """Conservative: drops indentation, blank lines and whole-line // comments
+
+    Line breaks are kept so automatic semicolon insertion still sees them.
+    """
+    lines = []
+    for line in js.splitlines():
+        line = line.strip()
+        if line and not line.startswith("//"):
+            lines.append(line)
+    return "\n".join(lines)
+
+
+def minify_html(html):
+    html = re.sub(r"\n[ \t]+", "\n", html)
+    return re.sub(r"\n{2,}", "\n", html).strip() + "\n"
+
+
+def _digest(data):
+    return hashlib.blake2b(data, digest_size=6).hexdigest()
+
+
+class AssetWriter:
+    """Content-addressed CSS/JS files under assets/, shared across pages"""
+
+    def __init__(self, output_dir):
+        self.output_dir = output_dir
+        self.asset_dir = os.path.join(output_dir, ASSET_DIR)
+        os.makedirs(self.asset_dir, exist_ok=True)
+        self.files = {}
+
+    def write(self, logical, text, ext):
+        data = text.encode("utf-8")
+        name = f"{logical}.{_digest(data)}.{ext}"
+        path = os.path.join(self.asset_dir, name)
+        if not os.path.exists(path):
+            with open(path, "wb") as f:
+                f.write(data)
+        href = f"{ASSET_DIR}/{name}"
+        self.files[href] = f"{logical}.{ext}"
+        return href
+
+
+def externalize(html, page, writer, stem=None):
+    """Move a page's inline <style> and <script> blocks into hashed files
+
+    page is relative to the output directory and links are relative to
+    it; pages given the same stem share the files of identical blocks.
+    """
+    stem = stem or os.path.splitext(os.path.basename(page))[0]
+    up = "../" * page.count("/")
+    counter = {"css": 0, "js": 0}
+
+    def style(match):
+        counter["css"] += 1
+        href = writer.write(f"{stem}-{counter['css']}", minify_css(match.group(1)), "css")
+        return f'<link rel="stylesheet" href="{up}{href}">'
+
+    def script(match):
+        counter["js"] += 1
+        src = writer.write(f"{stem}-{counter['js']}", minify_js(match.group(1)), "js")
+        return f'<script src="{up}{src}"></script>'
+
+    html = INLINE_STYLE.sub(style, html)
+    return INLINE_SCRIPT.sub(script, html)
+
+
+def precompress(path):
+    """Write .gz (and, with the brotli module, .br) siblings; returns their sizes"""
+    with open(path, "rb") as f:
+        data = f.read()
+    sizes = {}
+    variants = [("gz", lambda d: gzip.compress(d, 9, mtime=0))]
+    if brotli is not None:
+        variants.append(("br", lambda d: brotli.compress(d, quality=11)))
+    for ext, compress in variants:
+        target = f"{path}.{ext}"
+        if os.path.exists(target) and os.path.getmtime(target) >= os.path.getmtime(path):
+            sizes[ext] = os.path.getsize(target)
+            continue
+        packed = compress(data)
+        with open(target, "wb") as f:
+            f.write(packed)
+        sizes[ext] = len(packed)
+    return sizes
+
+
+def _outputs(output_dir, pages, dirs):
+    """Relative paths of the compressible files the build wrote: pages and files under dirs"""
+    for page in pages:
+        if os.path.exists(os.path.join(output_dir, page)):
+            yield page
+    for top in dirs:
+        for root, _, names in os.walk(os.path.join(output_dir, top)):
+            for name in sorted(names):
+                if name.endswith(COMPRESSIBLE):
+                    yield os.path.relpath(os.path.join(root, name), output_dir).replace(os.sep, "/")
+
+
+def _drop_orphans(output_dir, dirs):
+    """Remove .gz/.br siblings whose file an earlier build wrote and this one did not"""
+    for top in dirs:
+        for root, _, names in os.walk(os.path.join(output_dir, top)):
+            for name in names:
+                if name.endswith((".gz", ".br")) and name[:-3] not in names:
+                    os.remove(os.path.join(root, name))
+
+
+def build_assets(output_dir, pages=("index.html", "home.html"), dirs=(), page_dirs=()):
+    """Externalize, minify and precompress a built site
+
+    Only the build's own outputs are touched: pages, assets/ and the
+    directories in dirs (shards, search index, category pages), never
+    whatever else shares output_dir. Writes asset-manifest.json with each
+    one's size, compressed sizes and the Cache-Control a static server
+    should send: content-hashed assets are immutable, pages and other
+    files must be revalidated. The .html pages in page_dirs (category
+    pages) are externalized too, those of one directory sharing assets.
+    Assets of the previous build are kept so cached pages still resolve.
+    Returns a {"before", "after", "assets", "gz", "br"} byte report: page
+    bytes before and after, bytes moved to assets, and the compressed size
+    of pages plus assets.
+    """
+    writer = AssetWriter(output_dir)
+    before = after = 0
+    targets = [(page, None) for page in pages]
+    for top in page_dirs:
+        folder = os.path.join(output_dir, top)
+        if os.path.isdir(folder):
+            targets += [(f"{top}/{name}", top) for name in sorted(os.listdir(folder)) if name.endswith(".html")]
+    for page, stem in targets:
+        path = os.path.join(output_dir, page)
+        if not os.path.exists(path):
+            continue
+        with open(path, "r", encoding="utf-8") as f:
+            html = f.read()
+        before += len(html.encode("utf-8"))
+        html = minify_html(externalize(html, page, writer, stem))
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(html)
+        after += len(html.encode("utf-8"))
+    asset_bytes = sum(os.path.getsize(os.path.join(output_dir, href)) for href in writer.files)
+
+    manifest_path = os.path.join(output_dir, ASSET_MANIFEST)
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            previous = set(json.load(f).get("assets", {}))
+    except (OSError, ValueError):
+        previous = set()
+    keep = {os.path.basename(href) for href in set(writer.files) | previous}
+    for name in os.listdir(writer.asset_dir):
+        base = name.rsplit(".", 1)[0] if name.endswith((".gz", ".br")) else name
+        if base not in keep:
+            os.remove(os.path.join(writer.asset_dir, name))
+
+    _drop_orphans(output_dir, (ASSET_DIR, *dirs))
+    files = {}
+    for rel in _outputs(output_dir, pages, (ASSET_DIR, *dirs)):
+        path = os.path.join(output_dir, rel)
+        immutable = rel.startswith(f"{ASSET_DIR}/")
+        files[rel] = {"size": os.path.getsize(path), **precompress(path),
+                      "cache_control": IMMUTABLE if immutable else REVALIDATE}
+
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump({"assets": dict(sorted(writer.files.items())), "files": files}, f, indent=1)
+
+    report = {"before": before, "after": after, "assets": asset_bytes,
+              "gz": sum(files[p].get("gz", 0) for p in pages if p in files)
+              + sum(files[h].get("gz", 0) for h in writer.files),
+              "br": sum(files[p].get("br", 0) for p in pages if p in files)
+              + sum(files[h].get("br", 0) for h in writer.files)}
+    line = (f"✅ Assets built: pages {before:,} → {after:,} bytes + {asset_bytes:,} bytes of cacheable assets "
+            f"({before - after - asset_bytes:,} saved on a first visit, {before - after:,} on repeat visits); "
+            f"{report['gz']:,} gzip")
+    if brotli is not None:
+        line += f", {report['br']:,} brotli"
+    else:
+        line += " (brotli module not installed, .br skipped)"
+    print(line)
+    return report
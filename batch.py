@@ -0,0 +1,147 @@
+import argparse
+import contextlib
+import io
+import json
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+
+import home
+
+
+@dataclass(frozen=True)
+class SiteConfig:
+    """One franchise site: its catalog, where it goes and its homepage poster"""
+    csv: str
+    output_dir: str
+    poster: str = home.DEFAULT_POSTER
+    name: str = ""
+    mode: str = "static"
+    rules: str = ""
+
+    def __post_init__(self):
+        if self.mode not in home.MODES:
+            raise ValueError(f"{self.label}: unknown mode {self.mode!r}; "
+                             f"expected one of {', '.join(home.MODES)}")
+
+    @property
+    def label(self):
+        return self.name or self.output_dir
+
+
+@dataclass
+class SiteResult:
+    site: SiteConfig
+    seconds: float
+    log: str
+    error: str = ""
+
+    @property
+    def ok(self):
+        return not self.error
+
+
+def load_sites(path):
+    """Read a JSON list of {"csv", "output_dir", "poster", "name", "mode", "rules"} objects"""
+    with open(path, "r", encoding="utf-8") as f:
+        entries = json.load(f)
+    if not isinstance(entries, list):
+        raise ValueError("expected a list of site objects")
+    sites = []
+    for n, entry in enumerate(entries, 1):
+        if not isinstance(entry, dict):
+            raise ValueError(f"site {n}: expected an object, not {entry!r}")
+        try:
+            sites.append(SiteConfig(**entry))
+        except TypeError as e:
+            # Unknown or missing keys; the message names them
+            raise ValueError(f"site {n}: {str(e).removeprefix('SiteConfig.__init__() ')}") from None
+    return sites
+
+
+def build_one(site, incremental=False):
+    """Build one site in a worker; failures are returned, never raised"""
+    log = io.StringIO()
+    start = time.perf_counter()
+    error = ""
+    with contextlib.redirect_stdout(log):
+        try:
+            home.build_site(site.csv, site.output_dir, site.poster,
+                            mode=site.mode, incremental=incremental,
+                            rules_file=site.rules or None)
+        except Exception:
+            error = traceback.format_exc()
+    return SiteResult(site, time.perf_counter() - start, log.getvalue(), error)
+
+
+def build_alone(site, incremental=False):
+    """Build one site in a worker process of its own, reporting the process dying as a failure"""
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=1) as pool:
+        try:
+            return pool.submit(build_one, site, incremental).result()
+        except BrokenProcessPool as e:
+            return SiteResult(site, time.perf_counter() - start, "", f"worker process died: {e}")
+
+
+def build_sites(sites, workers=None, incremental=False):
+    """Build every site on a process pool and report each one as it finishes
+
+    A worker that dies (killed, out of memory, a crash in an extension)
+    breaks the pool for every site still in flight; those are built again
+    one at a time, so only the site that takes its worker down fails.
+    """
+    results = []
+    start = time.perf_counter()
+
+    def report(result):
+        results.append(result)
+        if result.ok:
+            print(f"✅ {result.site.label}: built in {result.seconds:.2f}s")
+        else:
+            print(f"❌ {result.site.label}: failed after {result.seconds:.2f}s")
+            print(result.error.rstrip(), file=sys.stderr)
+
+    broken = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(build_one, site, incremental): site for site in sites}
+        for future in as_completed(futures):
+            try:
+                report(future.result())
+            except BrokenProcessPool:
+                broken.append(futures[future])
+    if broken:
+        print(f"⚠️ A worker process died; building {len(broken)} interrupted sites again one at a time")
+        for site in broken:
+            report(build_alone(site, incremental))
+    failed = sum(1 for r in results if not r.ok)
+    print(f"{len(results) - failed}/{len(results)} sites built in {time.perf_counter() - start:.2f}s")
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build several swipe sites in parallel")
+    parser.add_argument("sites", help="JSON file with a list of site configurations")
+    parser.add_argument("-j", "--workers", type=int, default=None,
+                        help="worker processes (default: one per CPU)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="skip unchanged outputs in every site")
+    args = parser.parse_args(argv)
+
+    try:
+        sites = load_sites(args.sites)
+    except ValueError as e:
+        sys.exit(f"❌ {args.sites}: {e}")
+    if args.incremental:
+        virtual = [site.label for site in sites if site.mode != "static"]
+        if virtual:
+            sys.exit(f"❌ {args.sites}: --incremental builds static sites only, not {', '.join(virtual)}")
+    results = build_sites(sites, args.workers, args.incremental)
+    return 0 if all(r.ok for r in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,89 @@
+"""Build from videos.csv vs from the compiled binary catalog
+
+Run from the repo root:  python benchmarks/bench_catalog.py [rows ...]
+
+For each size, compiles the synthetic catalog of bench_suite.py and
+reports its size against the CSV, the time to load every entry with its
+categories (read_catalog over the CSV vs Catalog.pairs() over the mapped
+file), and a full static build_site from each, with the build's traced
+peak memory measured in a separate run.
+
+Reference run (Python 3.11, Linux):
+
+        rows   csv MB  catalog MB  compile s  load csv s  load catalog s  build csv s  peak MiB  build catalog s  peak MiB
+       10000      0.9         1.6       0.19       0.123           0.029         0.24       2.3             0.11       0.7
+      100000      9.2        16.0       2.40       2.001           0.318         2.54       2.4             1.25       0.7
+     1000000     93.6       161.0      18.95      12.146           3.196        27.04       2.4             8.88       0.7
+
+Opening a catalog takes about 0.2 ms at any size; "load" decodes every
+entry. The file is larger than this CSV because it stores the derived
+thumbnail URL of every row and the category index. It is mapped, not
+read, so only the pages a build touches are resident. A build from the
+catalog skips the CSV parse, extract_video_id, classification, the
+count_rows pass and the category spool.
+"""
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import home  # noqa: E402
+from bench_suite import write_catalog  # noqa: E402
+from catalog import Catalog, compile_catalog  # noqa: E402
+from rules import default_rules  # noqa: E402
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = fn(*args)
+    return time.perf_counter() - start, result
+
+
+def peak(fn, *args):
+    tracemalloc.start()
+    with contextlib.redirect_stdout(io.StringIO()):
+        fn(*args)
+    _, traced = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return traced / (1024 * 1024)
+
+
+def load_csv(csv_file, rules):
+    for _ in home.read_catalog(csv_file, rules):
+        pass
+
+
+def load_catalog(path):
+    for _ in Catalog(path).pairs():
+        pass
+
+
+def main(sizes):
+    rules = default_rules()
+    print(f"{'rows':>8} {'csv MB':>8} {'catalog MB':>11} {'compile s':>10} {'load csv s':>11} "
+          f"{'load catalog s':>15} {'build csv s':>12} {'peak MiB':>9} {'build catalog s':>16} {'peak MiB':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in sizes:
+            csv_file = os.path.join(tmp, f"videos-{n}.csv")
+            write_catalog(csv_file, n)
+            compiled, path = timed(compile_catalog, csv_file, None, rules)
+            load_csv_s, _ = timed(load_csv, csv_file, rules)
+            load_catalog_s, _ = timed(load_catalog, path)
+            site = os.path.join(tmp, "site")
+            build_csv_s, _ = timed(home.build_site, csv_file, site)
+            build_csv_mib = peak(home.build_site, csv_file, site)
+            build_catalog_s, _ = timed(home.build_site, path, site)
+            build_catalog_mib = peak(home.build_site, path, site)
+            print(f"{n:>8} {os.path.getsize(csv_file) / 1e6:>8.1f} {os.path.getsize(path) / 1e6:>11.1f} "
+                  f"{compiled:>10.2f} {load_csv_s:>11.3f} {load_catalog_s:>15.3f} {build_csv_s:>12.2f} "
+                  f"{build_csv_mib:>9.1f} {build_catalog_s:>16.2f} {build_catalog_mib:>9.1f}")
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [10000, 100000, 1000000])
@@ -0,0 +1,75 @@
+"""The categories card inline versus paginated category pages
+
+Run from the repo root:  python benchmarks/bench_category_pages.py [rows ...]
+
+Builds bench_suite.py's synthetic catalog as a static site three ways:
+with every tile in index.html's categories card, and with the tiles moved
+to category pages rendered in this process (-j 1) and with the default
+workers (a process pool of one per CPU, or this process on a single
+CPU). Reports the build time, the size of index.html, the tiles the
+browser has to lay out on it, and the category pages and their bytes
+(with the stylesheet they share).
+
+Reference run (Python 3.11, Linux, 1 CPU):
+
+        rows  categories      seconds  index KB  index tiles  pages  pages KB
+       10000  inline            0.243     5,840       10,000      0         0
+       10000  pages, -j 1       0.308     3,639           16    210     2,327
+       10000  pages, default    0.228     3,639           16    210     2,327
+      100000  inline            3.023    58,769      100,000      0         0
+      100000  pages, -j 1       3.773    36,611           16  2,085    23,360
+      100000  pages, default    3.397    36,611           16  2,085    23,360
+
+index.html keeps its cards but loses every tile past the preview, over a
+third of its bytes, and the categories card goes from one tile per row
+to at most PREVIEW_TILES per category. The pages themselves cost about
+what the inline tiles did; linking the site CSS instead of inlining it
+in each saves about 2.7 KB a page (2,896 KB for the 10,000 rows before).
+A pool on a single CPU only added the cost of shipping entries to the
+worker (0.494 seconds for 10,000 rows), so there the default is -j 1 and
+the two runs differ by noise; with more CPUs the pages render in the
+pool while this process goes on writing index.html.
+"""
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import home  # noqa: E402
+from bench_suite import write_catalog  # noqa: E402
+from category_pages import CATEGORY_DIR, PAGE_SIZE  # noqa: E402
+
+VARIANTS = (("inline", None, None), ("pages, -j 1", PAGE_SIZE, 1), ("pages, default", PAGE_SIZE, None))
+
+
+def main(sizes):
+    print(f"{'rows':>8}  {'categories':<14} {'seconds':>8} {'index KB':>9} {'index tiles':>12} {'pages':>6} "
+          f"{'pages KB':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in sizes:
+            csv_file = os.path.join(tmp, f"videos-{n}.csv")
+            write_catalog(csv_file, n)
+            for name, page_size, workers in VARIANTS:
+                site = os.path.join(tmp, f"site-{n}-{name}")
+                start = time.perf_counter()
+                with contextlib.redirect_stdout(io.StringIO()):
+                    home.build_site(csv_file, site, workers=workers, category_page_size=page_size)
+                seconds = time.perf_counter() - start
+                index = os.path.join(site, "index.html")
+                with open(index, "r", encoding="utf-8") as f:
+                    page = f.read()
+                tiles = page.count('target="_blank"><img') + page.count('target="_blank"><picture')
+                pages_dir = os.path.join(site, CATEGORY_DIR)
+                files = os.listdir(pages_dir) if os.path.isdir(pages_dir) else []
+                pages = sum(name.endswith(".html") for name in files)
+                page_bytes = sum(os.path.getsize(os.path.join(pages_dir, name)) for name in files)
+                print(f"{n:>8}  {name:<14} {seconds:>8.3f} {os.path.getsize(index) / 1024:>9,.0f} "
+                      f"{tiles:>12,} {pages:>6,} {page_bytes / 1024:>9,.0f}")
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [10_000, 100_000])
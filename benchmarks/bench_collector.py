@@ -0,0 +1,117 @@
+"""Swipe beacons into collector.py on one core
+
+Run from the repo root:  python benchmarks/bench_collector.py [events]
+
+Starts the collector in its own process, with and without the fsync
+after each group commit, and posts events to it as the swipe page does:
+batches of BATCH events, over keep-alive connections from an asyncio
+client, one batch in flight per connection. Reports events and batches
+per second, and how many batches each group commit absorbed.
+
+Reference run (Python 3.11, Linux):
+
+    fsync  conns   seconds   events/s  batches/s  writes  batches/write
+       on      1     4.967     20,134      1,007   5,000            1.0
+       on     16     1.780     56,184      2,809     574            8.7
+       on     64     1.603     62,383      3,119     185           27.0
+      off      1     3.300     30,300      1,515   5,000            1.0
+      off     16     1.581     63,234      3,162     615            8.1
+      off     64     1.514     66,049      3,302     182           27.5
+
+With one connection every batch waits for its own write and fsync.
+With more in flight, batches arriving during a write join the next one,
+so writes stop growing with the request rate and the HTTP handling on
+the collector's single core becomes the limit, at about 3,000 beacons
+(60,000 events) a second; the fsync then costs under 10%.
+"""
+import asyncio
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from collector import serve  # noqa: E402
+
+BATCH = 20
+CONNECTIONS = (1, 16, 64)
+
+
+def run_collector(ports, log_file, fsync):
+    with contextlib.redirect_stdout(io.StringIO()):
+        asyncio.run(serve(port=0, log_file=log_file, fsync=fsync, ready=ports.put))
+
+
+def batch_request(k):
+    events = [[f"https://www.youtube.com/watch?v={(k * BATCH + j) % 5000:011d}", ("right", "left", "up")[j % 3],
+               1_760_000_000_000 + j] for j in range(BATCH)]
+    body = json.dumps({"segment": "bench", "events": events}).encode("utf-8")
+    return (f"POST /events HTTP/1.1\r\nHost: 127.0.0.1\r\nContent-Type: text/plain\r\n"
+            f"Content-Length: {len(body)}\r\n\r\n").encode("latin-1") + body
+
+
+async def read_response(reader):
+    status = await reader.readline()
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        if line.lower().startswith(b"content-length:"):
+            length = int(line.split(b":")[1])
+    body = await reader.readexactly(length) if length else b""
+    return int(status.split()[1]), body
+
+
+async def post_batches(port, batches, connections):
+    requests = [batch_request(k) for k in range(batches)]
+    queue = iter(requests)
+
+    async def client():
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        for request in queue:
+            writer.write(request)
+            status, _ = await read_response(reader)
+            if status != 204:
+                raise RuntimeError(f"collector answered {status}")
+        writer.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(connections)))
+    seconds = time.perf_counter() - start
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(b"GET /counts?top=0 HTTP/1.1\r\nHost: 127.0.0.1\r\nConnection: close\r\n\r\n")
+    _, body = await read_response(reader)
+    writer.close()
+    return seconds, json.loads(body)["commits"]
+
+
+def main(events=100_000):
+    batches = events // BATCH
+    print(f"{'fsync':>5} {'conns':>6} {'seconds':>9} {'events/s':>10} {'batches/s':>10} {'writes':>7} "
+          f"{'batches/write':>14}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for fsync in (True, False):
+            ports = multiprocessing.Queue()
+            log_file = os.path.join(tmp, f"swipes-{fsync}.csv")
+            server = multiprocessing.Process(target=run_collector, args=(ports, log_file, fsync), daemon=True)
+            server.start()
+            port = ports.get()
+            commits = 0
+            for connections in CONNECTIONS:
+                seconds, total = asyncio.run(post_batches(port, batches, connections))
+                writes, commits = total - commits, total
+                print(f"{'on' if fsync else 'off':>5} {connections:>6} {seconds:>9.3f} "
+                      f"{events / seconds:>10,.0f} {batches / seconds:>10,.0f} {writes:>7,} "
+                      f"{batches / writes:>14.1f}")
+            server.terminate()
+            server.join()
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:2]))
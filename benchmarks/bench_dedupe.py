@@ -0,0 +1,71 @@
+"""Duplicate detection: exact seen-set vs fixed-size Bloom filter
+
+Run from the repo root:  python benchmarks/bench_dedupe.py [rows ...]
+
+For each size, parses the synthetic catalog of bench_suite.py once
+(canonical URLs, no de-duplication) and then times Deduper.filter over
+those entries with a set and with a Bloom filter sized for the row
+count, reporting rows merged and the traced peak memory of each pass.
+
+Reference run (Python 3.11, Linux):
+
+        rows  filter  seconds     rows/s   merged  peak MiB
+       10000     set    0.003  2,858,604        0       0.7
+       10000   bloom    0.134     74,767        0       0.0
+      100000     set    0.064  1,555,917        0       7.2
+      100000   bloom    1.277     78,334        0       0.3
+     1000000     set    0.877  1,140,857        0      57.2
+     1000000   bloom   14.468     69,117        0       3.4
+
+The synthetic catalog has no duplicates, so every key is new: the worst
+case for the set, which keeps all of them. The Bloom filter holds about
+3.4 MiB for a million rows at the default error rate, but hashes each
+key 20 times in Python and is roughly 15x slower; it only pays off when
+the seen-set would not fit in memory.
+"""
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import home  # noqa: E402
+from bench_suite import write_catalog  # noqa: E402
+from dedupe import Deduper  # noqa: E402
+from rules import default_rules  # noqa: E402
+
+
+def run(pairs, bloom_rows):
+    deduper = Deduper(bloom_rows)
+    start = time.perf_counter()
+    for _ in deduper.filter(pairs):
+        pass
+    return time.perf_counter() - start, deduper.merged
+
+
+def peak(pairs, bloom_rows):
+    tracemalloc.start()
+    run(pairs, bloom_rows)
+    _, traced = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return traced / (1024 * 1024)
+
+
+def main(sizes):
+    rules = default_rules()
+    print(f"{'rows':>8} {'filter':>7} {'seconds':>8} {'rows/s':>10} {'merged':>8} {'peak MiB':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in sizes:
+            csv_file = os.path.join(tmp, f"videos-{n}.csv")
+            write_catalog(csv_file, n)
+            pairs = list(home.read_catalog(csv_file, rules, dedupe=False))
+            for name, bloom_rows in (("set", None), ("bloom", n)):
+                seconds, merged = run(pairs, bloom_rows)
+                mib = peak(pairs, bloom_rows)
+                print(f"{n:>8} {name:>7} {seconds:>8.3f} {n / seconds:>10,.0f} {merged:>8,} {mib:>9.1f}")
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [10000, 100000, 1000000])
@@ -0,0 +1,128 @@
+"""Metadata enrichment against a local oEmbed stub
+
+Run from the repo root:  python benchmarks/bench_enrich.py [rows ...]
+
+Starts a threaded HTTP/1.1 keep-alive server on localhost, in its own
+process so it does not compete for the GIL, that answers
+every lookup after LATENCY seconds and fails every FAIL_EVERY-th one
+with a 503, then enriches the URLs of bench_suite.py's synthetic
+catalog with enrich.Enricher pointed at it: once per concurrency level
+against an empty cache, and once more against the warm cache, which
+should make no requests.
+
+Reference run (Python 3.11, Linux):
+
+        rows  cache  conc  seconds    rows/s  requests  conns  found
+         200   cold     1    4.489        45       204      1    200
+         200   cold    16    0.349       572       204     16    200
+         200   cold    64    0.161     1,242       204     64    200
+         200   warm    64    0.002    97,492         0      0    200
+        2000   cold     1   44.597        45     2,041      1  2,000
+        2000   cold    16    3.217       622     2,040     16  2,000
+        2000   cold    64    1.428     1,400     2,041     64  2,000
+        2000   warm    64    0.043    45,990         0      0  2,000
+
+Requests beyond the row count are the retried 503s. Every worker keeps
+one connection open for the whole run. With LATENCY = 0 the client
+manages about 2,000 lookups a second against this stub, far more than
+any public endpoint will allow, so the concurrency is the knob that
+matters.
+"""
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import home  # noqa: E402
+from bench_suite import write_catalog  # noqa: E402
+from enrich import Enricher  # noqa: E402
+
+LATENCY = 0.02
+FAIL_EVERY = 50
+CONCURRENCY = (1, 16, 64)
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    calls = 0
+    lock = threading.Lock()
+
+    def do_GET(self):
+        with self.lock:
+            StubHandler.calls += 1
+            fail = StubHandler.calls % FAIL_EVERY == 0
+        time.sleep(LATENCY)
+        if fail:
+            self.send_response(503)
+            self.send_header("Retry-After", "0")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        url = parse_qs(urlsplit(self.path).query)["url"][0]
+        body = json.dumps({"title": f"Fetched {url[-11:]}", "thumbnail_url": f"https://img.example/{url[-11:]}.jpg",
+                           "duration": len(url)}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # Room for every connection the client opens at once
+    request_queue_size = 256
+
+
+def serve(ports):
+    server = StubServer(("127.0.0.1", 0), StubHandler)
+    ports.put(server.server_port)
+    server.serve_forever()
+
+
+def enrich(urls, endpoint, cache_file, concurrency):
+    enricher = Enricher(endpoint, cache_file, concurrency, backoff=0.01)
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        found = enricher.enrich(urls)
+    return time.perf_counter() - start, enricher, len(found)
+
+
+def main(sizes):
+    ports = multiprocessing.Queue()
+    server = multiprocessing.Process(target=serve, args=(ports,), daemon=True)
+    server.start()
+    endpoint = f"http://127.0.0.1:{ports.get()}/oembed"
+    print(f"{'rows':>8} {'cache':>6} {'conc':>5} {'seconds':>8} {'rows/s':>9} {'requests':>9} "
+          f"{'conns':>6} {'found':>6}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in sizes:
+            csv_file = os.path.join(tmp, f"videos-{n}.csv")
+            write_catalog(csv_file, n)
+            urls = [url for _, url, _, _ in home.read_videos(csv_file)]
+            for concurrency in CONCURRENCY:
+                cache_file = os.path.join(tmp, f"metadata-{n}-{concurrency}.sqlite")
+                for cache in ("cold", "warm"):
+                    if cache == "warm" and concurrency != CONCURRENCY[-1]:
+                        continue
+                    seconds, enricher, found = enrich(urls, endpoint, cache_file, concurrency)
+                    print(f"{n:>8} {cache:>6} {concurrency:>5} {seconds:>8.3f} {n / seconds:>9,.0f} "
+                          f"{enricher.requests:>9,} {enricher.connections:>6} {found:>6,}")
+    server.terminate()
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [1000, 10000])
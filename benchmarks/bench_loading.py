@@ -0,0 +1,64 @@
+"""What a browser has to fetch before the first swipe card shows
+
+Run from the repo root:  python benchmarks/bench_loading.py [rows ...]
+
+Builds the static page for bench_suite.py's synthetic catalog at each
+size and reads the loading plan off the HTML: the bytes parsed before
+the first card image is discovered (time to first card), and how many
+images the page requests on load, before any script or scrolling runs.
+Every other image is deferred to the swipe script (PREFETCH_CARDS ahead
+of the top card) or to the category tiles' IntersectionObserver, so
+both figures should stay flat as the catalog grows; only the HTML
+itself gets longer.
+
+Reference run (Python 3.11, Linux):
+
+        rows   page KB  KB to 1st img  loaded  deferred
+          10        13            2.8       3        17
+        1000       587            2.8       3     1,997
+      100000    58,769            2.8       3   199,997
+
+Before the loading plan, every card and tile image had a plain src, so
+the page requested all of them on load (20 at 10 rows, 2,000 at 1,000).
+"""
+import contextlib
+import io
+import os
+import re
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import home  # noqa: E402
+from bench_suite import write_catalog  # noqa: E402
+
+# src= and srcset= that the browser acts on, not their data- twins
+EAGER = re.compile(rb'(?<![-\w])(?:src|srcset)="')
+IMAGE = re.compile(rb'<img\b[^>]*>')
+
+
+def loading_plan(page):
+    with open(page, "rb") as f:
+        html = f.read()
+    images = IMAGE.findall(html)
+    eager = [img for img in images if EAGER.search(img)]
+    first = IMAGE.search(html)
+    return len(html), first.start() if first else 0, len(eager), len(images)
+
+
+def main(sizes):
+    print(f"{'rows':>8} {'page KB':>9} {'KB to 1st img':>14} {'loaded':>7} {'deferred':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in sizes:
+            csv_file = os.path.join(tmp, f"videos-{n}.csv")
+            write_catalog(csv_file, n)
+            site = os.path.join(tmp, f"site-{n}")
+            with contextlib.redirect_stdout(io.StringIO()):
+                home.build_site(csv_file, site)
+            size, first, eager, images = loading_plan(os.path.join(site, "index.html"))
+            print(f"{n:>8} {size / 1024:>9,.0f} {first / 1024:>14.1f} {eager:>7} {images - eager:>9,}")
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [10, 1000, 100000])
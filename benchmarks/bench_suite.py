@@ -0,0 +1,281 @@
+"""Stage-by-stage timings and peak memory of a full build as the catalog grows
+
+Run from the repo root:
+
+    python benchmarks/bench_suite.py [--sizes 1000 10000 ...] [--json results.json]
+    python benchmarks/bench_suite.py --compare before.json after.json [--threshold 0.1]
+
+Every size gets a deterministic synthetic videos.csv (youtu.be, watch?v=,
+embed/ and non-YouTube URLs; MV, M, merch and uncategorized titles). The
+stages are timed separately on it:
+
+    parse       csv.DictReader over the file, fields stripped
+    extract     extract_video_id for every URL, starting from a cold cache
+    categorize  rules.classify for every title
+    render      home.iter_swipe, fragments consumed without writing
+    write       the rendered byte count written through a text file
+    home.main   the whole static build, as on the command line
+    swipe_site  swipe_site.main on the same catalog
+
+Times are the best of three runs; peak memory is taken with tracemalloc
+in a separate run, so it does not slow the timed ones. --json writes the
+results; --compare reads two such files and flags stages that got slower
+or hungrier than the threshold (ignoring differences under 5 ms and
+0.5 MiB), exiting with status 1 if any did.
+
+Reference run (Python 3.11, Linux):
+
+        rows  stage           seconds     rows/s  peak MiB
+        1000  parse             0.004    277,855       0.0
+              extract           0.001    777,001       0.1
+              categorize        0.003    335,121       0.0
+              render            0.003    324,254       0.0
+              write             0.001    720,981       0.3
+              home.main         0.021     47,170       1.0
+              swipe_site        0.013     79,145       0.7
+     1000000  parse             3.160    316,446       0.0
+              extract           1.292    774,021       0.8
+              categorize        5.189    192,733       0.0
+              render            5.626    177,753       0.0
+              write             2.321    430,930       0.3
+              home.main        23.679     42,232       2.4
+              swipe_site       13.158     76,002       1.5
+
+Every stage scales linearly and memory stays flat. home.main costs about
+6 s more than its stages add up to: count_rows parses the CSV a second
+time for the card z-index, and the category spool pickles every entry.
+"""
+import argparse
+import contextlib
+import csv
+import io
+import json
+import os
+import platform
+import random
+import string
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import home  # noqa: E402
+import swipe_site  # noqa: E402
+from rules import default_rules  # noqa: E402
+from streaming import CHUNK_SIZE  # noqa: E402
+from video_id import extract_video_id  # noqa: E402
+
+SIZES = [1000, 10000, 100000, 1000000]
+THRESHOLD = 0.10
+# Differences below these are noise, whatever the ratio
+MIN_SECONDS = 0.005
+MIN_MIB = 0.5
+ID_CHARS = string.ascii_letters + string.digits + "_-"
+
+TITLES = [
+    "MV- {name} Song {i} | Thaman S",
+    "M-{name} Glimpse {i} | Pawan Kalyan | Sujeeth",
+    "M-#OG {name} Teaser {i} | DVV Entertainment",
+    "OG Merch Drop {i} - {name} Edition",
+    "{name} Fan Edit {i} | #TheyCallHimOG",
+]
+NAMES = ["Firestorm", "Hungry Cheetah", "Suvvi Suvvi", "Guns N Roses", "Omi", "Bombay", "Gambheera"]
+URLS = [
+    "https://youtu.be/{id}?si={si}",
+    "https://www.youtube.com/watch?v={id}",
+    "https://www.youtube.com/watch?feature=share&v={id}&t=42s",
+    "https://www.youtube.com/embed/{id}",
+    "https://theogwear.com/products/item-{i}",
+    "https://www.instagram.com/p/{si}/",
+]
+
+
+def write_catalog(path, n, seed=0):
+    """A videos.csv with n rows; the same seed always gives the same file"""
+    rng = random.Random(seed)
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["title", "url"])
+        for i in range(n):
+            video_id = "".join(rng.choices(ID_CHARS, k=11))
+            si = "".join(rng.choices(ID_CHARS, k=16))
+            title = rng.choice(TITLES).format(name=rng.choice(NAMES), i=i)
+            writer.writerow([title, rng.choice(URLS).format(id=video_id, si=si, i=i)])
+
+
+def read_rows(csv_file):
+    with open(csv_file, "r", encoding="utf-8") as f:
+        return [(row["title"].strip(), row["url"].strip()) for row in csv.DictReader(f)]
+
+
+def stage_parse(csv_file):
+    with open(csv_file, "r", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            row["title"].strip()
+            row["url"].strip()
+
+
+def stage_extract(urls):
+    extract_video_id.cache_clear()
+    for url in urls:
+        extract_video_id(url)
+
+
+def stage_categorize(rows, rules):
+    for title, url in rows:
+        rules.classify(title, url)
+
+
+def stage_render(videos, categories):
+    """Bytes of the static page, rendered without touching the disk"""
+    return sum(len(fragment.encode("utf-8")) for fragment in home.iter_swipe(videos, categories))
+
+
+def stage_write(size, output_file, chunk_size=CHUNK_SIZE):
+    """Write size bytes of page text the way write_chunks does"""
+    chunk = ("<div class=\"card\">▶ Watch Now</div>\n" * (chunk_size // 40))[:chunk_size]
+    left = size
+    with open(output_file, "w", encoding="utf-8") as f:
+        while left > 0:
+            f.write(chunk)
+            left -= len(chunk.encode("utf-8"))
+
+
+def stage_home(csv_file, output_dir):
+    home.main(["--csv", csv_file, "--output-dir", output_dir])
+
+
+def stage_swipe_site(csv_file, output_dir):
+    # An explicit argv, or main() would parse this script's own flags
+    swipe_site.main([csv_file, "-o", os.path.join(output_dir, "index.html")])
+
+
+def measure(fn, *args, repeat=3):
+    """(seconds, peak MiB) of a stage
+
+    The time is the best of up to repeat runs (one when a run takes over a
+    second); memory comes from one more run, since tracemalloc would skew
+    the timing.
+    """
+    with contextlib.redirect_stdout(io.StringIO()):
+        elapsed = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn(*args)
+            elapsed = min(elapsed, time.perf_counter() - start)
+            if elapsed > 1:
+                break
+        tracemalloc.start()
+        fn(*args)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return elapsed, peak / (1024 * 1024)
+
+
+def run_size(n, tmp):
+    csv_file = os.path.join(tmp, f"videos-{n}.csv")
+    write_catalog(csv_file, n)
+    rules = default_rules()
+    rows = read_rows(csv_file)
+    urls = [url for _, url in rows]
+    videos = []
+    categories = {name: [] for name in rules.categories}
+    for title, url in rows:
+        entry, names = home.parse_row({"title": title, "url": url}, rules)
+        videos.append(entry)
+        for name in names:
+            categories[name].append(entry)
+    page_bytes = stage_render(videos, categories)
+    site_dir = os.path.join(tmp, f"site-{n}")
+    swipe_dir = os.path.join(tmp, f"swipe-{n}")
+    os.makedirs(swipe_dir, exist_ok=True)
+
+    stages = [
+        ("parse", stage_parse, (csv_file,)),
+        ("extract", stage_extract, (urls,)),
+        ("categorize", stage_categorize, (rows, rules)),
+        ("render", stage_render, (videos, categories)),
+        ("write", stage_write, (page_bytes, os.path.join(tmp, "write.html"))),
+        ("home.main", stage_home, (csv_file, site_dir)),
+        ("swipe_site", stage_swipe_site, (csv_file, swipe_dir)),
+    ]
+    results = {}
+    for name, fn, args in stages:
+        seconds, peak = measure(fn, *args)
+        results[name] = {"seconds": round(seconds, 6), "peak_mib": round(peak, 3)}
+    return results
+
+
+HEADER = f"{'rows':>8}  {'stage':<12} {'seconds':>10} {'rows/s':>10} {'peak MiB':>9}"
+
+
+def print_size(n, stages):
+    for k, (name, stage) in enumerate(stages.items()):
+        rate = n / stage["seconds"] if stage["seconds"] else 0
+        print(f"{n if k == 0 else '':>8}  {name:<12} {stage['seconds']:>10.3f} {rate:>10,.0f} "
+              f"{stage['peak_mib']:>9.1f}")
+
+
+def compare(before, after, threshold=THRESHOLD):
+    """Print old vs new per stage; returns the number of regressions"""
+    regressions = 0
+    print(f"{'rows':>8}  {'stage':<12} {'seconds':>19} {'change':>8} {'peak MiB':>17} {'change':>8}")
+    for n, stages in after["results"].items():
+        old_stages = before["results"].get(n, {})
+        for name, new in stages.items():
+            old = old_stages.get(name)
+            if old is None:
+                continue
+            time_change = new["seconds"] / old["seconds"] - 1 if old["seconds"] else 0.0
+            memory_change = new["peak_mib"] / old["peak_mib"] - 1 if old["peak_mib"] else 0.0
+            flag = ""
+            slower = time_change > threshold and new["seconds"] - old["seconds"] > MIN_SECONDS
+            hungrier = memory_change > threshold and new["peak_mib"] - old["peak_mib"] > MIN_MIB
+            if slower or hungrier:
+                flag = "  REGRESSION"
+                regressions += 1
+            print(f"{n:>8}  {name:<12} {old['seconds']:>9.3f} → {new['seconds']:<7.3f} {time_change:>+8.0%} "
+                  f"{old['peak_mib']:>7.1f} → {new['peak_mib']:<7.1f} {memory_change:>+8.0%}{flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark every build stage on synthetic catalogs")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES,
+                        help="catalog sizes in rows (default: %(default)s)")
+    parser.add_argument("--json", metavar="FILE", help="write the results to FILE")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"),
+                        help="compare two --json result files instead of running")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD,
+                        help="relative slowdown or memory growth flagged as a regression (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        runs = []
+        for path in args.compare:
+            with open(path, "r", encoding="utf-8") as f:
+                runs.append(json.load(f))
+        regressions = compare(*runs, threshold=args.threshold)
+        print(f"\n{regressions} regression(s) above {args.threshold:.0%}" if regressions
+              else f"\n✅ No regressions above {args.threshold:.0%}")
+        return 1 if regressions else 0
+
+    results = {}
+    print(HEADER)
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in args.sizes:
+            results[str(n)] = run_size(n, tmp)
+            print_size(n, results[str(n)])
+    if args.json:
+        report = {"python": platform.python_version(), "platform": platform.platform(),
+                  "created": time.strftime("%Y-%m-%dT%H:%M:%S"), "results": results}
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=1)
+        print(f"✅ Results written: {args.json}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,149 @@
+"""Compare the compiled template renderer with the generators it replaced
+
+Run from the repo root:  python benchmarks/bench_templates.py [rows ...]
+
+legacy_* are the per-row renderers of swipe_site.py and home.py before
+templates/swipe.html (unescaped f-strings); template_* render the same
+variants through renderer.py, escaping every title and URL. One in three
+synthetic titles contains an "&", so the escape pass does real work.
+
+Reference run (Python 3.11, Linux):
+
+    template load: 2.60 ms compiling, 0.15 ms from the bytecode cache
+
+        rows  legacy swipe_site  template (no categories)  legacy home  template (categories)
+        1000            545,167                   419,935      335,655                191,822
+       10000            542,726                   278,689      338,650                184,975
+      100000            523,357                   276,463      329,772                168,214
+
+The template pages render at roughly half the rate of the unescaped
+f-strings. Most of the difference is escaping: a title with an "&" costs
+about 0.45 us to escape, a clean one about 0.15 us. A 20k-row catalog
+still renders in about 0.1 s, and both variants now come from one
+template.
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import home  # noqa: E402
+import renderer  # noqa: E402
+import swipe_site  # noqa: E402
+from rules import default_rules  # noqa: E402
+from streaming import write_chunks  # noqa: E402
+
+
+def synthetic_entries(n):
+    for i in range(n):
+        if i % 3 == 0:
+            yield (f"MV- Song {i} | Thaman S", f"https://youtu.be/{i:011d}",
+                   f"https://img.youtube.com/vi/{i:011d}/hqdefault.jpg", True)
+        elif i % 3 == 1:
+            yield (f"M-Glimpse {i} | Pawan Kalyan & Team | #OG", f"https://www.youtube.com/watch?v={i:011d}",
+                   f"https://img.youtube.com/vi/{i:011d}/hqdefault.jpg", True)
+        else:
+            yield (f"Partner Merch {i}", f"https://example.com/shop/{i}",
+                   "https://via.placeholder.com/360x200.png?text=Website+Preview", False)
+
+
+def legacy_swipe_site(videos, total):
+    """swipe_site.iter_html before the shared template"""
+    yield home.SWIPE_HEAD
+    for i, (title, url, thumb, is_youtube) in enumerate(videos):
+        button_class = "watch-now" if is_youtube else "visit-now"
+        button_text = "▶ Watch Now" if is_youtube else "🌐 Visit Now"
+        yield f"""
+            <div class="card" style="z-index:{total-i}">
+                <img src="{thumb}" alt="{title}">
+                <h2>{title}</h2>
+                <a href="{url}" target="_blank" class="{button_class}">{button_text}</a>
+            </div>
+        """
+    yield home.SWIPE.overlays(swipe_site.LABELS) + home.SWIPE.script() + home.PAGE_END
+
+
+def legacy_home(videos, categories, total):
+    """home.iter_swipe before the shared template"""
+    yield home.SWIPE_HEAD
+    for i, (title, url, thumb, is_youtube) in enumerate(videos):
+        button_class = "watch-now" if is_youtube else "visit-now"
+        button_text = "▶ Watch Now" if is_youtube else "🌐 Visit Now"
+        yield f"""
+    <div class="card" style="z-index:{total-i+1}">""" + f"""
+      <img src="{thumb}" alt="{title}">
+      <h2>{title}</h2>
+      <a href="{url}" target="_blank" class="{button_class}">{button_text}</a>
+    </div>
+"""
+    yield home.CATEGORIES_HEAD
+    for category, items in categories.items():
+        yield f"""        <div class="category-block">
+          <h3>{category}</h3>
+          <div class="thumb-grid">
+"""
+        for title, url, thumb, _ in items:
+            yield f"""            <a href="{url}" target="_blank"><img src="{thumb}" alt="{title}"></a>\n"""
+        yield home.CATEGORY_FOOT
+    yield home.SWIPE_TAIL + home.PAGE_END
+
+
+def rate(render, n, output_file, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        write_chunks(render(), output_file)
+        best = min(best, time.perf_counter() - start)
+    return n / best
+
+
+def load_times(repeat=20):
+    """Milliseconds to load swipe.html with an empty and with a warm bytecode cache"""
+    cold = warm = float("inf")
+    saved = renderer.CACHE_DIR
+    try:
+        for _ in range(repeat):
+            with tempfile.TemporaryDirectory() as tmp:
+                renderer.CACHE_DIR = tmp
+                renderer.clear_cache()
+                start = time.perf_counter()
+                renderer.load_template("swipe.html")
+                cold = min(cold, time.perf_counter() - start)
+                renderer.clear_cache()
+                start = time.perf_counter()
+                renderer.load_template("swipe.html")
+                warm = min(warm, time.perf_counter() - start)
+    finally:
+        renderer.CACHE_DIR = saved
+        renderer.clear_cache()
+    return cold * 1000, warm * 1000
+
+
+def main(sizes):
+    cold, warm = load_times()
+    print(f"template load: {cold:.2f} ms compiling, {warm:.2f} ms from the bytecode cache\n")
+    rules = default_rules()
+    template = renderer.load_template("swipe.html")
+    with tempfile.TemporaryDirectory() as tmp:
+        output_file = os.path.join(tmp, "index.html")
+        print(f"{'rows':>8} {'legacy swipe_site':>18} {'template (no categories)':>25} "
+              f"{'legacy home':>12} {'template (categories)':>22}")
+        for n in sizes:
+            videos = list(synthetic_entries(n))
+            categories = {name: [] for name in rules.categories}
+            for entry in videos:
+                categories[rules.categorize(entry[0])].append(entry)
+            row = [
+                rate(lambda: legacy_swipe_site(videos, n), n, output_file),
+                rate(lambda: template.render(videos, n, labels=swipe_site.LABELS,
+                                             page_title=swipe_site.PAGE_TITLE), n, output_file),
+                rate(lambda: legacy_home(videos, categories, n), n, output_file),
+                rate(lambda: template.render(videos, n, categories, labels=home.LABELS), n, output_file),
+            ]
+            print(f"{n:>8} {row[0]:>18,.0f} {row[1]:>25,.0f} {row[2]:>12,.0f} {row[3]:>22,.0f}")
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [1000, 10000, 100000])
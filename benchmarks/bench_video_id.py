@@ -0,0 +1,75 @@
+"""Per-URL cost of the shared extractor versus the old three-regex chain
+
+Run from the repo root:  python benchmarks/bench_video_id.py [urls]
+
+"uncached" calls the compiled single-pass matcher directly, "cached" goes
+through the LRU memo; the sample repeats each distinct URL ~50 times.
+
+Reference run (Python 3.11, Linux, 200k URLs / 4k distinct):
+
+    legacy three-regex chain      2183 ns/url
+    single pass, uncached          756 ns/url    2.9x
+    single pass, LRU cached        179 ns/url   12.2x
+"""
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import video_id  # noqa: E402
+
+
+def legacy_extract_video_id(url: str) -> str:
+    """The old copy-pasted chain from home.py / swipe_site.py"""
+    match = re.search(r"youtu\.be/([A-Za-z0-9_-]{11})", url)
+    if match:
+        return match.group(1)
+    match = re.search(r"v=([A-Za-z0-9_-]{11})", url)
+    if match:
+        return match.group(1)
+    match = re.search(r"embed/([A-Za-z0-9_-]{11})", url)
+    if match:
+        return match.group(1)
+    return None
+
+
+def sample_urls(n, distinct, seed=7):
+    rng = random.Random(seed)
+    alphabet = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789_-"
+    forms = [
+        "https://youtu.be/{}?si=GxjAF0ZFGDk0Xr9H",
+        "https://www.youtube.com/watch?v={}",
+        "https://www.youtube.com/embed/{}",
+        "https://www.filmydice.com/search.php?q=They%20Call%20Him%20OG&n={}",
+    ]
+    pool = [rng.choice(forms).format("".join(rng.choice(alphabet) for _ in range(11)))
+            for _ in range(distinct)]
+    return [rng.choice(pool) for _ in range(n)]
+
+
+def per_url_ns(fn, urls):
+    start = time.perf_counter_ns()
+    for url in urls:
+        fn(url)
+    return (time.perf_counter_ns() - start) / len(urls)
+
+
+def main(n):
+    urls = sample_urls(n, distinct=max(1, n // 50))
+    uncached = video_id.extract_video_id.__wrapped__
+    legacy = per_url_ns(legacy_extract_video_id, urls)
+    single = per_url_ns(uncached, urls)
+    video_id.extract_video_id.cache_clear()
+    cached = per_url_ns(video_id.extract_video_id, urls)
+    print(f"{n:,} URLs ({len(set(urls)):,} distinct)")
+    print(f"  legacy three-regex chain  {legacy:8.0f} ns/url")
+    print(f"  single pass, uncached     {single:8.0f} ns/url  {legacy / single:5.1f}x")
+    print(f"  single pass, LRU cached   {cached:8.0f} ns/url  {legacy / cached:5.1f}x")
+    print(f"  cache: {video_id.extract_video_id.cache_info()}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200000)
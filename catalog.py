@@ -0,0 +1,245 @@
+import argparse
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+from rules import default_rules, load_rules
+
+MAGIC = b"SWIPECAT"
+VERSION = 3
+# magic, version, rows, source rows (duplicates included), strings, categories, rules fingerprint
+HEADER = struct.Struct("<8sIIIII32s")
+EXTENSION = ".catalog"
+
+
+def _u32(values=()):
+    column = array("I", values)
+    if column.itemsize != 4:
+        column = array("L", values)
+    return column
+
+
+def _write_column(f, column):
+    """Little-endian, padded to 4 bytes so the next column stays aligned"""
+    if sys.byteorder == "big" and column.itemsize > 1:
+        column = array(column.typecode, column)
+        column.byteswap()
+    data = column.tobytes()
+    f.write(data)
+    f.write(b"\0" * (-len(data) % 4))
+
+
+def compile_catalog(csv_file="videos.csv", output_file=None, rules=None):
+    """Compile a CSV into the binary catalog format; returns the catalog path
+
+    Layout after the header, every column a flat little-endian array:
+
+        string offsets   u32 × (strings + 1) into the string blob
+        title, url,      u32 × rows each: ids into the string table
+        thumb ids
+        YouTube flags    u8 × rows
+        row categories   u32 × (rows + 1) offsets, then u32 category ids
+        category rows    u32 × (categories + 1) offsets, then u32 row ids
+        category names   u32 × categories: ids into the string table
+        string blob      UTF-8, every distinct string stored once
+
+    Entries and categories are those read_catalog() yields with rules, so
+    the catalog is only valid for the rules it was compiled with.
+    """
+    from dedupe import Deduper
+    from home import read_catalog
+
+    rules = rules or default_rules()
+    output_file = output_file or os.path.splitext(csv_file)[0] + EXTENSION
+    strings = {}
+    blob = []
+    offsets = _u32([0])
+    titles, urls, thumbs = _u32(), _u32(), _u32()
+    flags = array("B")
+    row_offsets, row_categories = _u32([0]), _u32()
+    category_ids = {name: i for i, name in enumerate(rules.categories)}
+    category_rows = [_u32() for _ in category_ids]
+
+    def intern(text):
+        sid = strings.get(text)
+        if sid is None:
+            sid = strings[text] = len(strings)
+            data = text.encode("utf-8")
+            blob.append(data)
+            offsets.append(offsets[-1] + len(data))
+        return sid
+
+    # Builds from the CSV count merged duplicates in the card stack; the header keeps that count
+    deduper = Deduper()
+    pairs = read_catalog(csv_file, rules, dedupe=deduper)
+    for row, ((title, url, thumb, is_youtube), names) in enumerate(pairs):
+        titles.append(intern(title))
+        urls.append(intern(url))
+        thumbs.append(intern(thumb))
+        flags.append(1 if is_youtube else 0)
+        for name in names:
+            if name not in category_ids:
+                category_ids[name] = len(category_ids)
+                category_rows.append(_u32())
+            cid = category_ids[name]
+            row_categories.append(cid)
+            category_rows[cid].append(row)
+        row_offsets.append(len(row_categories))
+    names = _u32(intern(name) for name in category_ids)
+
+    category_offsets = _u32([0])
+    for rows in category_rows:
+        category_offsets.append(category_offsets[-1] + len(rows))
+
+    header = HEADER.pack(MAGIC, VERSION, len(titles), len(titles) + deduper.merged, len(strings),
+                         len(category_ids), rules.fingerprint.encode("ascii")[:32])
+    tmp = f"{output_file}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(header)
+        for column in (offsets, titles, urls, thumbs, flags, row_offsets, row_categories,
+                       category_offsets, *category_rows, names):
+            _write_column(f, column)
+        f.writelines(blob)
+    os.replace(tmp, output_file)
+    return output_file
+
+
+def is_catalog(path):
+    if not isinstance(path, (str, bytes, os.PathLike)):
+        return False
+    try:
+        with open(path, "rb") as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+class CategoryRows:
+    """The entries of one category, read from the catalog on iteration"""
+
+    __slots__ = ("catalog", "rows")
+
+    def __init__(self, catalog, rows):
+        self.catalog = catalog
+        self.rows = rows
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __iter__(self):
+        entry = self.catalog.__getitem__
+        for row in self.rows:
+            yield entry(row)
+
+
+class Catalog:
+    """A compiled catalog, memory-mapped and read in place
+
+    Indexes and iterates like a list of (title, url, thumb, is_youtube)
+    entries. Nothing is decoded up front: opening it costs a header read
+    and an mmap, and each entry is decoded from the string table when it
+    is accessed. source_rows counts the CSV rows it was compiled from,
+    merged duplicates included.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self._mmap)
+        magic, version, rows, source_rows, strings, categories, fingerprint = HEADER.unpack_from(view)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path}: not a version {VERSION} catalog, recompile it")
+        self.rules_fingerprint = fingerprint.decode("ascii")
+        pos = HEADER.size
+
+        def column(count, fmt="I"):
+            nonlocal pos
+            size = count * (4 if fmt == "I" else 1)
+            data = view[pos:pos + size]
+            pos += size + (-size % 4)
+            if fmt == "B":
+                return data
+            if sys.byteorder == "big":
+                swapped = _u32()
+                swapped.frombytes(data)
+                swapped.byteswap()
+                return swapped
+            return data.cast("I")
+
+        self._offsets = column(strings + 1)
+        self._titles = column(rows)
+        self._urls = column(rows)
+        self._thumbs = column(rows)
+        self._flags = column(rows, "B")
+        self._row_offsets = column(rows + 1)
+        self._row_categories = column(self._row_offsets[rows] if rows else 0)
+        category_offsets = column(categories + 1)
+        self._category_rows = [column(category_offsets[i + 1] - category_offsets[i]) for i in range(categories)]
+        name_ids = column(categories)
+        self._blob_start = pos
+        self.names = [self._string(sid) for sid in name_ids]
+        self._rows = rows
+        self.source_rows = source_rows
+
+    def _string(self, sid):
+        # Slicing the mmap and decoding the bytes beats decoding a memoryview
+        base = self._blob_start
+        return self._mmap[base + self._offsets[sid]:base + self._offsets[sid + 1]].decode()
+
+    def __len__(self):
+        return self._rows
+
+    def __getitem__(self, row):
+        if not 0 <= row < self._rows:
+            raise IndexError(row)
+        string = self._string
+        return (string(self._titles[row]), string(self._urls[row]), string(self._thumbs[row]),
+                bool(self._flags[row]))
+
+    def __iter__(self):
+        mm, base, offsets = self._mmap, self._blob_start, self._offsets
+        for title, url, thumb, flag in zip(self._titles, self._urls, self._thumbs, self._flags):
+            yield (mm[base + offsets[title]:base + offsets[title + 1]].decode(),
+                   mm[base + offsets[url]:base + offsets[url + 1]].decode(),
+                   mm[base + offsets[thumb]:base + offsets[thumb + 1]].decode(),
+                   flag == 1)
+
+    def categories(self):
+        """{category: entries} in rules order, the shape iter_swipe takes"""
+        return {name: CategoryRows(self, rows) for name, rows in zip(self.names, self._category_rows)}
+
+    def pairs(self):
+        """Yield (entry, categories) like read_catalog"""
+        offsets, ids, names = self._row_offsets, self._row_categories, self.names
+        for row, entry in enumerate(self):
+            yield entry, [names[ids[k]] for k in range(offsets[row], offsets[row + 1])]
+
+
+def open_catalog(path, rules=None):
+    """Open a compiled catalog, checking it was compiled with rules"""
+    catalog = Catalog(path)
+    rules = rules or default_rules()
+    if catalog.rules_fingerprint != rules.fingerprint[:32]:
+        raise ValueError(f"{path} was compiled with other category rules; recompile it: "
+                         f"python catalog.py --csv <source.csv> --rules <rules file>")
+    return catalog
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compile videos.csv into a memory-mapped binary catalog")
+    parser.add_argument("--csv", default="videos.csv", help="source CSV (default: %(default)s)")
+    parser.add_argument("-o", "--output", help=f"output file (default: the CSV name with {EXTENSION})")
+    parser.add_argument("--rules", metavar="FILE", help="categories config (default: categories.json)")
+    args = parser.parse_args(argv)
+    rules = load_rules(args.rules) if args.rules else default_rules()
+    path = compile_catalog(args.csv, args.output, rules)
+    catalog = Catalog(path)
+    print(f"✅ Catalog compiled: {path} ({len(catalog)} rows, {os.path.getsize(path):,} bytes, "
+          f"csv {os.path.getsize(args.csv):,} bytes)")
+
+
+if __name__ == "__main__":
+    main()
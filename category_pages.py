@@ -0,0 +1,133 @@
+import os
+import re
+from collections import deque
+from itertools import islice
+
+from incremental import text_hash
+from renderer import load_template
+
+CATEGORY_DIR = "categories"
+PAGE_SIZE = 48
+# Tiles of each category left on the main page, next to the link to its pages
+PREVIEW_TILES = 4
+
+SWIPE = load_template("swipe.html")
+
+
+def category_slugs(names):
+    """{category: file name stem}, ASCII and unique: "🎵 Music" -> "music" """
+    slugs = {}
+    for name in names:
+        slug = re.sub(r"[^a-z0-9]+", "-", name.lower()).strip("-") or "category"
+        if slug in slugs.values():
+            slug = f"{slug}-{text_hash(name)[:8]}"
+        slugs[name] = slug
+    return slugs
+
+
+def page_name(slug, number):
+    return f"{slug}-{number}.html"
+
+
+def render_page(path, category, number, entries, images=None, prev_href=None, next_href=None,
+                stylesheet=None):
+    """Write one page of a category's tiles; runs in the worker processes"""
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(SWIPE.category_page(category, number, entries, images, prev_href, next_href, stylesheet))
+
+
+def write_stylesheet(folder):
+    """Write the pages' shared stylesheet, named by its content, and return its file name"""
+    css = SWIPE.category_css()
+    name = f"pages.{text_hash(css)[:12]}.css"
+    path = os.path.join(folder, name)
+    if not os.path.exists(path):
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(css)
+    return name
+
+
+class CategoryPages:
+    """Each category's tiles on pages of their own, page_size tiles each
+
+    Pages are <output_dir>/categories/<slug>-<n>.html, linked to their
+    neighbours and to one stylesheet they share, and the main page's
+    categories card keeps only a count, a link and the first PREVIEW_TILES
+    tiles per category (see summaries()). Entries stream from the category
+    lists one page ahead of the page being submitted, and pages render on
+    a process pool of workers (one per CPU by default; 1 renders in this
+    process, as does the default on a single CPU, where a pool only adds
+    the cost of shipping entries to it), so categories render in parallel
+    while the main page goes on being written.
+    """
+
+    def __init__(self, output_dir, page_size=PAGE_SIZE, images=None, workers=None):
+        self.dir = os.path.join(output_dir, CATEGORY_DIR)
+        self.page_size = page_size
+        # Pages sit one directory down from the thumbs/ the image sets link to
+        self.images = {url: image.rebased("../") for url, image in images.items()} if images else None
+        self.workers = 1 if workers is None and (os.cpu_count() or 1) == 1 else workers
+        self.pages = 0
+
+    def _page_images(self, entries):
+        if not self.images:
+            return None
+        return {thumb: self.images[thumb] for _, _, thumb, _ in entries if thumb in self.images}
+
+    def summaries(self, categories, preview=PREVIEW_TILES):
+        """Write the pages of every category in categories ({name: entries})
+        and yield (name, count, href of page 1 or None, first preview entries)
+        for each, in order, as soon as its entries have been read"""
+        os.makedirs(self.dir, exist_ok=True)
+        slugs = category_slugs(categories)
+        stylesheet = write_stylesheet(self.dir)
+        written = {stylesheet}
+        pool = None
+        if self.workers != 1:
+            from concurrent.futures import ProcessPoolExecutor
+            pool = ProcessPoolExecutor(max_workers=self.workers)
+        futures = deque()
+        # Pages waiting for a worker hold their entries, so only a few are queued at a time
+        in_flight = 4 * (self.workers or os.cpu_count() or 1)
+
+        def submit(slug, category, number, entries, last):
+            name = page_name(slug, number)
+            args = (os.path.join(self.dir, name), category, number, entries, self._page_images(entries),
+                    page_name(slug, number - 1) if number > 1 else None,
+                    None if last else page_name(slug, number + 1), stylesheet)
+            if pool:
+                futures.append(pool.submit(render_page, *args))
+                while len(futures) > in_flight:
+                    futures.popleft().result()
+            else:
+                render_page(*args)
+            written.add(name)
+
+        try:
+            for category, items in categories.items():
+                slug = slugs[category]
+                items = iter(items)
+                count, first, number = 0, None, 0
+                # A page is submitted once the next one is read, when its next link is known
+                page = list(islice(items, self.page_size))
+                while page:
+                    number += 1
+                    count += len(page)
+                    first = first if first is not None else page[:preview]
+                    following = list(islice(items, self.page_size))
+                    submit(slug, category, number, page, not following)
+                    page = following
+                self.pages += number
+                yield category, count, f"{CATEGORY_DIR}/{page_name(slug, 1)}" if count else None, first or []
+            for future in futures:
+                future.result()
+        finally:
+            if pool:
+                pool.shutdown(cancel_futures=True)
+
+        # Drop pages and stylesheets left behind by earlier builds, and their .gz/.br siblings
+        for name in os.listdir(self.dir):
+            source = name[:-3] if name.endswith((".gz", ".br")) else name
+            if source.endswith((".html", ".css")) and source not in written:
+                os.remove(os.path.join(self.dir, name))
+        print(f"✅ Category pages generated: {self.pages} pages for {len(slugs)} categories in {self.dir}")
@@ -0,0 +1,343 @@
+import argparse
+import asyncio
+import contextlib
+import csv
+import io
+import json
+import os
+import signal
+import time
+from collections import deque
+from urllib.parse import parse_qs
+
+from rank import LOG_FIELDS
+
+LOG_FILE = "swipes.csv"
+MAX_LOG_BYTES = 64 * 1024 * 1024
+ACTIONS = ("right", "left", "up")
+MAX_BODY = 256 * 1024
+MAX_EVENTS = 1000
+MAX_URL = 2048
+WINDOW = 3600
+BUCKET = 60
+TOP = 100
+# Beacons are sent as text/plain, which needs no preflight; the rest is for fetch() and /counts
+CORS_HEADERS = ("Access-Control-Allow-Origin: *\r\nAccess-Control-Allow-Methods: POST, GET, OPTIONS\r\n"
+                "Access-Control-Allow-Headers: Content-Type\r\n")
+REASONS = {200: "OK", 204: "No Content", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           411: "Length Required", 413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+class EventLog:
+    """Append-only swipe log, one rank.py row per event, rotated by size
+
+    When a write would take the file past max_bytes, the file is renamed
+    to <name>-<timestamp><ext> and a new one started; every file has its
+    own header, so each is a complete swipe log for rank.py.
+    """
+
+    def __init__(self, path=LOG_FILE, max_bytes=MAX_LOG_BYTES, fsync=True):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.fsync = fsync
+        self.rotated = []
+        self._open()
+
+    def _open(self):
+        # Binary, so sizes are counted in the bytes max_bytes limits
+        self.file = open(self.path, "ab")
+        self.size = self.file.tell()
+        header = (",".join(LOG_FIELDS) + "\r\n").encode("utf-8")
+        self.header_size = len(header)
+        if not self.size:
+            self._write(header)
+
+    def _write(self, data):
+        self.file.write(data)
+        self.file.flush()
+        if self.fsync:
+            os.fsync(self.file.fileno())
+        self.size += len(data)
+
+    def rotate(self):
+        self.file.close()
+        stem, ext = os.path.splitext(self.path)
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        target = f"{stem}-{stamp}{ext}"
+        n = 1
+        while os.path.exists(target):
+            n += 1
+            target = f"{stem}-{stamp}-{n}{ext}"
+        os.replace(self.path, target)
+        self.rotated.append(target)
+        self._open()
+
+    def write(self, rows):
+        """Append rows (tuples in LOG_FIELDS order) in one write and one fsync"""
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        data = buffer.getvalue().encode("utf-8")
+        if self.size + len(data) > self.max_bytes and self.size > self.header_size:
+            self.rotate()
+        self._write(data)
+
+    def close(self):
+        self.file.close()
+
+
+class RollingCounts:
+    """Per-item swipe counts over the last window seconds
+
+    Counts go into one bucket per bucket seconds; buckets older than the
+    window are dropped as new ones start, so memory follows the items
+    swiped recently, not the whole history.
+    """
+
+    def __init__(self, window=WINDOW, bucket=BUCKET):
+        self.window = window
+        # A window shorter than a bucket would drop the bucket being filled
+        self.bucket = min(bucket, window)
+        self.buckets = deque()   # (bucket start, {(segment, url): [right, left, up, last_seen]})
+
+    def _current(self, now):
+        start = now - now % self.bucket
+        if not self.buckets or self.buckets[-1][0] != start:
+            self.buckets.append((start, {}))
+        while len(self.buckets) > 1 and self.buckets[0][0] <= now - self.window:
+            self.buckets.popleft()
+        return self.buckets[-1][1]
+
+    def add(self, rows, now):
+        counts = self._current(now)
+        for url, right, left, up, last_seen, segment in rows:
+            item = counts.get((segment, url))
+            if item is None:
+                item = counts[(segment, url)] = [0, 0, 0, 0.0]
+            item[0] += right
+            item[1] += left
+            item[2] += up
+            item[3] = max(item[3], last_seen)
+
+    def totals(self, now):
+        """{(segment, url): [right, left, up, last_seen]} within the window"""
+        self._current(now)
+        totals = {}
+        for _, counts in self.buckets:
+            for key, (right, left, up, last_seen) in counts.items():
+                item = totals.get(key)
+                if item is None:
+                    totals[key] = [right, left, up, last_seen]
+                else:
+                    item[0] += right
+                    item[1] += left
+                    item[2] += up
+                    item[3] = max(item[3], last_seen)
+        return totals
+
+
+def parse_batch(body, now):
+    """Log rows of one beacon: {"segment": "...", "events": [[url, action, ms], ...]}
+
+    The receive time is logged, not the client's clock, which only has to
+    order the events within the batch. Raises ValueError on a bad batch.
+    """
+    data = json.loads(body)
+    if not isinstance(data, dict) or not isinstance(data.get("events"), list):
+        raise ValueError("expected {\"segment\": ..., \"events\": [...]}")
+    events = data["events"]
+    if len(events) > MAX_EVENTS:
+        raise ValueError(f"more than {MAX_EVENTS} events in one batch")
+    segment = str(data.get("segment") or "")[:64]
+    rows = []
+    for event in events:
+        if not isinstance(event, list) or len(event) < 2:
+            raise ValueError("events are [url, action, time] lists")
+        url, action = event[0], event[1]
+        if not isinstance(url, str) or not url or len(url) > MAX_URL or action not in ACTIONS:
+            raise ValueError(f"bad event {event!r}")
+        rows.append((url, int(action == "right"), int(action == "left"), int(action == "up"), round(now, 3),
+                     segment))
+    return rows
+
+
+class Collector:
+    """Receives swipe batches, group-commits them to an EventLog and counts them
+
+    Batches that arrive while a write is in progress join the next group,
+    so a burst of beacons costs one write and one fsync per group, not
+    per request. A batch is acknowledged once its group is on disk.
+    """
+
+    def __init__(self, log, counts=None):
+        self.log = log
+        self.counts = counts or RollingCounts()
+        self.pending = []
+        self.group = None
+        self.wakeup = asyncio.Event()
+        self.closing = False
+        self.events = self.batches = self.commits = 0
+        self._writer = None
+
+    async def submit(self, rows):
+        """Queue rows for the next group commit and wait until it is written"""
+        if self._writer is None:
+            self._writer = asyncio.create_task(self._write_groups())
+        if self.group is None:
+            self.group = asyncio.get_running_loop().create_future()
+        group = self.group
+        self.pending.extend(rows)
+        self.wakeup.set()
+        await asyncio.shield(group)
+        self.counts.add(rows, time.time())
+        self.events += len(rows)
+        self.batches += 1
+
+    async def _write_groups(self):
+        while not (self.closing and not self.pending):
+            await self.wakeup.wait()
+            self.wakeup.clear()
+            while self.pending:
+                rows, group = self.pending, self.group
+                self.pending, self.group = [], None
+                try:
+                    # Off the event loop, so the next group fills while this one is written
+                    await asyncio.to_thread(self.log.write, rows)
+                except Exception as e:
+                    group.set_exception(e)
+                else:
+                    self.commits += 1
+                    group.set_result(None)
+
+    def top(self, n=TOP):
+        """The n items with the most right swipes in the window, as log rows"""
+        totals = self.counts.totals(time.time())
+        ranked = sorted(totals.items(), key=lambda item: -item[1][0])[:n]
+        return [dict(zip(LOG_FIELDS, (url, *counts, segment))) for (segment, url), counts in ranked]
+
+    async def close(self):
+        """Write what is pending, then close the log"""
+        self.closing = True
+        self.wakeup.set()
+        if self._writer is not None:
+            await self._writer
+        self.log.close()
+
+    async def handle(self, reader, writer):
+        """One HTTP/1.1 connection: POST /events, GET /counts, kept alive"""
+        try:
+            while True:
+                request = await reader.readline()
+                if not request:
+                    break
+                try:
+                    method, target, _ = request.decode("latin-1").split(" ", 2)
+                except ValueError:
+                    await _respond(writer, 400, close=True)
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                close = headers.get("connection", "").lower() == "close"
+                length = headers.get("content-length", "0")
+                if not length.isdigit():
+                    await _respond(writer, 400, close=True)
+                    break
+                length = int(length)
+                if length > MAX_BODY:
+                    await _respond(writer, 413, close=True)
+                    break
+                body = await reader.readexactly(length) if length else b""
+                status, payload = await self._route(method, target.split("?", 1), headers, body)
+                await _respond(writer, status, payload, close)
+                if close:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _route(self, method, target, headers, body):
+        path = target[0]
+        if method == "OPTIONS":
+            return 204, None
+        if path == "/events":
+            if method != "POST":
+                return 405, None
+            if "content-length" not in headers:
+                return 411, None
+            try:
+                rows = parse_batch(body, time.time())
+            except ValueError as e:
+                return 400, {"error": str(e)}
+            try:
+                await self.submit(rows)
+            except OSError as e:
+                print(f"⚠️ Could not write {self.log.path}: {e}")
+                return 500, None
+            return 204, None
+        if path == "/counts":
+            if method != "GET":
+                return 405, None
+            top = parse_qs(target[1]).get("top", [""])[0] if len(target) > 1 else ""
+            return 200, {"window": self.counts.window, "events": self.events, "commits": self.commits,
+                         "items": self.top(int(top) if top.isdigit() else TOP)}
+        return 404, None
+
+
+async def _respond(writer, status, payload=None, close=False):
+    body = json.dumps(payload).encode("utf-8") if payload is not None else b""
+    head = (f"HTTP/1.1 {status} {REASONS[status]}\r\n{CORS_HEADERS}"
+            f"Content-Length: {len(body)}\r\n")
+    if payload is not None:
+        head += "Content-Type: application/json\r\n"
+    if close:
+        head += "Connection: close\r\n"
+    writer.write(head.encode("latin-1") + b"\r\n" + body)
+    await writer.drain()
+
+
+async def serve(host="127.0.0.1", port=8765, log_file=LOG_FILE, max_bytes=MAX_LOG_BYTES, fsync=True,
+                window=WINDOW, ready=None):
+    """Run the collector until SIGINT or SIGTERM; ready(port) is called once it listens"""
+    collector = Collector(EventLog(log_file, max_bytes, fsync), RollingCounts(window))
+    server = await asyncio.start_server(collector.handle, host, port)
+    port = server.sockets[0].getsockname()[1]
+    stop = asyncio.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        with contextlib.suppress(NotImplementedError):
+            asyncio.get_running_loop().add_signal_handler(sig, stop.set)
+    if ready:
+        ready(port)
+    print(f"✅ Collecting swipes on http://{host}:{port}/events → {log_file}", flush=True)
+    try:
+        async with server:
+            await stop.wait()
+    finally:
+        await collector.close()
+    print(f"✅ Collector stopped: {collector.events} events in {collector.commits} writes "
+          f"({len(collector.log.rotated)} rotated logs)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Collect swipe beacons from the swipe page into a swipe log")
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on (default: %(default)s)")
+    parser.add_argument("--port", type=int, default=8765, help="port to listen on (default: %(default)s)")
+    parser.add_argument("--log", default=LOG_FILE, help="swipe log to append to (default: %(default)s)")
+    parser.add_argument("--max-mb", type=float, default=MAX_LOG_BYTES / (1024 * 1024),
+                        help="rotate the log past this size (default: %(default)s)")
+    parser.add_argument("--window", type=int, default=WINDOW,
+                        help="seconds of swipes kept in the live /counts (default: %(default)s)")
+    parser.add_argument("--no-fsync", action="store_true", help="skip the fsync after each group commit")
+    args = parser.parse_args(argv)
+    if args.window < 1:
+        parser.error("--window must be at least 1 second")
+    asyncio.run(serve(args.host, args.port, args.log, int(args.max_mb * 1024 * 1024),
+                      not args.no_fsync, args.window))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+import hashlib
+import math
+from urllib.parse import urlsplit, urlunsplit
+
+TRACKING_PARAMS = {"si", "feature", "pp", "fbclid", "gclid", "dclid", "msclkid", "igshid", "igsh",
+                   "mc_cid", "mc_eid", "ref_src", "ab_channel"}
+TRACKING_PREFIXES = ("utm_",)
+# The only YouTube parameters worth keeping: where playback starts
+YOUTUBE_KEEP = ("t", "start")
+YOUTUBE_WATCH = "https://www.youtube.com/watch?v="
+BLOOM_ERROR_RATE = 1e-6
+MAX_EXAMPLES = 10
+
+
+def _is_tracking(param):
+    name = param.partition("=")[0].lower()
+    return name in TRACKING_PARAMS or name.startswith(TRACKING_PREFIXES)
+
+
+def canonical_url(url, video_id=None):
+    """url without tracking parameters; YouTube videos as watch?v=<id>
+
+    youtu.be, watch?v=, embed/, shorts/ and the other forms video_id.py
+    recognizes all become https://www.youtube.com/watch?v=<id>, keeping
+    only a start time. Other URLs keep their path, query order and
+    fragment; only the scheme and host are lowercased and tracking
+    parameters dropped.
+    """
+    if video_id:
+        if "t=" not in url and "start=" not in url:
+            return YOUTUBE_WATCH + video_id
+        query = urlsplit(url).query
+        kept = [p for p in query.split("&") if p.partition("=")[0] in YOUTUBE_KEEP]
+        return YOUTUBE_WATCH + video_id + "".join("&" + p for p in kept)
+    parts = urlsplit(url)
+    if not parts.netloc:
+        return url
+    query = "&".join(p for p in parts.query.split("&") if p and not _is_tracking(p))
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path, query, parts.fragment))
+
+
+class BloomFilter:
+    """Set membership in a fixed number of bits, wrong about 1 in 1/error_rate times
+
+    A false positive makes a new key look seen; there are no false
+    negatives. Sized for capacity keys: past that, the error rate climbs.
+    """
+
+    def __init__(self, capacity, error_rate=BLOOM_ERROR_RATE):
+        self.size = max(64, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def add(self, key):
+        """Add key; True when it was (probably) there already"""
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        bits, size = self.bits, self.size
+        present = True
+        for bit in range(h1, h1 + self.hashes * h2, h2):
+            bit %= size
+            byte = bits[bit >> 3]
+            mask = 1 << (bit & 7)
+            if not byte & mask:
+                present = False
+                bits[bit >> 3] = byte | mask
+        return present
+
+
+class Deduper:
+    """Drops entries whose video or canonical URL came up earlier, in one pass
+
+    The first entry for a video (or for a non-YouTube URL) wins. Seen keys
+    go into a set; with bloom_capacity they go into a BloomFilter of that
+    capacity instead, which keeps memory fixed for very large catalogs at
+    the cost of merging roughly one in a million distinct rows by mistake.
+    Entries must carry canonical URLs (see canonical_url).
+    """
+
+    def __init__(self, bloom_capacity=None):
+        self.bloom = BloomFilter(bloom_capacity) if bloom_capacity else None
+        self.seen = set()
+        self.by_video = 0
+        self.by_url = 0
+        self.examples = []
+
+    @property
+    def merged(self):
+        return self.by_video + self.by_url
+
+    def is_duplicate(self, entry):
+        title, url, _, is_youtube = entry
+        # A canonical YouTube URL is the watch URL plus an optional &t=
+        key = url.partition("&")[0] if is_youtube else url
+        if self.bloom is not None:
+            duplicate = self.bloom.add(key)
+        else:
+            duplicate = key in self.seen
+            if not duplicate:
+                self.seen.add(key)
+        if duplicate:
+            if is_youtube:
+                self.by_video += 1
+            else:
+                self.by_url += 1
+            if len(self.examples) < MAX_EXAMPLES:
+                self.examples.append((title, key))
+        return duplicate
+
+    def filter(self, pairs):
+        """Yield the (entry, categories) pairs whose entry is not a duplicate"""
+        for pair in pairs:
+            if not self.is_duplicate(pair[0]):
+                yield pair
+
+    def summary(self):
+        lines = [f"🔗 Merged {self.merged} duplicate rows ({self.by_video} same video, {self.by_url} same URL"
+                 + (", Bloom filter)" if self.bloom is not None else ")")]
+        lines += [f"   {title} → {key}" for title, key in self.examples]
+        if self.merged > len(self.examples):
+            lines.append(f"   … and {self.merged - len(self.examples)} more")
+        return "\n".join(lines)
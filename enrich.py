@@ -0,0 +1,291 @@
+import asyncio
+import json
+import random
+import sqlite3
+import ssl
+import time
+from urllib.parse import quote, urlsplit
+
+DEFAULT_ENDPOINT = "https://www.youtube.com/oembed"
+CACHE_FILE = "metadata.sqlite"
+TTL = 7 * 24 * 3600
+# Rows the endpoint has nothing for are asked about again sooner
+MISSING_TTL = 24 * 3600
+CONCURRENCY = 16
+RETRIES = 3
+BACKOFF = 0.5
+MAX_BACKOFF = 30
+TIMEOUT = 10
+COMMIT_EVERY = 200
+# Failures in a row, before any success, after which the endpoint is taken to be down
+GIVE_UP_AFTER = 20
+USER_AGENT = "swipe-site-enrich/1"
+
+
+class HttpError(Exception):
+    def __init__(self, status, url):
+        super().__init__(f"HTTP {status} from {url}")
+        self.status = status
+
+
+class HttpClient:
+    """A small asyncio HTTP/1.1 client that keeps connections alive
+
+    GET only, which is all an oEmbed endpoint needs. At most
+    max_connections requests are in flight at once; finished connections
+    go back to a per-host idle pool and are reused by the next request.
+    """
+
+    def __init__(self, max_connections=CONCURRENCY, timeout=TIMEOUT):
+        self.slots = asyncio.Semaphore(max_connections)
+        self.timeout = timeout
+        self.idle = {}       # (scheme, host, port) → [(reader, writer)]
+        self.opened = 0
+        self.requests = 0
+        self._ssl = None
+
+    async def _connect(self, scheme, host, port):
+        if scheme == "https" and self._ssl is None:
+            self._ssl = ssl.create_default_context()
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection(host, port, ssl=self._ssl if scheme == "https" else None), self.timeout)
+        self.opened += 1
+        return reader, writer
+
+    async def _exchange(self, conn, host, target):
+        """Send one GET and read the response: (status, headers, body, keep_alive)"""
+        reader, writer = conn
+        writer.write(f"GET {target} HTTP/1.1\r\nHost: {host}\r\nUser-Agent: {USER_AGENT}\r\n"
+                     f"Accept: application/json\r\nAccept-Encoding: identity\r\n\r\n".encode("latin-1"))
+        await writer.drain()
+        status_line = await reader.readline()
+        if not status_line:
+            raise asyncio.IncompleteReadError(b"", None)
+        version, status = status_line.decode("latin-1").split(None, 2)[:2]
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+        if "chunked" in headers.get("transfer-encoding", "").lower():
+            chunks = []
+            while True:
+                size = int((await reader.readline()).split(b";")[0], 16)
+                if not size:
+                    break
+                chunks.append(await reader.readexactly(size))
+                await reader.readline()
+            while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                pass
+            body = b"".join(chunks)
+        elif "content-length" in headers:
+            body = await reader.readexactly(int(headers["content-length"]))
+        else:
+            body = await reader.read()
+            keep_alive = False
+        return int(status), headers, body, keep_alive
+
+    async def get(self, url):
+        """(status, headers, body) of a GET, over a pooled connection when one is idle"""
+        parts = urlsplit(url)
+        key = (parts.scheme, parts.hostname, parts.port or (443 if parts.scheme == "https" else 80))
+        target = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+        async with self.slots:
+            self.requests += 1
+            while True:
+                pool = self.idle.get(key)
+                reused = bool(pool)
+                conn = pool.pop() if reused else await self._connect(*key)
+                try:
+                    status, headers, body, keep_alive = await asyncio.wait_for(
+                        self._exchange(conn, parts.netloc, target), self.timeout)
+                except (OSError, asyncio.IncompleteReadError):
+                    conn[1].close()
+                    if reused:
+                        # The server closed the idle connection; not a failed attempt
+                        continue
+                    raise
+                except BaseException:
+                    conn[1].close()
+                    raise
+                if keep_alive:
+                    self.idle.setdefault(key, []).append(conn)
+                else:
+                    conn[1].close()
+                return status, headers, body
+
+    def close(self):
+        for pool in self.idle.values():
+            for _, writer in pool:
+                writer.close()
+        self.idle.clear()
+
+
+def parse_metadata(body):
+    """{title, thumbnail_url, duration} from an oEmbed response, None if it has none"""
+    try:
+        data = json.loads(body)
+    except ValueError:
+        return None
+    if not isinstance(data, dict):
+        return None
+    duration = data.get("duration")
+    record = {
+        "title": str(data.get("title") or "").strip(),
+        "thumbnail_url": str(data.get("thumbnail_url") or "").strip(),
+        "duration": int(duration) if isinstance(duration, (int, float)) else None,
+    }
+    return record if record["title"] or record["thumbnail_url"] else None
+
+
+def _retry_after(headers):
+    try:
+        return min(MAX_BACKOFF, max(0.0, float(headers.get("retry-after", ""))))
+    except ValueError:
+        return None
+
+
+async def fetch_metadata(client, endpoint, url, retries=RETRIES, backoff=BACKOFF):
+    """Metadata for url from an oEmbed-style endpoint
+
+    Returns None when the endpoint answers 4xx or with nothing usable.
+    Connection errors, timeouts, 429 and 5xx are retried with jittered
+    exponential backoff (or the server's Retry-After) and raised once
+    the retries are used up.
+    """
+    request = f"{endpoint}{'&' if '?' in endpoint else '?'}url={quote(url, safe='')}&format=json"
+    for attempt in range(retries + 1):
+        delay = None
+        try:
+            status, headers, body = await client.get(request)
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError) as e:
+            error = e
+        else:
+            if status == 200:
+                return parse_metadata(body)
+            if status != 429 and status < 500:
+                return None
+            error = HttpError(status, endpoint)
+            delay = _retry_after(headers)
+        if attempt < retries:
+            await asyncio.sleep(delay if delay is not None
+                                else min(MAX_BACKOFF, backoff * 2 ** attempt) * (0.5 + random.random()))
+    raise error
+
+
+class MetadataCache:
+    """Fetched metadata in SQLite, per endpoint and URL, valid for a TTL
+
+    Rows the endpoint had nothing for are stored too, as NULL, and kept
+    for missing_ttl, so a rerun within the TTLs makes no requests at all.
+    """
+
+    def __init__(self, path=CACHE_FILE, ttl=TTL, missing_ttl=MISSING_TTL):
+        self.db = sqlite3.connect(path)
+        self.db.execute("CREATE TABLE IF NOT EXISTS metadata (endpoint TEXT NOT NULL, url TEXT NOT NULL, "
+                        "fetched REAL NOT NULL, data TEXT, PRIMARY KEY (endpoint, url))")
+        self.ttl = ttl
+        self.missing_ttl = missing_ttl
+
+    def fresh(self, endpoint, now=None):
+        """{url: metadata or None} for every row of endpoint still within its TTL"""
+        now = time.time() if now is None else now
+        rows = self.db.execute("SELECT url, fetched, data FROM metadata WHERE endpoint = ?", (endpoint,))
+        return {url: json.loads(data) if data else None for url, fetched, data in rows
+                if now - fetched < (self.ttl if data else self.missing_ttl)}
+
+    def store(self, endpoint, url, record, now=None):
+        self.db.execute("INSERT OR REPLACE INTO metadata VALUES (?, ?, ?, ?)",
+                        (endpoint, url, time.time() if now is None else now,
+                         json.dumps(record) if record else None))
+
+    def commit(self):
+        self.db.commit()
+
+    def close(self):
+        self.db.commit()
+        self.db.close()
+
+
+class Enricher:
+    """Looks up titles, durations and thumbnails for catalog URLs
+
+    URLs not in the cache are fetched concurrently from the endpoint,
+    which can be any server answering GET <endpoint>?url=...&format=json
+    the way oEmbed does, including a local stub. Results are written to
+    the cache as they arrive. URLs that still fail after the retries are
+    reported and left for the next run; when the first GIVE_UP_AFTER all
+    fail, the rest are not tried.
+    """
+
+    def __init__(self, endpoint=DEFAULT_ENDPOINT, cache_file=CACHE_FILE, concurrency=CONCURRENCY,
+                 ttl=TTL, missing_ttl=MISSING_TTL, retries=RETRIES, backoff=BACKOFF, timeout=TIMEOUT):
+        self.endpoint = endpoint
+        self.cache_file = cache_file
+        self.concurrency = concurrency
+        self.ttl = ttl
+        self.missing_ttl = missing_ttl
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.hits = self.misses = self.fetched = self.failed = self.requests = self.connections = 0
+
+    def enrich(self, urls):
+        """{url: metadata} for the urls the endpoint knows"""
+        cache = MetadataCache(self.cache_file, self.ttl, self.missing_ttl)
+        try:
+            known = cache.fresh(self.endpoint)
+            wanted = list(dict.fromkeys(urls))
+            todo = [url for url in wanted if url not in known]
+            self.hits += len(wanted) - len(todo)
+            self.misses += len(todo)
+            if todo:
+                known.update(asyncio.run(self._fetch_all(todo, cache)))
+        finally:
+            cache.close()
+        return {url: known[url] for url in wanted if known.get(url)}
+
+    async def _fetch_all(self, urls, cache):
+        client = HttpClient(self.concurrency, self.timeout)
+        results = {}
+        queue = iter(urls)
+        failed = 0
+
+        async def worker():
+            nonlocal failed
+            # A fixed set of workers pulling from one iterator keeps the
+            # number of pending tasks at the concurrency, not the row count
+            for url in queue:
+                if failed >= GIVE_UP_AFTER and not results:
+                    return
+                try:
+                    record = await fetch_metadata(client, self.endpoint, url, self.retries, self.backoff)
+                except Exception as e:
+                    failed += 1
+                    if failed <= 3:
+                        print(f"⚠️ Metadata lookup failed for {url}: {e}")
+                    continue
+                results[url] = record
+                cache.store(self.endpoint, url, record)
+                if len(results) % COMMIT_EVERY == 0:
+                    cache.commit()
+
+        try:
+            await asyncio.gather(*(worker() for _ in range(min(self.concurrency, len(urls)))))
+        finally:
+            client.close()
+            self.requests += client.requests
+            self.connections += client.opened
+            self.fetched += len(results)
+            self.failed += failed
+        if failed >= GIVE_UP_AFTER and not results:
+            print(f"⚠️ {self.endpoint} looks down: gave up after {failed} failed lookups")
+        return results
+
+    def summary(self):
+        line = (f"✅ Metadata ready: {self.hits + self.fetched}/{self.hits + self.misses} rows "
+                f"({self.hits} cached, {self.requests} requests over {self.connections} connections")
+        return line + (f", {self.failed} failed)" if self.failed else ")")
@@ -0,0 +1,28 @@
+from dedupe import canonical_url
+from video_id import extract_video_id
+
+PLACEHOLDER_THUMB = "https://via.placeholder.com/360x200.png?text=Website+Preview"
+
+
+def parse_row(row, rules, classify=True, metrics=None):
+    """((title, url, thumb, is_youtube), categories) for one csv.DictReader row"""
+    title = row["title"].strip()
+    url = row["url"].strip()
+    thumb = (row.get("thumbnail") or "").strip()
+    video_id = extract_video_id(url) if metrics is None else metrics.call("extract", extract_video_id, url)
+    url = canonical_url(url, video_id)
+
+    # Per-title thumbnail overrides, e.g. The OG Merchandise → shop logo
+    thumb = rules.thumbnail_for(title) or thumb
+
+    if not thumb and video_id:
+        thumb = f"https://img.youtube.com/vi/{video_id}/hqdefault.jpg"
+    if not thumb:
+        thumb = PLACEHOLDER_THUMB
+
+    entry = (title, url, thumb, bool(video_id))
+    if not classify:
+        return entry, None
+    if metrics is None:
+        return entry, rules.classify(title, url, row)
+    return entry, metrics.call("categorize", rules.classify, title, url, row)
@@ -1,362 +1,556 @@
+import argparse
+import contextlib
 import csv
-import re
+import json
 import os
 
-def extract_video_id(url: str) -> str:
-    """Extract the YouTube video ID from different URL formats"""
-    match = re.search(r"youtu\.be/([A-Za-z0-9_-]{11})", url)
-    if match:
-        return match.group(1)
-    match = re.search(r"v=([A-Za-z0-9_-]{11})", url)
-    if match:
-        return match.group(1)
-    match = re.search(r"embed/([A-Za-z0-9_-]{11})", url)
-    if match:
-        return match.group(1)
-    return None
-
-
-def generate_homepage(output_file="home.html"):
-    """Generate a modern homepage"""
-    html = """<!DOCTYPE html>
-<html lang="en">
-<head>
-  <meta charset="UTF-8">
-  <meta name="viewport" content="width=device-width, initial-scale=1.0">
-  <title>TFI WIKI - Home</title>
-  <style>
-    body {
-      margin: 0;
-      height: 100vh;
-      display: flex;
-      flex-direction: column;
-      justify-content: center;
-      align-items: center;
-      background: linear-gradient(135deg, #0f0f0f, #1c1c1c);
-      font-family: Arial, sans-serif;
-      color: white;
-      text-align: center;
-    }
-    h1 {
-      font-size: 40px;
-      font-weight: bold;
-      margin-bottom: 20px;
-      color: #e50914;
-      text-shadow: 0 0 10px rgba(229, 9, 20, 0.8);
-      letter-spacing: 2px;
-    }
-    a img {
-      width: 320px;
-      max-width: 80%;
-      border-radius: 16px;
-      margin-bottom: 25px;
-      box-shadow: 0 8px 25px rgba(0,0,0,0.6);
-      transition: transform 0.3s ease, box-shadow 0.3s ease;
-    }
-    a img:hover {
-      transform: scale(1.07);
-      box-shadow: 0 12px 35px rgba(229, 9, 20, 0.8);
-    }
-    .tagline {
-      font-size: 14px;
-      color: #aaa;
-      margin-top: 10px;
-      letter-spacing: 1px;
-    }
-    footer {
-      position: absolute;
-      bottom: 15px;
-      font-size: 13px;
-      color: #555;
-    }
-  </style>
-</head>
-<body>
-  <h1>TFI WIKI</h1>
-  <a href="index.html">
-    <img src="https://upload.wikimedia.org/wikipedia/en/0/0c/OG_Poster.jpg" alt="OG Poster">
-  </a>
-  <div class="tagline">Click the poster to explore</div>
-  <footer>© 2025 TFI WIKI | All Rights Reserved</footer>
-</body>
-</html>
-"""
+from catalog import is_catalog, open_catalog
+from category_pages import CATEGORY_DIR, PAGE_SIZE, CategoryPages
+from dedupe import Deduper
+from entries import PLACEHOLDER_THUMB, parse_row
+from incremental import (FRAGMENT_CACHE, MANIFEST_FILE, BuildManifest, FragmentCache,
+                         file_hash, row_hash, text_hash)
+from merge import RUN_ROWS, SourceMerger
+from metrics import BuildMetrics, profile
+from offline import SERVICE_WORKER, build_service_worker
+from renderer import Template, load_template, template_files
+from rules import Rules, default_rules, load_rules
+from search_index import SEARCH_DIR, build_search_index
+from shards import SHARD_DIR, SHARD_SIZE, write_shards
+from streaming import CategorySpool, count_rows, write_chunks
+from thumbs import THUMB_DIR, build_thumbnails, card_priority
+from video_id import extract_video_id
+
+
+DEFAULT_POSTER = "https://upload.wikimedia.org/wikipedia/en/0/0c/OG_Poster.jpg"
+LABELS = ("MARKED AS WATCHED", "NOT INTERESTED")
+MODES = ("static", "virtual")
+
+HOMEPAGE = load_template("home.html")
+SWIPE = load_template("swipe.html")
+
+
+def render_homepage(poster=DEFAULT_POSTER, offline=False):
+    return HOMEPAGE.render_string(poster, offline)
+
+
+def generate_homepage(output_file="home.html", poster=DEFAULT_POSTER, metrics=None, offline=False):
+    """Generate a modern homepage; offline registers the service worker from offline.py"""
     with open(output_file, "w", encoding="utf-8") as f:
-        f.write(html)
+        f.write(render_homepage(poster, offline))
+    if metrics:
+        metrics.output(output_file)
     print(f"✅ Modern homepage generated: {output_file}")
 
 
-def generate_swipe(videos, categories, output_file="index.html"):
-    """Generate swipe site with videos + categories gallery"""
-    html = """<!DOCTYPE html>
-<html lang="en">
-<head>
-  <meta charset="UTF-8">
-  <meta name="viewport" content="width=device-width, initial-scale=1.0, maximum-scale=1, user-scalable=no">
-  <title>Swipe Website</title>
-  <style>
-    body {
-      margin: 0;
-      height: 100vh;
-      display: flex;
-      justify-content: center;
-      align-items: center;
-      background: #111;
-      font-family: Arial, sans-serif;
-      overflow: hidden;
-    }
-    .phone {
-      width: 360px;
-      height: 640px;
-      background: #222;
-      border-radius: 20px;
-      overflow: hidden;
-      position: relative;
-      box-shadow: 0 6px 20px rgba(0,0,0,0.5);
-    }
-    .card {
-      position: absolute;
-      width: 100%;
-      height: 100%;
-      display: flex;
-      flex-direction: column;
-      justify-content: flex-start;
-      align-items: center;
-      padding: 10px;
-      box-sizing: border-box;
-      transition: transform 0.4s ease, opacity 0.4s ease;
-      overflow-y: auto;
-    }
-    img {
-      width: 100%;
-      height: 75%;
-      border-radius: 12px;
-      object-fit: cover;
-    }
-    h2 {
-      color: white;
-      margin: 10px 0;
-      text-align: center;
-      font-size: 16px;
-    }
-    .watch-now, .visit-now {
-      width: 90%;
-      text-align: center;
-      padding: 12px;
-      margin-bottom: 20px;
-      border-radius: 10px;
-      font-size: 18px;
-      font-weight: bold;
-      text-decoration: none;
-      transition: background 0.3s;
-      display: inline-block;
-    }
-    .watch-now { background: #e50914; color: white; }
-    .visit-now { background: #007bff; color: white; }
-    .overlay {
-      position: fixed;
-      top: 40%;
-      left: 50%;
-      transform: translate(-50%, -50%) scale(0.8);
-      font-size: 32px;
-      font-weight: bold;
-      opacity: 0;
-      pointer-events: none;
-      transition: opacity 0.5s ease, transform 0.5s ease;
-      z-index: 9999;
-      text-align: center;
-      padding: 20px 40px;
-      border-radius: 20px;
-      background: rgba(0, 0, 0, 0.7);
-    }
-    .overlay.show { opacity: 1; transform: translate(-50%, -50%) scale(1); }
-    .overlay.interested { color: #00ff88; text-shadow: 0 0 20px #00ff88; }
-    .overlay.not { color: #ff4444; text-shadow: 0 0 20px #ff4444; }
-
-    /* Categories page */
-    .categories {
-      width: 100%;
-    }
-    .category-block {
-      margin-bottom: 20px;
-    }
-    .category-block h3 {
-      color: #e50914;
-      font-size: 18px;
-      margin-bottom: 10px;
-    }
-    .thumb-grid {
-      display: grid;
-      grid-template-columns: repeat(2, 1fr);
-      gap: 10px;
-    }
-    .thumb-grid a img {
-      width: 100%;
-      height: 100px;
-      object-fit: cover;
-      border-radius: 8px;
-      transition: transform 0.3s;
-    }
-    .thumb-grid a img:hover {
-      transform: scale(1.05);
-    }
-  </style>
-</head>
-<body>
-  <div class="phone" id="phone">
-"""
-    for i, (title, url, thumb, is_youtube) in enumerate(videos):
-        button_class = "watch-now" if is_youtube else "visit-now"
-        button_text = "▶ Watch Now" if is_youtube else "🌐 Visit Now"
-        html += f"""
-    <div class="card" style="z-index:{len(videos)-i+1}">
-      <img src="{thumb}" alt="{title}">
-      <h2>{title}</h2>
-      <a href="{url}" target="_blank" class="{button_class}">{button_text}</a>
-    </div>
-"""
-
-    # Categories tab
-    html += """
-    <div class="card" style="z-index:1">
-      <h2>Browse by Category</h2>
-      <div class="categories">
-"""
-    for category, items in categories.items():
-        html += f"""        <div class="category-block">
-          <h3>{category}</h3>
-          <div class="thumb-grid">
-"""
-        for (title, url, thumb, _) in items:
-            html += f"""            <a href="{url}" target="_blank"><img src="{thumb}" alt="{title}"></a>\n"""
-        html += """          </div>
-        </div>
-"""
-
-    html += """      </div>
-    </div>
-"""
-
-    html += """
-  </div>
-  <div class="overlay interested" id="interestedOverlay">MARKED AS WATCHED</div>
-  <div class="overlay not" id="notOverlay">NOT INTERESTED</div>
-  <script>
-    let cards = document.querySelectorAll('.card');
-    let current = 0;
-    const interestedOverlay = document.getElementById('interestedOverlay');
-    const notOverlay = document.getElementById('notOverlay');
-
-    function showCard(index) {
-      cards.forEach((card, i) => {
-        if (i === index) {
-          card.style.transform = 'translateY(0)';
-          card.style.opacity = '1';
-          card.style.pointerEvents = "auto";
-        } else if (i < index) {
-          card.style.opacity = '0';
-          card.style.pointerEvents = "none";
-        } else {
-          card.style.transform = 'translateY(100%)';
-          card.style.opacity = '0';
-          card.style.pointerEvents = "none";
-        }
-      });
-    }
-
-    function swipeCard(action) {
-      if (current >= cards.length) return;
-      let card = cards[current];
-      if (action === 'right') {
-        interestedOverlay.classList.add('show');
-        card.style.transform = 'translateX(100%) rotate(15deg)';
-      } else if (action === 'left') {
-        notOverlay.classList.add('show');
-        card.style.transform = 'translateX(-100%) rotate(-15deg)';
-      } else if (action === 'up') {
-        card.style.transform = 'translateY(-100%)';
-      }
-      setTimeout(() => {
-        if (action === 'right') interestedOverlay.classList.remove('show');
-        if (action === 'left') notOverlay.classList.remove('show');
-        current++;
-        if (current < cards.length) {
-          showCard(current);
-        }
-      }, 500);
-    }
-
-    showCard(current);
-
-    document.addEventListener('keydown', (e) => {
-      if (e.key === 'ArrowRight') swipeCard('right');
-      else if (e.key === 'ArrowLeft') swipeCard('left');
-      else if (e.key === 'ArrowUp') swipeCard('up');
-    });
-
-    let startX = 0, startY = 0;
-    document.getElementById('phone').addEventListener('touchstart', e => {
-      startX = e.touches[0].clientX;
-      startY = e.touches[0].clientY;
-    }, { passive: true });
-    document.getElementById('phone').addEventListener('touchend', e => {
-      let endX = e.changedTouches[0].clientX;
-      let endY = e.changedTouches[0].clientY;
-      let diffX = endX - startX;
-      let diffY = startY - endY;
-      if (Math.abs(diffX) > Math.abs(diffY)) {
-        if (diffX > 50) swipeCard('right');
-        else if (diffX < -50) swipeCard('left');
-      } else {
-        if (diffY > 50) swipeCard('up');
-      }
-    }, { passive: true });
-  </script>
-</body>
-</html>
-"""
-    with open(output_file, "w", encoding="utf-8") as f:
-        f.write(html)
+# Fragments of the default static page, shared by the incremental and
+# watch builds that assemble it from cached pieces
+SWIPE_HEAD = SWIPE.head()
+CATEGORIES_HEAD = SWIPE.categories_head()
+CATEGORY_FOOT = SWIPE.category_foot()
+SWIPE_TAIL = SWIPE.categories_foot() + SWIPE.overlays(LABELS) + SWIPE.script()
+PAGE_END = SWIPE.page_end()
+render_card_open = SWIPE.card_open
+render_card_body = SWIPE.card_body
+render_category_head = SWIPE.category_head
+render_thumb = SWIPE.thumb
+
+
+def render_card(i, entry, total, images=None):
+    """Render one swipe card; z-index stacks the first row on top"""
+    return render_card_open(i, total) + render_card_body(entry, images, card_priority(i))
+
+
+def iter_swipe(videos, categories, total=None, images=None, search=False, collector=None, offline=False,
+               category_pages=None):
+    """Yield the swipe page as HTML fragments, one card or thumbnail at a time
+
+    videos and the category lists may be any iterables; pass total when
+    videos has no len() so the card z-index can be computed up front.
+    categories=None leaves the categories card out. images maps thumbnail
+    URLs to responsive variants from thumbs.py; search adds the type-ahead
+    box backed by search_index.py. collector is the URL the page beacons
+    swipe batches to (see collector.py); None records nothing. offline
+    registers the service worker that offline.py writes. category_pages (a
+    category_pages.CategoryPages) writes each category to pages of its own
+    and leaves a linked summary in the categories card.
+    """
+    if total is None:
+        total = len(videos)
+    return SWIPE.render(videos, total, categories, images, search, labels=LABELS, collector=collector,
+                        offline=offline, category_pages=category_pages)
+
+
+VIRTUAL_WINDOW = 3
+
+
+def iter_swipe_virtual(first_shard, total, category_counts, shard_size=SHARD_SIZE, search=False,
+                       collector=None, offline=False):
+    """Yield the virtualized swipe page: a fixed window of card slots that
+    the inline script fills from the JSON shard chain"""
+    config = {"first": first_shard, "total": total, "prefetchAt": max(1, shard_size // 2)}
+    return SWIPE.render(search=search, shards=config, window=VIRTUAL_WINDOW, category_counts=category_counts,
+                        collector=collector, offline=offline)
+
+
+def _stage(metrics, name, rows=0):
+    return metrics.stage(name, rows) if metrics else contextlib.nullcontext()
+
+
+def generate_swipe(videos, categories, output_file="index.html", total=None,
+                   mode="static", shard_size=SHARD_SIZE, images=None, search=False, metrics=None,
+                   collector=None, offline=False, category_pages=None):
+    """Generate swipe site with videos + categories gallery
+
+    mode="virtual" writes the cards as JSON shards next to output_file and a
+    page that keeps only a small window of them mounted. search=True adds
+    the title search box; the index itself comes from build_search_index.
+    metrics (a metrics.BuildMetrics) times the render and write stages.
+    collector is the URL the page sends its swipes to, if any; offline
+    registers the service worker. category_pages (a CategoryPages) moves
+    the category tiles to paginated pages of their own.
+    """
+    if mode == "virtual":
+        output_dir = os.path.dirname(output_file) or "."
+        with _stage(metrics, "shards"):
+            first, total = write_shards(videos, output_dir, shard_size)
+        # Counting the spooled category entries is part of rendering the categories card
+        with _stage(metrics, "render"):
+            counts = {category: sum(1 for _ in items) for category, items in categories.items()}
+        fragments = iter_swipe_virtual(first, total, counts, shard_size, search, collector, offline)
+        if metrics:
+            with metrics.stage("write"):
+                write_chunks(metrics.iterate("render", fragments, count_rows=False), output_file)
+            metrics.add_rows("shards", total)
+            metrics.output(os.path.join(output_dir, SHARD_DIR))
+            metrics.output(output_file)
+        else:
+            write_chunks(fragments, output_file)
+        print(f"✅ Virtualized swipe site generated: {output_file} ({total} cards in {SHARD_DIR}/)")
+        return
+    fragments = iter_swipe(videos, categories, total, images, search, collector, offline, category_pages)
+    if metrics:
+        # write_chunks pulls fragments from render, which pulls rows from read
+        # (and, with category_pages, renders the category pages)
+        with metrics.stage("write", rows=total or 0):
+            write_chunks(metrics.iterate("render", fragments, count_rows=False), output_file)
+        metrics.add_rows("render", total or 0)
+        metrics.output(output_file)
+        if category_pages:
+            metrics.output(category_pages.dir)
+    else:
+        write_chunks(fragments, output_file)
     print(f"✅ Swipe site with categories generated: {output_file}")
 
 
-def main():
-    videos = []
-    categories = {"🎵 Music": [], "🎬 Movies": [], "🛍 Merchandise": [], "⭐ Others": []}
-
-    with open("videos.csv", "r", encoding="utf-8") as file:
-        reader = csv.DictReader(file)
-        for row in reader:
-            title = row["title"].strip()
-            url = row["url"].strip()
-            thumb = row.get("thumbnail", "").strip()
-            video_id = extract_video_id(url)
-
-            # Special case: The OG Merchandise → custom thumbnail
-            if title.lower() == "the og merchandise":
-                thumb = "https://theogwear.com/cdn/shop/files/logo.png"
-
-            if not thumb and video_id:
-                thumb = f"https://img.youtube.com/vi/{video_id}/hqdefault.jpg"
-            if not thumb:
-                thumb = "https://via.placeholder.com/360x200.png?text=Website+Preview"
-
-            is_youtube = bool(video_id)
-            video_entry = (title, url, thumb, is_youtube)
-            videos.append(video_entry)
-
-            # Categorize
-            if title.startswith("MV"):
-                categories["🎵 Music"].append(video_entry)
-            elif title.startswith("M"):
-                categories["🎬 Movies"].append(video_entry)
-            elif "merch" in title.lower():
-                categories["🛍 Merchandise"].append(video_entry)
+def apply_metadata(pairs, metadata):
+    """Swap in fetched titles, and thumbnails for placeholder ones, from enrich.py
+
+    Categories stay those of the CSV title: the rules are written for it.
+    """
+    for (title, url, thumb, is_youtube), names in pairs:
+        record = metadata.get(url)
+        if record:
+            title = record["title"] or title
+            if thumb == PLACEHOLDER_THUMB:
+                thumb = record["thumbnail_url"] or thumb
+        yield (title, url, thumb, is_youtube), names
+
+
+def read_catalog(csv_file="videos.csv", rules=None, classify=True, metrics=None, dedupe=True,
+                 metadata=None):
+    """Yield ((title, url, thumb, is_youtube), categories) one CSV row at a time
+
+    Categories come from the rules config (categories.json by default);
+    with classify=False they are skipped and None is yielded instead.
+    With metrics, reading, extract_video_id and classification are timed
+    as the read, extract and categorize stages. csv_file may also be a
+    catalog compiled by catalog.py, which needs none of them.
+
+    URLs are canonicalized, and rows repeating an earlier video or URL are
+    dropped unless dedupe is false; pass a dedupe.Deduper to read its
+    report afterwards. Compiled catalogs were deduplicated when compiled.
+    metadata ({url: record} from enrich.Enricher) replaces titles and
+    placeholder thumbnails. csv_file may also be a merge.SourceMerger,
+    whose sources are read as one catalog in priority and date order;
+    duplicates across sources then keep the first row in that order.
+    """
+    rules = rules or default_rules()
+    if is_catalog(csv_file):
+        pairs = open_catalog(csv_file, rules).pairs()
+        if not classify:
+            pairs = ((entry, None) for entry, _ in pairs)
+        if metadata:
+            pairs = apply_metadata(pairs, metadata)
+        yield from pairs if metrics is None else metrics.iterate("read", pairs)
+        return
+    deduper = Deduper() if dedupe is True else dedupe
+    pairs = (parse_row(row, rules, classify, metrics) for row in _csv_rows(csv_file))
+    if deduper:
+        pairs = deduper.filter(pairs)
+    if metadata:
+        pairs = apply_metadata(pairs, metadata)
+    yield from pairs if metrics is None else metrics.iterate("read", pairs)
+
+
+def _csv_rows(csv_file):
+    if isinstance(csv_file, SourceMerger):
+        yield from csv_file.rows()
+        return
+    with open(csv_file, "r", encoding="utf-8") as file:
+        yield from csv.DictReader(file)
+
+
+def read_videos(csv_file="videos.csv", rules=None, dedupe=True, metadata=None):
+    """Yield (title, url, thumb, is_youtube) entries one CSV row at a time"""
+    for entry, _ in read_catalog(csv_file, rules, classify=False, dedupe=dedupe, metadata=metadata):
+        yield entry
+
+
+def build_incremental(csv_file="videos.csv", swipe_file="index.html", home_file="home.html",
+                      poster=DEFAULT_POSTER, output_dir=".", rules=None, metrics=None, dedupe=True,
+                      metadata=None, ranker=None, collector=None, offline=False):
+    """Rebuild only what changed since the last run, as recorded in the manifest"""
+    import inspect
+
+    rules = rules or default_rules()
+    manifest = BuildManifest(os.path.join(output_dir, MANIFEST_FILE))
+
+    # The homepage is static: its only input is the page itself.
+    with _stage(metrics, "homepage"):
+        homepage = render_homepage(poster, offline)
+        home_input = text_hash(homepage)
+        if manifest.is_current(home_file, home_input):
+            print(f"⏭ Homepage unchanged: {home_file}")
+        else:
+            manifest.write_if_changed(home_file, homepage, home_input)
+            print(f"✅ Modern homepage generated: {home_file}")
+    if metrics:
+        metrics.output(home_file)
+
+    version = text_hash(file_hash(__file__, inspect.getsourcefile(inspect.unwrap(extract_video_id)),
+                                  inspect.getsourcefile(Rules), inspect.getsourcefile(Template),
+                                  inspect.getsourcefile(Deduper), inspect.getsourcefile(parse_row),
+                                  *template_files()),
+                        rules.fingerprint, "dedupe" if dedupe else "",
+                        ranker.fingerprint if ranker else "", collector or "", "offline" if offline else "")
+    source = csv_file.fingerprint if isinstance(csv_file, SourceMerger) else file_hash(csv_file)
+    swipe_input = text_hash(version, source,
+                            json.dumps(metadata, sort_keys=True) if metadata else "")
+    if manifest.is_current(swipe_file, swipe_input):
+        print(f"⏭ Swipe site unchanged: {swipe_file}")
+        manifest.save()
+        return
+
+    deduper = Deduper() if dedupe else False
+    catalog = list(read_catalog(csv_file, rules, metrics=metrics, dedupe=deduper, metadata=metadata))
+    if isinstance(csv_file, SourceMerger):
+        print(csv_file.summary())
+    if deduper and deduper.merged:
+        print(deduper.summary())
+    if ranker:
+        with _stage(metrics, "rank", len(catalog)):
+            catalog = ranker.rank(catalog)
+    hashes = [row_hash(entry) for entry, _ in catalog]
+    previous = set(manifest.rows)
+    changed = sum(1 for h in hashes if h not in previous)
+    # The z-index stack of a full build, which streams and so counts merged duplicates too
+    if ranker:
+        total = len(catalog)
+    elif is_catalog(csv_file):
+        total = open_catalog(csv_file, rules).source_rows
+    else:
+        total = len(catalog) + (deduper.merged if deduper else 0)
+    fragments = FragmentCache(version, os.path.join(output_dir, FRAGMENT_CACHE))
+
+    with _stage(metrics, "render", total):
+        parts = [SWIPE_HEAD]
+        groups = {name: [] for name in rules.categories}
+        for i, ((entry, names), h) in enumerate(zip(catalog, hashes)):
+            # Only the z-index and, for the first few cards, the image
+            # priority depend on the row position; the cached body survives
+            # rows being inserted or removed above it.
+            priority = card_priority(i)
+            parts.append(render_card_open(i, total))
+            parts.append(fragments.get(f"card:{priority}:{h}",
+                                       lambda: render_card_body(entry, None, priority)))
+            for name in names:
+                groups.setdefault(name, []).append((entry, h))
+
+        parts.append(CATEGORIES_HEAD)
+        for category, items in groups.items():
+            key = "category:" + text_hash(category, *(h for _, h in items))
+            parts.append(fragments.get(key, lambda: "".join(
+                [render_category_head(category)] + [render_thumb(entry) for entry, _ in items] + [CATEGORY_FOOT])))
+        if collector:
+            parts.append(SWIPE.categories_foot() + SWIPE.overlays(LABELS) + SWIPE.script(collector))
+        else:
+            parts.append(SWIPE_TAIL)
+        parts.append(SWIPE.page_end(offline) if offline else PAGE_END)
+
+    with _stage(metrics, "write", total):
+        written = manifest.write_if_changed(swipe_file, "".join(parts), swipe_input)
+        manifest.rows = hashes
+        fragments.save()
+        manifest.save()
+    if metrics:
+        metrics.output(swipe_file)
+        metrics.cache("fragments", fragments.hits, fragments.misses)
+    rendered = f"{fragments.misses}/{fragments.hits + fragments.misses} fragments re-rendered"
+    if written:
+        print(f"✅ Swipe site rebuilt ({changed} changed rows, {rendered}): {swipe_file}")
+    else:
+        print(f"⏭ Swipe site unchanged ({rendered}): {swipe_file}")
+
+
+def build_site(csv_file="videos.csv", output_dir=".", poster=DEFAULT_POSTER,
+               mode="static", shard_size=SHARD_SIZE, incremental=False,
+               image_dir=None, workers=None, rules_file=None, search=False, assets=False,
+               metrics=None, profile_dir=None, dedupe=True, bloom_rows=None, enricher=None, ranker=None,
+               collector=None, offline=False, category_page_size=None):
+    """Build index.html and home.html for one catalog into output_dir
+
+    With image_dir, local copies of the thumbnails are turned into responsive
+    variants first and the static page links those instead. rules_file
+    replaces the default categories.json. search builds the title index
+    and adds a search box to the page. assets moves inline CSS/JS into
+    hashed files, minifies and precompresses everything. metrics (a
+    metrics.BuildMetrics) collects stage timings, output sizes and cache
+    hit rates; profile_dir receives cProfile and tracemalloc dumps of the
+    render loop. Rows repeating an earlier video or URL are merged unless
+    dedupe is false; bloom_rows swaps the exact seen-set for a Bloom
+    filter sized for that many rows, so memory stays fixed. enricher (an
+    enrich.Enricher) fetches real titles and thumbnails for every row
+    first; it needs a CSV, not a compiled catalog. ranker (a rank.Ranker)
+    orders the cards and category tiles by swipe feedback, which means
+    holding the catalog in memory instead of streaming it. csv_file may
+    be a merge.SourceMerger to build from several sources merged.
+    collector is the URL of a collector.py service the page batches its
+    swipes to. offline adds a service worker (offline.py) that keeps the
+    pages, assets and thumbnails cached for repeat and offline visits.
+    category_page_size moves each category's tiles to pages of that many
+    under categories/, rendered on a pool of workers processes, and
+    leaves only counts, links and a few tiles in the categories card.
+    """
+    if mode not in MODES:
+        raise ValueError(f"unknown mode {mode!r}; expected one of {', '.join(MODES)}")
+    if incremental and mode != "static":
+        raise ValueError(f"incremental builds write the static page only, not mode {mode!r}")
+    os.makedirs(output_dir, exist_ok=True)
+    swipe_file = os.path.join(output_dir, "index.html")
+    home_file = os.path.join(output_dir, "home.html")
+    rules = load_rules(rules_file) if rules_file else default_rules()
+
+    def deduper():
+        return Deduper(bloom_rows) if dedupe else False
+
+    metadata = None
+    if enricher:
+        if is_catalog(csv_file):
+            raise ValueError(f"{csv_file}: metadata enrichment needs the source CSV, not a compiled catalog")
+        with _stage(metrics, "enrich"):
+            metadata = enricher.enrich(url for _, url, _, _ in read_videos(csv_file, rules, deduper()))
+        print(enricher.summary())
+        if metrics:
+            metrics.cache("metadata", enricher.hits, enricher.misses)
+    if incremental:
+        build_incremental(csv_file, swipe_file, home_file, poster, output_dir, rules, metrics, dedupe,
+                          metadata, ranker, collector, offline)
+        if offline:
+            with _stage(metrics, "offline"):
+                build_service_worker(output_dir, remote=[poster])
+        return
+
+    video_ids = extract_video_id.cache_info()
+    images = None
+    if image_dir:
+        with _stage(metrics, "thumbnails"):
+            thumbs = {thumb for _, _, thumb, _ in read_videos(csv_file, rules, deduper(), metadata)}
+            images = build_thumbnails(thumbs, image_dir, output_dir, workers, metrics=metrics)
+        if metrics:
+            metrics.output(os.path.join(output_dir, THUMB_DIR))
+    if search:
+        with _stage(metrics, "search"):
+            rows = build_search_index(read_videos(csv_file, rules, deduper(), metadata), output_dir)
+        if metrics:
+            metrics.add_rows("search", rows)
+            metrics.output(os.path.join(output_dir, SEARCH_DIR))
+
+    category_pages = None
+    if category_page_size:
+        category_pages = CategoryPages(output_dir, category_page_size, images, workers)
+    with profile(profile_dir) if profile_dir else contextlib.nullcontext():
+        if is_catalog(csv_file) and not ranker:
+            # A compiled catalog already has the row count and the category
+            # lists; entries are read from the mapped file as they render.
+            catalog = open_catalog(csv_file, rules)
+            videos = catalog if metrics is None else metrics.iterate("read", catalog)
+            generate_swipe(videos, catalog.categories(), swipe_file, total=catalog.source_rows, mode=mode,
+                           shard_size=shard_size, images=images, search=search, metrics=metrics,
+                           collector=collector, offline=offline, category_pages=category_pages)
+        else:
+            # Stream rows straight into the page; category entries wait in a spool
+            # so neither the video list nor the HTML is ever held in memory.
+            # total still counts merged duplicates: the z-index only needs
+            # to decrease down the stack, not to end at 1.
+            merger = deduper()
+            pairs = read_catalog(csv_file, rules, metrics=metrics, dedupe=merger, metadata=metadata)
+            if ranker:
+                # Ranking needs every row before the first card
+                with _stage(metrics, "rank"):
+                    pairs = ranker.rank(pairs)
+                total = len(pairs)
+                if metrics:
+                    metrics.add_rows("rank", total)
             else:
-                categories["⭐ Others"].append(video_entry)
+                with _stage(metrics, "count"):
+                    total = csv_file.count() if isinstance(csv_file, SourceMerger) else count_rows(csv_file)
+            with CategorySpool(rules.categories) as spool:
+                videos = spool.tee(pairs)
+                generate_swipe(videos, spool.categories(), swipe_file, total=total, mode=mode,
+                               shard_size=shard_size, images=images, search=search, metrics=metrics,
+                               collector=collector, offline=offline, category_pages=category_pages)
+            if isinstance(csv_file, SourceMerger):
+                print(csv_file.summary())
+            if merger and merger.merged:
+                print(merger.summary())
+    with _stage(metrics, "homepage"):
+        generate_homepage(home_file, poster, metrics, offline)
+    if assets:
+        from assets import ASSET_DIR, build_assets
+
+        with _stage(metrics, "assets"):
+            build_assets(output_dir, dirs=(SHARD_DIR, SEARCH_DIR, CATEGORY_DIR), page_dirs=(CATEGORY_DIR,))
+        if metrics:
+            for path in (swipe_file, home_file, os.path.join(output_dir, ASSET_DIR)):
+                metrics.output(path)
+    if offline:
+        # Last, so the precache manifest hashes the final pages and assets
+        with _stage(metrics, "offline"):
+            build_service_worker(output_dir, remote=[poster], assets=assets)
+        if metrics:
+            metrics.output(os.path.join(output_dir, SERVICE_WORKER))
+    if metrics:
+        after = extract_video_id.cache_info()
+        metrics.cache("video_id", after.hits - video_ids.hits, after.misses - video_ids.misses)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate the swipe site and homepage from videos.csv")
+    parser.add_argument("--csv", nargs="+", default=["videos.csv"],
+                        help="input catalog, a CSV or a file compiled by catalog.py (default: videos.csv); "
+                             "several CSVs are merged by priority and date, newest first (see merge.py)")
+    parser.add_argument("--sort-rows", type=int, default=RUN_ROWS, metavar="ROWS",
+                        help="rows sorted in memory at once when merging several CSVs; bounds memory "
+                             "(default: %(default)s)")
+    parser.add_argument("--output-dir", default=".", help="where to write the pages (default: %(default)s)")
+    parser.add_argument("--poster", default=DEFAULT_POSTER, help="homepage poster image URL")
+    parser.add_argument("--rules", metavar="FILE", help="categories config (default: categories.json)")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--incremental", action="store_true",
+                      help="skip outputs whose inputs are unchanged and re-render only changed fragments")
+    mode.add_argument("--virtual", action="store_true",
+                      help="emit the catalog as JSON shards behind a virtualized card stack")
+    mode.add_argument("--watch", action="store_true",
+                      help="stay running and rebuild the static site whenever the CSV, rules or templates change")
+    parser.add_argument("--shard-size", type=int, default=SHARD_SIZE,
+                        help="cards per JSON shard in --virtual mode (default: %(default)s)")
+    parser.add_argument("--images", metavar="DIR",
+                        help="local thumbnail cache (<video id>.jpg) to build responsive variants from")
+    parser.add_argument("-j", "--workers", type=int, default=None,
+                        help="worker processes for the thumbnail and category page stages "
+                             "(default: one per CPU)")
+    parser.add_argument("--category-pages", type=int, nargs="?", const=PAGE_SIZE, metavar="TILES",
+                        help=f"write each category to {CATEGORY_DIR}/ as pages of TILES tiles (default: "
+                             f"{PAGE_SIZE}) and keep only counts, links and a preview in the page")
+    parser.add_argument("--search", action="store_true",
+                        help="build a sharded title index and add a search box to the page")
+    parser.add_argument("--assets", action="store_true",
+                        help="externalize and minify CSS/JS, write .gz/.br siblings and asset-manifest.json")
+    parser.add_argument("--keep-duplicates", action="store_true",
+                        help="render every row, even rows repeating an earlier video or URL")
+    parser.add_argument("--dedupe-bloom", type=int, metavar="ROWS",
+                        help="find duplicates with a fixed-size Bloom filter sized for ROWS rows "
+                             "instead of an exact set (rare false merges)")
+    parser.add_argument("--enrich", action="store_true",
+                        help="fetch real titles and thumbnails from an oEmbed endpoint, cached in "
+                             "<output-dir>/metadata.sqlite")
+    parser.add_argument("--enrich-endpoint", metavar="URL",
+                        help="oEmbed-style endpoint to query (default: YouTube's); implies --enrich")
+    parser.add_argument("--enrich-cache", metavar="FILE",
+                        help="metadata cache (default: <output-dir>/metadata.sqlite)")
+    parser.add_argument("--enrich-concurrency", type=int, metavar="N",
+                        help="requests in flight at once (default: 16)")
+    parser.add_argument("--rank", metavar="LOG", nargs="+",
+                        help="order cards by the aggregated swipe feedback in one or more logs (see rank.py)")
+    parser.add_argument("--segment", help="rank for this segment of the swipe log (default: all of them)")
+    parser.add_argument("--collector", metavar="URL",
+                        help="have the page send batched swipes to this collector.py endpoint, "
+                             "e.g. http://127.0.0.1:8765/events")
+    parser.add_argument("--offline", action="store_true",
+                        help="add a service worker that caches the pages, assets and thumbnails "
+                             "(sw.js, precache-manifest.json)")
+    parser.add_argument("--metrics", metavar="FILE",
+                        help="write per-stage timings, output sizes and cache hit rates to FILE "
+                             "(a Prometheus textfile if it ends in .prom, JSON otherwise)")
+    parser.add_argument("--profile", metavar="DIR",
+                        help="dump cProfile stats and a tracemalloc snapshot of the render loop into DIR")
+    args = parser.parse_args(argv)
+    if args.images and (args.incremental or args.virtual or args.watch):
+        parser.error("--images only applies to the static full build")
+    if args.category_pages is not None and (args.incremental or args.virtual or args.watch):
+        parser.error("--category-pages only applies to the static full build")
+    if args.category_pages is not None and args.category_pages < 1:
+        parser.error("--category-pages needs at least one tile per page")
+    if (args.search or args.assets) and (args.incremental or args.watch):
+        parser.error("--search and --assets need a full build")
+    if args.profile and (args.incremental or args.watch):
+        parser.error("--profile only applies to the full build")
+    if args.metrics and args.watch:
+        parser.error("--metrics reports on a single build, not --watch")
+    enrich = args.enrich or args.enrich_endpoint
+    if enrich and args.watch:
+        parser.error("--enrich needs a full or incremental build, not --watch")
+    if args.rank and args.watch:
+        parser.error("--rank needs a full or incremental build, not --watch")
+    if args.segment and not args.rank:
+        parser.error("--segment needs --rank")
+    if len(args.csv) > 1 and args.watch:
+        parser.error("merging several --csv sources needs a full or incremental build, not --watch")
+    csv_file = args.csv[0] if len(args.csv) == 1 else SourceMerger(args.csv, args.sort_rows)
+    if args.collector and args.watch:
+        parser.error("--collector needs a full or incremental build, not --watch")
+    if args.offline and args.watch:
+        parser.error("--offline needs a full or incremental build, not --watch")
+    if args.watch:
+        from watch import watch
+        watch(csv_file, args.output_dir, args.poster, args.rules)
+        return
 
-    generate_swipe(videos, categories)
-    generate_homepage()
+    metrics = BuildMetrics() if args.metrics else None
+    enricher = None
+    if enrich:
+        from enrich import CACHE_FILE, CONCURRENCY, DEFAULT_ENDPOINT, Enricher
+        enricher = Enricher(args.enrich_endpoint or DEFAULT_ENDPOINT,
+                            args.enrich_cache or os.path.join(args.output_dir, CACHE_FILE),
+                            args.enrich_concurrency or CONCURRENCY)
+    ranker = None
+    if args.rank:
+        from rank import Ranker
+        ranker = Ranker(args.rank, args.segment)
+    build_site(csv_file, args.output_dir, args.poster,
+               mode="virtual" if args.virtual else "static",
+               shard_size=args.shard_size, incremental=args.incremental,
+               image_dir=args.images, workers=args.workers, rules_file=args.rules,
+               search=args.search, assets=args.assets, metrics=metrics, profile_dir=args.profile,
+               dedupe=not args.keep_duplicates, bloom_rows=args.dedupe_bloom, enricher=enricher,
+               ranker=ranker, collector=args.collector, offline=args.offline,
+               category_page_size=args.category_pages)
+    if metrics:
+        metrics.finish()
+        metrics.save(args.metrics)
+        print(metrics.summary())
+        print(f"✅ Build metrics written: {args.metrics}")
 
 
 if __name__ == "__main__":
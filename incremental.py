@@ -0,0 +1,147 @@
+import hashlib
+import json
+import os
+import pickle
+
+MANIFEST_FILE = ".build-manifest.json"
+FRAGMENT_CACHE = ".build-fragments.pickle"
+
+
+def text_hash(*parts):
+    """Content hash of one or more strings"""
+    digest = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\x1f")
+    return digest.hexdigest()
+
+
+def content_hash(text):
+    """Hash of text exactly as write_if_changed puts it on disk"""
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def file_hash(*paths):
+    """Content hash of one or more files, read in chunks"""
+    digest = hashlib.blake2b(digest_size=16)
+    for path in paths:
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+def row_hash(entry):
+    """Hash of one (title, url, thumb, is_youtube) entry"""
+    title, url, thumb, is_youtube = entry
+    return text_hash(title, url, thumb, "1" if is_youtube else "")
+
+
+class BuildManifest:
+    """Per-output input/content hashes plus per-row hashes of the last build
+
+    The manifest lives next to the outputs. An output is skipped when its
+    recorded input hash is unchanged and the file on disk still has the
+    content hash we wrote.
+    """
+
+    def __init__(self, path=MANIFEST_FILE):
+        self.path = path
+        self.data = {"outputs": {}, "rows": []}
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                self.data.update(json.load(f))
+        except (OSError, ValueError):
+            pass
+
+    @property
+    def rows(self):
+        return self.data["rows"]
+
+    @rows.setter
+    def rows(self, hashes):
+        self.data["rows"] = hashes
+
+    def is_current(self, output_file, input_hash):
+        """True when output_file was built from input_hash and is untouched"""
+        record = self.data["outputs"].get(output_file)
+        if not record or record.get("input") != input_hash:
+            return False
+        return self._on_disk_matches(output_file, record)
+
+    def _on_disk_matches(self, output_file, record):
+        try:
+            st = os.stat(output_file)
+        except OSError:
+            return False
+        if st.st_size == record.get("size") and st.st_mtime_ns == record.get("mtime_ns"):
+            return True
+        return file_hash(output_file) == record.get("content")
+
+    def write_if_changed(self, output_file, text, input_hash):
+        """Write text unless the file already holds it; returns True if written"""
+        content = content_hash(text)
+        record = self.data["outputs"].get(output_file, {})
+        written = not (record.get("content") == content and self._on_disk_matches(output_file, record))
+        if written:
+            tmp = f"{output_file}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(text)
+            os.replace(tmp, output_file)
+        st = os.stat(output_file)
+        self.data["outputs"][output_file] = {
+            "input": input_hash,
+            "content": content,
+            "size": st.st_size,
+            "mtime_ns": st.st_mtime_ns,
+        }
+        return written
+
+    def save(self):
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.data, f, indent=1, ensure_ascii=False)
+        os.replace(tmp, self.path)
+
+
+class FragmentCache:
+    """Rendered HTML fragments from the previous build, keyed by content hash
+
+    The whole cache is dropped when version (a hash of the rendering code)
+    changes. Only keys used by the current build are carried over to the
+    next one, so the cache never grows past the size of the catalog.
+    """
+
+    def __init__(self, version, path=FRAGMENT_CACHE):
+        self.path = path
+        self.version = version
+        self.old = {}
+        self.new = {}
+        self.hits = 0
+        self.misses = 0
+        try:
+            with open(path, "rb") as f:
+                saved = pickle.load(f)
+            if saved.get("version") == version:
+                self.old = saved["fragments"]
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, KeyError):
+            pass
+
+    def get(self, key, render):
+        """Return the cached fragment for key, calling render() on a miss"""
+        fragment = self.new.get(key)
+        if fragment is None:
+            fragment = self.old.get(key)
+            if fragment is None:
+                fragment = render()
+                self.misses += 1
+            else:
+                self.hits += 1
+            self.new[key] = fragment
+        return fragment
+
+    def save(self):
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "wb") as f:
+            pickle.dump({"version": self.version, "fragments": self.new}, f, pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, self.path)
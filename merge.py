@@ -0,0 +1,218 @@
+import argparse
+import csv
+import heapq
+import os
+import pickle
+import sys
+import tempfile
+from itertools import islice
+
+from incremental import file_hash, text_hash
+from streaming import count_rows
+
+PRIORITY_FIELD = "priority"
+DATE_FIELD = "date"
+# Rows sorted in memory at once; runs and merge buffers are sized from it
+RUN_ROWS = 100_000
+# Runs merged in one pass; more runs than this are merged in several passes
+FAN_IN = 64
+
+
+def _priority(value, path, line):
+    value = value.strip()
+    try:
+        return float(value) if value else 0.0
+    except ValueError:
+        raise ValueError(f"{path}:{line}: priority {value!r} is not a number") from None
+
+
+def _write_run(items, batch, tmp_dir):
+    run = tempfile.TemporaryFile(dir=tmp_dir)
+    pending = []
+    for item in items:
+        pending.append(item)
+        if len(pending) >= batch:
+            pickle.dump(pending, run, pickle.HIGHEST_PROTOCOL)
+            pending = []
+    if pending:
+        pickle.dump(pending, run, pickle.HIGHEST_PROTOCOL)
+    run.seek(0)
+    return run
+
+
+def _read_run(run):
+    while True:
+        try:
+            batch = pickle.load(run)
+        except EOFError:
+            return
+        yield from batch
+
+
+class SourceMerger:
+    """Several source CSVs as one catalog, highest priority then newest first
+
+    An external merge sort: rows are read run_rows at a time, sorted in
+    memory and spilled to a temporary file as a sorted run; the runs are
+    then merged with a heap, each read back in small pickled batches, so
+    the rows held in memory stay around run_rows however large the input.
+    With more than fan_in runs, they are merged fan_in at a time first.
+    Ties keep source order, so a single source keeps its row order. The
+    sources may have different columns; title and url are required.
+
+    The sorted rows are spooled as they are first read out, and later
+    passes (the search index, then the page) replay the spool instead of
+    sorting again, until a source changes on disk.
+    """
+
+    def __init__(self, paths, run_rows=RUN_ROWS, fan_in=FAN_IN, tmp_dir=None):
+        self.paths = list(paths)
+        self.run_rows = max(1, run_rows)
+        self.fan_in = max(2, fan_in)
+        self.tmp_dir = tmp_dir
+        self.rows_read = self.runs = self.passes = 0
+        self._sorted = None   # (source stamp, headers, sorted items: a list or a spooled run)
+
+    def __str__(self):
+        return " + ".join(self.paths)
+
+    @property
+    def fingerprint(self):
+        """Content hash of every source, in order"""
+        return text_hash(file_hash(*self.paths), str(len(self.paths)))
+
+    def count(self):
+        """Data rows over all sources, duplicates included"""
+        return sum(count_rows(path) for path in self.paths)
+
+    def _items(self, headers):
+        # Sort keys are (priority, date, -sequence): the merge runs in
+        # reverse, and the negated sequence keeps ties in source order.
+        # Keys are unique, so the rows themselves are never compared.
+        # Missing priorities count as 0; dates compare as text, so ISO
+        # 8601 dates sort chronologically.
+        seq = 0
+        for source, path in enumerate(self.paths):
+            with open(path, "r", encoding="utf-8", newline="") as f:
+                reader = csv.reader(f)
+                header = next(reader, [])
+                headers.append(header)
+                p = header.index(PRIORITY_FIELD) if PRIORITY_FIELD in header else None
+                d = header.index(DATE_FIELD) if DATE_FIELD in header else None
+                for line, values in enumerate(reader, 2):
+                    if not values:
+                        continue
+                    seq += 1
+                    priority = _priority(values[p], path, line) if p is not None and p < len(values) else 0.0
+                    date = values[d].strip() if d is not None and d < len(values) else ""
+                    yield (priority, date, -seq), source, values
+
+    def _stamp(self):
+        return tuple((st.st_mtime_ns, st.st_size) for st in map(os.stat, self.paths))
+
+    def rows(self):
+        """Yield every row, as the dict csv.DictReader would give, in sorted order"""
+        stamp = self._stamp()
+        if self._sorted is not None and self._sorted[0] == stamp:
+            _, headers, items = self._sorted
+            if not isinstance(items, list):
+                items.seek(0)
+                items = _read_run(items)
+            for _, source, values in items:
+                yield dict(zip(headers[source], values))
+            return
+        self._sorted = None
+        headers = []
+        for _, source, values in self._sort(headers, stamp):
+            yield dict(zip(headers[source], values))
+
+    def _spool(self, items, headers, stamp, batch):
+        """Pass items through, writing them to a run kept for rows() to replay once all are read"""
+        spool = tempfile.TemporaryFile(dir=self.tmp_dir)
+        pending = []
+        try:
+            for item in items:
+                pending.append(item)
+                if len(pending) >= batch:
+                    pickle.dump(pending, spool, pickle.HIGHEST_PROTOCOL)
+                    pending = []
+                yield item
+            if pending:
+                pickle.dump(pending, spool, pickle.HIGHEST_PROTOCOL)
+        except BaseException:
+            # Left half read: no use replaying
+            spool.close()
+            raise
+        self._sorted = (stamp, headers, spool)
+
+    def _sort(self, headers, stamp):
+        self.rows_read = self.runs = self.passes = 0
+        batch = max(1, self.run_rows // self.fan_in)
+        runs = []
+        items = self._items(headers)
+        try:
+            while True:
+                chunk = list(islice(items, self.run_rows))
+                if not chunk:
+                    break
+                self.rows_read += len(chunk)
+                chunk.sort(reverse=True)
+                if not runs and len(chunk) < self.run_rows:
+                    # Everything fit in one run: nothing to spill, and the sorted chunk is the replay
+                    self.passes = 1
+                    self._sorted = (stamp, headers, chunk)
+                    yield from chunk
+                    return
+                runs.append(_write_run(chunk, batch, self.tmp_dir))
+                self.runs += 1
+                # Before the next chunk is read, or two would be alive at once
+                del chunk
+            while len(runs) > self.fan_in:
+                self.passes += 1
+                merged = []
+                for i in range(0, len(runs), self.fan_in):
+                    group = runs[i:i + self.fan_in]
+                    merged.append(_write_run(heapq.merge(*map(_read_run, group), reverse=True), batch,
+                                             self.tmp_dir))
+                    for run in group:
+                        run.close()
+                runs = merged
+            self.passes += 1
+            yield from self._spool(heapq.merge(*map(_read_run, runs), reverse=True), headers, stamp, batch)
+        finally:
+            for run in runs:
+                run.close()
+
+    def summary(self):
+        return (f"🔀 Merged {len(self.paths)} sources, {self.rows_read} rows "
+                f"({self.runs} sorted runs, {self.passes} merge passes)")
+
+
+def _header(path):
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        return next(csv.reader(f), [])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Merge source CSVs into one catalog by priority and date")
+    parser.add_argument("sources", nargs="+", help="source CSVs, each with title and url columns")
+    parser.add_argument("-o", "--output", help="merged CSV to write (default: stdout)")
+    parser.add_argument("--run-rows", type=int, default=RUN_ROWS,
+                        help="rows sorted in memory at once (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    merger = SourceMerger(args.sources, args.run_rows)
+    out = open(args.output, "w", encoding="utf-8", newline="") if args.output else sys.stdout
+    try:
+        fields = list(dict.fromkeys(name for path in args.sources for name in _header(path)))
+        writer = csv.DictWriter(out, fields, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(merger.rows())
+    finally:
+        if args.output:
+            out.close()
+    print(merger.summary(), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
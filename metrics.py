@@ -0,0 +1,221 @@
+import json
+import os
+import time
+from contextlib import contextmanager
+from time import perf_counter, process_time
+
+PROFILE_FRAMES = 25
+
+
+def _tree_size(path):
+    if not os.path.isdir(path):
+        return os.path.getsize(path)
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names)
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class BuildMetrics:
+    """Opt-in timings, row counts, output sizes and cache hit rates of a build
+
+    The pipeline streams, so its stages interleave: render pulls rows from
+    read, and read calls extract and categorize for each one. Time is
+    charged to the innermost active stage, which makes every stage's wall
+    and CPU time exclusive of the stages it calls into. Every switch reads
+    two clocks, which makes a 100k-row build about 40% slower: compare the
+    stages of an instrumented build with each other, not with the time of
+    an uninstrumented one.
+    """
+
+    def __init__(self):
+        self.stages = {}    # name → [wall seconds, cpu seconds, rows]
+        self.outputs = {}
+        self.caches = {}
+        self._stack = []
+        self._current = None
+        self._wall = self.started_wall = perf_counter()
+        self._cpu = self.started_cpu = process_time()
+        self.finished = None
+
+    def _stage(self, name):
+        stage = self.stages.get(name)
+        if stage is None:
+            stage = self.stages[name] = [0.0, 0.0, 0]
+        return stage
+
+    def _switch(self, stage):
+        """Charge the time since the last switch to the current stage, then make stage current"""
+        wall = perf_counter()
+        cpu = process_time()
+        current = self._current
+        if current is not None:
+            current[0] += wall - self._wall
+            current[1] += cpu - self._cpu
+        self._wall = wall
+        self._cpu = cpu
+        self._current = stage
+
+    @contextmanager
+    def stage(self, name, rows=0):
+        stage = self._stage(name)
+        self._stack.append(self._current)
+        self._switch(stage)
+        try:
+            yield
+        finally:
+            self._switch(self._stack.pop())
+            stage[2] += rows
+
+    def call(self, name, fn, *args):
+        """fn(*args) timed as one row of stage name"""
+        stage = self._stage(name)
+        self._stack.append(self._current)
+        self._switch(stage)
+        try:
+            return fn(*args)
+        finally:
+            self._switch(self._stack.pop())
+            stage[2] += 1
+
+    def iterate(self, name, iterable, count_rows=True):
+        """Yield from iterable, timing each step as stage name
+
+        Every item counts as a row unless count_rows is false (render
+        yields fragments, not rows; add its rows with add_rows).
+        """
+        stage = self._stage(name)
+        stack = self._stack
+        switch = self._switch
+        iterator = iter(iterable)
+        while True:
+            stack.append(self._current)
+            switch(stage)
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                switch(stack.pop())
+            if count_rows:
+                stage[2] += 1
+            yield item
+
+    def add_rows(self, name, rows):
+        self._stage(name)[2] += rows
+
+    def output(self, path):
+        """Record the size of a written file, or of everything under a directory"""
+        self.outputs[path] = _tree_size(path)
+
+    def cache(self, name, hits, misses):
+        hits0, misses0 = self.caches.get(name, (0, 0))
+        self.caches[name] = (hits0 + hits, misses0 + misses)
+
+    def finish(self):
+        self.finished = (perf_counter() - self.started_wall, process_time() - self.started_cpu)
+
+    def report(self):
+        wall, cpu = self.finished or (perf_counter() - self.started_wall, process_time() - self.started_cpu)
+        return {
+            "wall_seconds": round(wall, 6),
+            "cpu_seconds": round(cpu, 6),
+            "stages": {name: {"wall_seconds": round(w, 6), "cpu_seconds": round(c, 6), "rows": rows}
+                       for name, (w, c, rows) in self.stages.items()},
+            "outputs": dict(self.outputs),
+            "caches": {name: {"hits": hits, "misses": misses,
+                              "hit_rate": round(hits / (hits + misses), 4) if hits + misses else None}
+                       for name, (hits, misses) in self.caches.items()},
+        }
+
+    def prometheus(self):
+        """The report in the Prometheus text exposition format"""
+        report = self.report()
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP swipe_build_{name} {help_text}")
+            lines.append(f"# TYPE swipe_build_{name} {kind}")
+            for labels, value in samples:
+                label_text = ",".join(f'{key}="{_label(v)}"' for key, v in labels.items())
+                lines.append(f"swipe_build_{name}{{{label_text}}} {value}" if labels
+                             else f"swipe_build_{name} {value}")
+
+        stages = report["stages"]
+        metric("duration_seconds", "gauge", "Wall time of the whole build", [({}, report["wall_seconds"])])
+        metric("cpu_seconds", "gauge", "CPU time of the whole build", [({}, report["cpu_seconds"])])
+        metric("stage_wall_seconds", "gauge", "Wall time spent in each stage, excluding nested stages",
+               [({"stage": name}, s["wall_seconds"]) for name, s in stages.items()])
+        metric("stage_cpu_seconds", "gauge", "CPU time spent in each stage, excluding nested stages",
+               [({"stage": name}, s["cpu_seconds"]) for name, s in stages.items()])
+        metric("stage_rows", "gauge", "Rows processed by each stage",
+               [({"stage": name}, s["rows"]) for name, s in stages.items()])
+        metric("output_bytes", "gauge", "Size of each output file or directory",
+               [({"output": path}, size) for path, size in report["outputs"].items()])
+        caches = report["caches"]
+        metric("cache_hits", "gauge", "Cache hits during the build",
+               [({"cache": name}, c["hits"]) for name, c in caches.items()])
+        metric("cache_misses", "gauge", "Cache misses during the build",
+               [({"cache": name}, c["misses"]) for name, c in caches.items()])
+        metric("last_run_timestamp_seconds", "gauge", "When the build finished", [({}, round(time.time(), 3))])
+        return "\n".join(lines) + "\n"
+
+    def save(self, path):
+        """Write the report: a Prometheus textfile for *.prom, JSON otherwise
+
+        The file is replaced atomically, as the node exporter's textfile
+        collector expects.
+        """
+        if path.endswith(".prom"):
+            text = self.prometheus()
+        else:
+            text = json.dumps(self.report(), indent=1) + "\n"
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp, path)
+
+    def summary(self):
+        """One line per stage, slowest first"""
+        report = self.report()
+        lines = [f"⏱ Build took {report['wall_seconds']:.3f}s wall, {report['cpu_seconds']:.3f}s CPU"]
+        for name, s in sorted(report["stages"].items(), key=lambda item: -item[1]["wall_seconds"]):
+            line = f"   {name:<12} {s['wall_seconds']:>8.3f}s wall {s['cpu_seconds']:>8.3f}s CPU"
+            if s["rows"]:
+                line += f" {s['rows']:>9,} rows"
+                if s["wall_seconds"]:
+                    line += f", {s['rows'] / s['wall_seconds']:,.0f} rows/s"
+            lines.append(line)
+        for name, c in report["caches"].items():
+            if c["hit_rate"] is not None:
+                lines.append(f"   cache {name}: {c['hit_rate']:.1%} hits ({c['hits']:,}/{c['hits'] + c['misses']:,})")
+        return "\n".join(lines)
+
+
+@contextmanager
+def profile(output_dir, name="render"):
+    """cProfile and tracemalloc around a block, dumped to output_dir
+
+    Writes <name>.prof (open with python -m pstats) and <name>.tracemalloc
+    (tracemalloc.Snapshot.load), taken when the block ends.
+    """
+    import cProfile
+    import tracemalloc
+
+    os.makedirs(output_dir, exist_ok=True)
+    tracemalloc.start(PROFILE_FRAMES)
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        snapshot = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        stats_file = os.path.join(output_dir, f"{name}.prof")
+        snapshot_file = os.path.join(output_dir, f"{name}.tracemalloc")
+        profiler.dump_stats(stats_file)
+        snapshot.dump(snapshot_file)
+        print(f"✅ Profile written: {stats_file}, {snapshot_file} (peak {peak / (1024 * 1024):.1f} MiB traced)")
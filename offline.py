@@ -0,0 +1,66 @@
+import json
+import os
+
+from incremental import file_hash, text_hash
+from renderer import load_template
+
+SERVICE_WORKER = "sw.js"
+PRECACHE_MANIFEST = "precache-manifest.json"
+# Runtime-cached images kept before the least recently used are dropped
+MAX_IMAGES = 500
+
+
+def precache_entries(output_dir, pages=("index.html", "home.html"), remote=(), assets=False):
+    """{url: content hash} of the app shell: the pages, with assets the
+    files build_assets externalized them into (per asset-manifest.json),
+    and the remote URLs, whose hash is that of the URL itself"""
+    paths = [page for page in pages if os.path.exists(os.path.join(output_dir, page))]
+    if assets:
+        from assets import ASSET_MANIFEST
+
+        with open(os.path.join(output_dir, ASSET_MANIFEST), "r", encoding="utf-8") as f:
+            # Only this build's assets; build_assets keeps the previous ones on disk
+            paths += sorted(json.load(f)["assets"])
+    entries = {rel: file_hash(os.path.join(output_dir, rel))[:16] for rel in paths}
+    for url in remote:
+        entries[url] = text_hash(url)[:16]
+    return entries
+
+
+def _previous_entries(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f).get("entries", {})
+    except (OSError, ValueError):
+        return {}
+
+
+def build_service_worker(output_dir, pages=("index.html", "home.html"), remote=(), assets=False,
+                         max_images=MAX_IMAGES):
+    """Write sw.js and precache-manifest.json for a built site
+
+    The worker precaches the entries of precache_entries() (pass assets
+    when build_assets has run) and, on each new build, refetches only
+    those whose hash changed. Pages are served stale-while-revalidate,
+    other precached files cache-first, and every other image (the card
+    thumbnails) cache-first from a runtime cache holding at most
+    max_images, least recently used evicted first. The pages register
+    the worker when rendered with offline=True. Returns {"version",
+    "entries", "changed", "removed"}.
+    """
+    entries = precache_entries(output_dir, pages, remote, assets)
+    version = text_hash(json.dumps(entries, sort_keys=True))[:16]
+    manifest_path = os.path.join(output_dir, PRECACHE_MANIFEST)
+    previous = _previous_entries(manifest_path)
+    changed = sum(1 for url, digest in entries.items() if previous.get(url) != digest)
+    removed = len(set(previous) - set(entries))
+
+    shell_pages = [page for page in pages if page in entries]
+    worker = load_template("sw.js").render_string(version, entries, shell_pages, max_images)
+    with open(os.path.join(output_dir, SERVICE_WORKER), "w", encoding="utf-8") as f:
+        f.write(worker)
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump({"version": version, "entries": entries}, f, indent=1)
+    print(f"✅ Service worker built: {SERVICE_WORKER} {version} ({len(entries)} precached, "
+          f"{changed} new or changed, {removed} dropped)")
+    return {"version": version, "entries": len(entries), "changed": changed, "removed": removed}
@@ -0,0 +1,200 @@
+import argparse
+import sys
+from itertools import chain
+
+# Only what parsing the command line needs is imported up front: each
+# stage imports its modules when it runs, so a pipeline of short-lived
+# processes does not pay for the template engine, the rules or the build
+# machinery in a stage that never touches them.
+
+FORMATS = ("csv", "ndjson")
+REQUIRED = ("title", "url")
+
+
+class InputError(ValueError):
+    """Rows the stages cannot read; main reports these, anything else is a bug"""
+
+
+def _missing(fields):
+    return " or ".join(name for name in REQUIRED if name not in fields)
+
+
+def _not_text(row):
+    return " or ".join(name for name in REQUIRED if not isinstance(row[name], str))
+
+
+def read_rows(stream, fmt=None):
+    """Yield dict rows from CSV (with a header line) or NDJSON text, one at a time
+
+    fmt=None tells the two apart by the first line: NDJSON lines are
+    JSON objects. A CSV header or NDJSON object without a title and a url,
+    a CSV row too short to have both or an NDJSON object whose title or
+    url is not a string raises InputError before the row is yielded.
+    """
+    first = stream.readline()
+    if not first:
+        return
+    if fmt is None:
+        fmt = "ndjson" if first.lstrip().startswith("{") else "csv"
+    lines = chain((first,), stream)
+    if fmt == "csv":
+        import csv
+
+        reader = csv.DictReader(lines)
+        missing = _missing(reader.fieldnames or ())
+        if missing:
+            raise InputError(f"CSV header without a {missing} column; rows need a title and a url")
+        for row in reader:
+            if row["title"] is None or row["url"] is None:
+                raise InputError(f"CSV line {reader.line_num}: no {_not_text(row)} value; rows need a title "
+                                 "and a url")
+            yield row
+        return
+    import json
+
+    for n, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            raise InputError(f"NDJSON line {n}: {e}") from None
+        missing = _missing(row) if isinstance(row, dict) else "title or url"
+        if missing:
+            raise InputError(f"NDJSON line {n}: no {missing} field; rows need a title and a url")
+        wrong = _not_text(row)
+        if wrong:
+            raise InputError(f"NDJSON line {n}: {wrong} is not a string")
+        yield row
+
+
+def _rules(rules_file=None):
+    from rules import default_rules, load_rules
+
+    return load_rules(rules_file) if rules_file else default_rules()
+
+
+def _is_entry(row):
+    """A row as write_ndjson writes it: JSON-typed, which CSV rows never are"""
+    return "thumb" in row and isinstance(row.get("youtube"), bool) and isinstance(row.get("categories"), list)
+
+
+def normalize(rows, rules=None, dedupe=True):
+    """Yield ((title, url, thumb, is_youtube), categories) for each row
+
+    Rows with a title and url (and optionally a thumbnail) are parsed as
+    home.py parses videos.csv: canonical URL, thumbnail and categories
+    from the rules, which are only loaded when such a row comes up (pass
+    rules to use others than categories.json). Rows written by
+    write_ndjson (a thumb, a JSON true or false youtube and a list of
+    categories) are entries already and pass through, so the output of
+    one stage can feed another; CSV rows, all strings, never do.
+    Duplicates are dropped as they stream past unless dedupe is false;
+    pass a dedupe.Deduper to read its report afterwards.
+    """
+
+    from entries import parse_row
+
+    def pairs():
+        nonlocal rules
+        for row in rows:
+            if _is_entry(row):
+                yield (row["title"], row["url"], row["thumb"], row["youtube"]), row["categories"]
+                continue
+            if rules is None:
+                rules = _rules()
+            yield parse_row(row, rules)
+
+    if not dedupe:
+        return pairs()
+    from dedupe import Deduper
+
+    return (Deduper() if dedupe is True else dedupe).filter(pairs())
+
+
+def write_ndjson(pairs, out):
+    """Stream pairs to out as NDJSON, one entry object per line"""
+    import json
+
+    # One encoder for every line; json.dumps builds a new one per call for non-default options
+    encode = json.JSONEncoder(ensure_ascii=False).encode
+    out.writelines(encode({"title": title, "url": url, "thumb": thumb, "youtube": is_youtube, "categories": names})
+                   + "\n" for (title, url, thumb, is_youtube), names in pairs)
+
+
+def render(pairs, out, categories=None, total=None, standalone=False):
+    """Stream the swipe page for pairs to out, one card at a time
+
+    This is home.py's page, its categories card listing categories (the
+    configured names, in order) with entries spooled to disk while the
+    cards stream out, or with standalone swipe_site.py's page without
+    one. total, when known, gives the same z-index stack as those; rows
+    from a pipe have no count, and count down from STREAM_TOTAL instead.
+    """
+    from streaming import STREAM_TOTAL, CategorySpool, write_chunks
+
+    total = total or STREAM_TOTAL
+    if standalone:
+        from swipe_site import iter_html
+
+        return write_chunks(iter_html((entry for entry, _ in pairs), total), out)
+    from renderer import load_template
+
+    with CategorySpool(categories or ()) as spool:
+        page = load_template("swipe.html").render(spool.tee(pairs), total, spool.categories())
+        return write_chunks(page, out)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Stream catalog rows from stdin through the site generator to stdout, e.g. "
+                    "extract | python pipeline.py normalize | python pipeline.py render > index.html")
+    parser.add_argument("stage", choices=("normalize", "render"),
+                        help="normalize: rows to NDJSON entries; render: rows or entries to the swipe page")
+    parser.add_argument("input", nargs="?", default="-", help="file to read instead of stdin")
+    parser.add_argument("--from", dest="fmt", choices=FORMATS,
+                        help="input format (default: NDJSON if the first line is a JSON object, else CSV)")
+    parser.add_argument("--rules", metavar="FILE", help="categories config (default: categories.json)")
+    parser.add_argument("--keep-duplicates", action="store_true",
+                        help="pass on every row, even rows repeating an earlier video or URL")
+    parser.add_argument("--standalone", action="store_true",
+                        help="render swipe_site.py's page, without the categories card")
+    parser.add_argument("--total", type=int, metavar="ROWS",
+                        help="row count, if known, for the same card z-indexes as a build from a file")
+    args = parser.parse_args(argv)
+    if (args.standalone or args.total) and args.stage != "render":
+        parser.error("--standalone and --total apply to render")
+
+    source = sys.stdin if args.input == "-" else open(args.input, "r", encoding="utf-8", newline="")
+    if source is sys.stdin:
+        sys.stdin.reconfigure(encoding="utf-8", newline="")
+    sys.stdout.reconfigure(encoding="utf-8")
+    rules = _rules(args.rules) if args.rules or (args.stage == "render" and not args.standalone) else None
+    deduper = False
+    if not args.keep_duplicates:
+        from dedupe import Deduper
+
+        deduper = Deduper()
+    try:
+        with source:
+            pairs = normalize(read_rows(source, args.fmt), rules, deduper)
+            if args.stage == "normalize":
+                write_ndjson(pairs, sys.stdout)
+            else:
+                render(pairs, sys.stdout, rules.categories if rules else None, args.total, args.standalone)
+            sys.stdout.flush()
+    except InputError as e:
+        sys.exit(f"❌ {e}")
+    except BrokenPipeError:
+        # The reader went away (e.g. | head); keep Python from failing again at exit
+        import os
+
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        sys.exit(1)
+    # Reports go to stderr, out of the way of the stream
+    if deduper and deduper.merged:
+        print(deduper.summary(), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+import argparse
+import csv
+import gc
+import json
+import os
+from contextlib import contextmanager
+from itertools import islice, repeat
+
+from incremental import file_hash, text_hash
+from rules import default_rules, load_rules
+
+# Aggregated swipe log: one row per card URL (and segment), counts summed
+# over every row that repeats it, so appended batches and single events
+# (right=1) read the same way
+LOG_FIELDS = ("url", "right", "left", "up", "last_seen", "segment")
+WEIGHTS = {"interest": 1.0, "recency": 0.3, "affinity": 0.5}
+HALF_LIFE = 7 * 24 * 3600
+# Pseudo-impressions at the global interest rate added to every item and
+# category, so three rights out of three do not outrank 300 out of 400
+PRIOR_WEIGHT = 5.0
+LOG_CHUNK = 100_000
+
+
+def _numpy():
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError("the ranking stage needs NumPy: pip install numpy") from None
+    return numpy
+
+
+@contextmanager
+def _no_gc():
+    """Pause the cyclic GC while parsing: the rows are acyclic, and with a
+    million-item catalog alive every full collection walks all of it"""
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def _column(values, np):
+    try:
+        return np.array(values, dtype=float)
+    except ValueError:
+        return np.array([float(v or 0) for v in values])
+
+
+def load_swipes(log_file, urls, segments=None):
+    """Swipe counts per segment and item, as (segment names, counts)
+
+    log_file is one swipe log or a list of them, such as collector.py's
+    rotated files, read as if concatenated. urls maps card URL → item
+    index; rows for other URLs are ignored. counts has shape (4,
+    segments, items): right, left, up and the newest last_seen.
+    segments=None folds every segment into one, a list keeps only those
+    segments and an empty list keeps them all apart. The log is parsed
+    LOG_CHUNK rows at a time into NumPy columns.
+    """
+    np = _numpy()
+    names = {"": 0} if segments is None else {name: i for i, name in enumerate(segments)}
+    parts = []
+    for path in [log_file] if isinstance(log_file, str) else log_file:
+        with open(path, "r", encoding="utf-8") as f, _no_gc():
+            reader = csv.reader(f)
+            header = next(reader, [])
+            if "url" not in header:
+                raise ValueError(f"{path}: a swipe log needs a url column ({', '.join(LOG_FIELDS)})")
+            fields = {name: header.index(name) for name in LOG_FIELDS if name in header}
+            while True:
+                chunk = list(zip(*islice(reader, LOG_CHUNK)))
+                if not chunk:
+                    break
+                size = len(chunk[0])
+                rows = np.fromiter(map(urls.get, chunk[fields["url"]], repeat(-1, size)), dtype=np.intp,
+                                   count=size)
+                if segments is None or "segment" not in fields:
+                    segs = np.zeros(size, dtype=np.intp)
+                else:
+                    if not segments:
+                        for segment in dict.fromkeys(chunk[fields["segment"]]):
+                            names.setdefault(segment, len(names))
+                    segs = np.fromiter(map(names.get, chunk[fields["segment"]], repeat(-1, size)),
+                                       dtype=np.intp, count=size)
+                keep = (rows >= 0) & (segs >= 0)
+                columns = [_column(chunk[fields[name]], np)[keep] if name in fields else np.zeros(keep.sum())
+                           for name in ("right", "left", "up", "last_seen")]
+                parts.append((segs[keep], rows[keep], columns))
+    if not names:
+        names[""] = 0
+    n = len(urls)
+    cells = len(names) * n
+    counts = np.zeros((4, cells))
+    if parts:
+        # One flat (segment, item) index, so the sums are single bincounts
+        flat = np.concatenate([segs * n + rows for segs, rows, _ in parts])
+        for k in range(4):
+            values = np.concatenate([columns[k] for _, _, columns in parts])
+            if k < 3:
+                counts[k] = np.bincount(flat, weights=values, minlength=cells)
+            else:
+                np.maximum.at(counts[k], flat, values)
+    return list(names), counts.reshape(4, len(names), n)
+
+
+def score(counts, item_categories, now=None, half_life=HALF_LIFE, weights=WEIGHTS, prior_weight=PRIOR_WEIGHT):
+    """Scores of every item in every segment, shape (segments, items)
+
+    interest   right swipes over impressions, smoothed towards the
+               segment's overall rate
+    recency    exp decay of the item's last swipe, half_life seconds
+               before now (default: the newest swipe in the log)
+    affinity   mean smoothed interest of the item's categories
+
+    item_categories is a pair of equal-length arrays (item, category),
+    one entry per membership.
+    """
+    np = _numpy()
+    right, left, up, seen = counts
+    shown = right + left + up
+    prior = (right.sum(axis=1, keepdims=True) + 1) / (shown.sum(axis=1, keepdims=True) + 2)
+    interest = (right + prior_weight * prior) / (shown + prior_weight)
+
+    now = seen.max() if now is None else now
+    recency = np.where(seen > 0, np.exp2(-np.maximum(now - seen, 0) / half_life), 0.0)
+
+    items, categories = item_categories
+    n = right.shape[1]
+    affinity = np.broadcast_to(prior, right.shape).copy()
+    if len(items):
+        memberships = np.bincount(items, minlength=n)
+        for s in range(right.shape[0]):
+            liked = np.bincount(categories, weights=right[s, items])
+            seen_in = np.bincount(categories, weights=shown[s, items])
+            rate = (liked + prior_weight * prior[s]) / (seen_in + prior_weight)
+            total = np.bincount(items, weights=rate[categories], minlength=n)
+            affinity[s] = np.where(memberships > 0, total / np.maximum(memberships, 1), prior[s])
+    return weights["interest"] * interest + weights["recency"] * recency + weights["affinity"] * affinity
+
+
+def item_categories(pairs):
+    """(entries, (item, category) membership arrays, category names) of read_catalog pairs"""
+    np = _numpy()
+    entries, items, categories, names = [], [], [], {}
+    with _no_gc():
+        for row, (entry, cats) in enumerate(pairs):
+            entries.append((entry, cats))
+            for name in cats or ():
+                items.append(row)
+                categories.append(names.setdefault(name, len(names)))
+    return entries, (np.array(items, dtype=np.intp), np.array(categories, dtype=np.intp)), list(names)
+
+
+class Ranker:
+    """Orders a catalog by swipe feedback before it is rendered
+
+    Scores come from the aggregated swipe log (see LOG_FIELDS) for one
+    segment, or for all of them folded together; ties, including every
+    item nobody swiped, keep catalog order.
+    """
+
+    def __init__(self, log_file, segment=None, half_life=HALF_LIFE, weights=WEIGHTS):
+        self.log_file = log_file   # one path or a list of them
+        self.segment = segment
+        self.half_life = half_life
+        self.weights = dict(weights)
+
+    @property
+    def fingerprint(self):
+        """What the order depends on besides the catalog"""
+        files = [self.log_file] if isinstance(self.log_file, str) else self.log_file
+        return text_hash(file_hash(*files), self.segment or "", str(self.half_life),
+                         json.dumps(self.weights, sort_keys=True))
+
+    def orders(self, pairs, segments=None):
+        """(entries, {segment: item order}) for the given segments (None: all folded)"""
+        np = _numpy()
+        entries, memberships, _ = item_categories(pairs)
+        urls = {}
+        for row, ((_, url, _, _), _) in enumerate(entries):
+            urls.setdefault(url, row)
+        names, counts = load_swipes(self.log_file, urls, segments)
+        scores = score(counts, memberships, half_life=self.half_life, weights=self.weights)
+        return entries, {name: np.argsort(-scores[s], kind="stable") for s, name in enumerate(names)}
+
+    def rank(self, pairs):
+        """The (entry, categories) pairs in ranked order, as a list"""
+        entries, orders = self.orders(pairs, None if self.segment is None else [self.segment])
+        order = next(iter(orders.values()), range(len(entries)))
+        return [entries[i] for i in order]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rank the catalog by swipe feedback")
+    parser.add_argument("--csv", default="videos.csv",
+                        help="catalog, a CSV or compiled (default: %(default)s)")
+    parser.add_argument("--log", required=True, nargs="+",
+                        help=f"aggregated swipe logs, CSV with {', '.join(LOG_FIELDS)}")
+    parser.add_argument("--rules", metavar="FILE", help="categories config (default: categories.json)")
+    parser.add_argument("--segments", action="store_true", help="one order per segment in the log")
+    parser.add_argument("-o", "--output", default="ranking.json",
+                        help="where to write the order (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    from home import read_catalog
+
+    rules = load_rules(args.rules) if args.rules else default_rules()
+    ranker = Ranker(args.log)
+    entries, orders = ranker.orders(read_catalog(args.csv, rules), [] if args.segments else None)
+    ranked = {name: [entries[i][0][1] for i in order] for name, order in orders.items()}
+    result = {"segments": ranked} if args.segments else {"order": ranked[""]}
+    tmp = f"{args.output}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=1)
+    os.replace(tmp, args.output)
+    print(f"✅ Ranking written: {args.output} ({len(entries)} items, {len(orders)} orders)")
+
+
+if __name__ == "__main__":
+    main()
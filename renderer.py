@@ -0,0 +1,358 @@
+import hashlib
+import importlib.util
+import linecache
+import marshal
+import os
+import re
+import sys
+from functools import lru_cache
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "templates")
+CACHE_DIR = os.path.join(TEMPLATE_DIR, "__pycache__")
+
+_TAG = re.compile(r"(\{\{.*?\}\}|\{%.*?%\}|\{#.*?#\})", re.DOTALL)
+# Expressions simple enough to sit inside an f-string replacement field
+_INLINE = re.compile(r"[\w\s.,()\[\]+\-*/%]+")
+
+_CLEAN_TEST = " or ".join(f"{ch!r} in {{0}}" for ch in "&<>\"'")
+
+
+def escape(value):
+    """HTML-escape str(value)
+
+    Titles and URLs rarely need it, so the clean case is a few memchr
+    scans and no copy; only text with a special character is rewritten.
+    """
+    if value.__class__ is not str:
+        value = str(value)
+    if "&" in value or "<" in value or ">" in value or '"' in value or "'" in value:
+        return (value.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+                .replace('"', "&quot;").replace("'", "&#x27;"))
+    return value
+
+
+class TemplateSyntaxError(ValueError):
+    pass
+
+
+def _trim_block_lines(parts):
+    """Whitespace control, applied to the split source
+
+    A {% %} or {# #} tag standing on a line of its own leaves no trace:
+    its indentation and line break are dropped. {{ expr -}} drops the
+    line break that follows the expression.
+    """
+    trimmed = True   # the template starts at the beginning of a line
+    for i in range(1, len(parts), 2):
+        tag = parts[i]
+        if tag.startswith("{{"):
+            trimmed = False
+            if tag.endswith("-}}"):
+                parts[i] = tag[:-3] + "}}"
+                parts[i + 1] = re.sub(r"\A[ \t]*\n", "", parts[i + 1])
+                trimmed = parts[i + 1] == ""
+            continue
+        head = parts[i - 1].rstrip(" \t")
+        at_line_start = head.endswith("\n") or (not head and trimmed)
+        trimmed = False
+        if not at_line_start:
+            continue
+        match = re.match(r"[ \t]*(\n|$)", parts[i + 1])
+        if match:
+            parts[i - 1] = head
+            parts[i + 1] = parts[i + 1][match.end():]
+            trimmed = True
+    return parts
+
+
+def _keyword(tag):
+    return tag[2:-2].split(None, 1)[0] if tag.startswith("{%") else ""
+
+
+def _parse(source, name):
+    """Template source → (imports, args, defs, body) with nested node lists"""
+    parts = _trim_block_lines(_TAG.split(source))
+    imports, args, defs = [], "", []
+    root = []
+    stack = [("root", root, None)]
+
+    def fail(message):
+        raise TemplateSyntaxError(f"{name}: {message}")
+
+    for i, part in enumerate(parts):
+        nodes = stack[-1][1]
+        if i % 2 == 0:
+            # Whitespace between top-level {% def %} blocks is layout, not output
+            between_defs = nodes is root and not part.strip() and (
+                (i > 0 and _keyword(parts[i - 1]) == "enddef")
+                or (i + 1 < len(parts) and _keyword(parts[i + 1]) == "def"))
+            if part and not between_defs:
+                nodes.append(("text", part))
+            continue
+        if part.startswith("{#"):
+            continue
+        if part.startswith("{{"):
+            code = part[2:-2].strip()
+            safe = code.endswith("|safe")
+            if safe:
+                code = code[:-5].rstrip()
+            nodes.append(("expr", code, safe))
+            continue
+
+        keyword = _keyword(part)
+        rest = part[2:-2].strip()[len(keyword):].strip()
+        kind = stack[-1][0]
+        if keyword in ("import", "from"):
+            imports.append(f"{keyword} {rest}")
+        elif keyword == "args":
+            args = rest
+        elif keyword == "set":
+            nodes.append(("set", rest))
+        elif keyword == "def":
+            if len(stack) != 1:
+                fail("{% def %} is only allowed at the top level")
+            body = []
+            defs.append((rest, body))
+            stack.append(("def", body, None))
+        elif keyword == "if":
+            node = ("if", [(rest, [])], [])
+            nodes.append(node)
+            stack.append(("if", node[1][0][1], node))
+        elif keyword in ("elif", "else"):
+            if kind not in ("if", "elif"):
+                fail(f"{{% {keyword} %}} outside {{% if %}}")
+            node = stack.pop()[2]
+            if keyword == "elif":
+                node[1].append((rest, []))
+                stack.append(("elif", node[1][-1][1], node))
+            else:
+                stack.append(("else", node[2], node))
+        elif keyword == "for":
+            target, sep, iterable = rest.partition(" in ")
+            if not sep:
+                fail(f"bad loop: {{% for {rest} %}}")
+            node = ("for", target.strip(), iterable.strip(), [])
+            nodes.append(node)
+            stack.append(("for", node[3], node))
+        elif keyword in ("endif", "endfor", "enddef"):
+            opened = {"endif": ("if", "elif", "else"), "endfor": ("for",), "enddef": ("def",)}[keyword]
+            if kind not in opened:
+                fail(f"unexpected {{% {keyword} %}}")
+            stack.pop()
+        else:
+            fail(f"unknown tag {part!r}")
+    if len(stack) != 1:
+        fail(f"{{% {stack[-1][0]} %}} is never closed")
+    return imports, args, defs, root
+
+
+def _literal(text):
+    """text as the inside of a double-quoted f-string"""
+    return (text.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n").replace("\r", "\\r")
+            .replace("{", "{{").replace("}", "}}"))
+
+
+class _CodeGen:
+    """Python source for a parsed template
+
+    Runs of text and {{ }} output are merged into one f-string each, so a
+    loop body costs one string build per iteration. The page body becomes
+    a generator (render) that yields at every control boundary, which keeps
+    it streamable; each {% def %} becomes a function returning a str.
+    """
+
+    def __init__(self):
+        self.lines = []
+        self.counter = 0
+
+    def line(self, depth, text):
+        self.lines.append("    " * depth + text)
+
+    def block(self, nodes, depth, emit):
+        """Statements for nodes; emit(fstring) is 'yield {}' or '_a({})'"""
+        pending = []
+        wrote = False
+        start = len(self.lines)
+
+        def flush():
+            nonlocal wrote
+            if pending:
+                self.line(depth, emit.format('f"' + "".join(pending) + '"'))
+                pending.clear()
+                wrote = True
+
+        for node in nodes:
+            kind = node[0]
+            if kind == "text":
+                pending.append(_literal(node[1]))
+            elif kind == "expr":
+                _, code, safe = node
+                if safe and _INLINE.fullmatch(code):
+                    pending.append("{" + code + "}")
+                    continue
+                self.counter += 1
+                var = f"_v{self.counter}"
+                if safe:
+                    self.line(depth, f"{var} = {code}")
+                elif code.isidentifier():
+                    # The clean-string test inline: no call for the common case
+                    self.line(depth, f"{var} = {code} if {code}.__class__ is str and not ({_CLEAN_TEST.format(code)}) "
+                                     f"else _e({code})")
+                else:
+                    self.line(depth, f"{var} = _e({code})")
+                pending.append("{" + var + "}")
+            elif kind == "set":
+                flush()
+                self.line(depth, node[1])
+            elif kind == "if":
+                flush()
+                for k, (condition, body) in enumerate(node[1]):
+                    self.line(depth, f"{'if' if k == 0 else 'elif'} {condition}:")
+                    wrote |= self.block(body, depth + 1, emit)
+                if node[2]:
+                    self.line(depth, "else:")
+                    wrote |= self.block(node[2], depth + 1, emit)
+            elif kind == "for":
+                flush()
+                self.line(depth, f"for {node[1]} in {node[2]}:")
+                wrote |= self.block(node[3], depth + 1, emit)
+        flush()
+        if len(self.lines) == start:
+            self.line(depth, "pass")
+        return wrote
+
+    def function(self, signature, nodes):
+        self.line(0, f"def {signature}:")
+        k = 0
+        while k < len(nodes) and nodes[k][0] == "set":
+            k += 1
+        leading_sets, flat = nodes[:k], nodes[k:]
+        if all(n[0] in ("text", "expr") for n in flat):
+            # Straight-line body: a single f-string, no list to join
+            for node in leading_sets:
+                self.line(1, node[1])
+            self.block(flat, 1, "return {}")
+            if not flat:
+                self.line(1, 'return ""')
+        else:
+            self.line(1, "_out = []")
+            self.line(1, "_a = _out.append")
+            self.block(nodes, 1, "_a({})")
+            self.line(1, 'return "".join(_out)')
+        self.line(0, "")
+
+    def module(self, imports, args, defs, body):
+        self.lines.extend(imports)
+        self.line(0, "")
+        for signature, nodes in defs:
+            self.function(signature, nodes)
+        self.line(0, f"def render({args}):")
+        if not self.block(body, 1, "yield {}"):
+            self.line(1, "yield from ()")
+        return "\n".join(self.lines) + "\n"
+
+
+def compile_template(source, name="<template>"):
+    """Python source of the module a template compiles to"""
+    return _CodeGen().module(*_parse(source, name))
+
+
+@lru_cache(maxsize=None)
+def _compiler_hash():
+    with open(__file__, "rb") as f:
+        return hashlib.blake2b(f.read(), digest_size=8).hexdigest()
+
+
+def _cache_path(name, source):
+    digest = hashlib.blake2b(source.encode("utf-8"), digest_size=8).hexdigest()
+    return os.path.join(CACHE_DIR, f"{name}.{digest}.{_compiler_hash()}.{sys.implementation.cache_tag}.bin")
+
+
+def _register_source(filename, generated):
+    # Tracebacks then quote the generated Python at the line that failed
+    linecache.cache[filename] = (len(generated), None, generated.splitlines(True), filename)
+
+
+def _load_code(name, source):
+    """Code object for a template, from the bytecode cache when it is current
+
+    The code is compiled as <template name>, not under the template's
+    path: its line numbers are those of the generated Python, which is
+    kept with the bytecode for tracebacks.
+    """
+    filename = f"<template {name}>"
+    cache = _cache_path(name, source)
+    try:
+        with open(cache, "rb") as f:
+            data = f.read()
+        if data[:4] == importlib.util.MAGIC_NUMBER:
+            generated, code = marshal.loads(data[4:])
+            _register_source(filename, generated)
+            return code
+    except (OSError, ValueError, EOFError, TypeError):
+        pass
+    generated = compile_template(source, name)
+    code = compile(generated, filename, "exec")
+    _register_source(filename, generated)
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        tmp = f"{cache}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(importlib.util.MAGIC_NUMBER + marshal.dumps((generated, code)))
+        os.replace(tmp, cache)
+        # Stale entries of this template
+        prefix = name + "."
+        for entry in os.listdir(CACHE_DIR):
+            if entry.startswith(prefix) and os.path.join(CACHE_DIR, entry) != cache:
+                os.remove(os.path.join(CACHE_DIR, entry))
+    except OSError:
+        pass   # read-only checkout: compile on every start instead
+    return code
+
+
+class Template:
+    """A compiled template
+
+    render(**args) yields the page in fragments (pass it to write_chunks,
+    or join it); every {% def name(...) %} block is available as a
+    method returning a str.
+    """
+
+    def __init__(self, name, namespace):
+        self.name = name
+        self.namespace = namespace
+        self.render = namespace["render"]
+
+    def render_string(self, *args, **kwargs):
+        return "".join(self.render(*args, **kwargs))
+
+    def __getattr__(self, attr):
+        try:
+            return self.namespace[attr]
+        except KeyError:
+            raise AttributeError(f"template {self.name} has no block {attr!r}") from None
+
+
+def template_path(name):
+    return os.path.join(TEMPLATE_DIR, name)
+
+
+def template_files():
+    """Every template source, for change detection"""
+    return sorted(os.path.join(TEMPLATE_DIR, name) for name in os.listdir(TEMPLATE_DIR) if name.endswith(".html"))
+
+
+@lru_cache(maxsize=None)
+def load_template(name):
+    """Compile templates/<name> once per process (and once per change on disk)"""
+    path = template_path(name)
+    with open(path, "r", encoding="utf-8") as f:
+        source = f.read()
+    namespace = {"_e": escape, "__name__": f"templates.{name}", "__file__": path}
+    exec(_load_code(name, source), namespace)
+    return Template(name, namespace)
+
+
+def clear_cache():
+    """Forget compiled templates so the next load_template() sees edits"""
+    load_template.cache_clear()
@@ -0,0 +1,205 @@
+import json
+import os
+import re
+from functools import lru_cache
+
+from incremental import file_hash
+
+DEFAULT_RULES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "categories.json")
+RULE_KINDS = ("prefix", "keyword", "regex", "domain", "column")
+# Regex syntax that changes meaning inside a larger alternation: numbered
+# backreferences, named groups (names must be unique) and group conditionals
+GROUP_REFERENCE = re.compile(r"\\[1-9]|\(\?P[<=]|\(\?\(")
+URL_HOST = re.compile(r"^(?:[A-Za-z][A-Za-z0-9+.-]*:)?//(?:[^@/?#]*@)?([^:/?#]+)")
+
+
+def _trie_pattern(node):
+    """Regex source for a character trie; greedy, so it prefers the longest word"""
+    branches = [re.escape(ch) + _trie_pattern(child) for ch, child in node.items() if ch != ""]
+    if not branches:
+        return ""
+    if len(branches) == 1 and "" not in node:
+        return branches[0]
+    group = "(?:" + "|".join(branches) + ")"
+    return group + "?" if "" in node else group
+
+
+class WordMatcher:
+    """All rules whose word occurs in (or, anchored, starts) a text, in one pass
+
+    The words are compiled into a trie and the trie into a single regex, so
+    the scan runs inside the regex engine instead of once per rule. The
+    regex reports the longest word at each position; the shorter words that
+    share its start are recovered by walking the trie along the match.
+    """
+
+    def __init__(self, words, anchored=False):
+        self.trie = {}
+        for word, rule_id in words:
+            node = self.trie
+            for ch in word:
+                node = node.setdefault(ch, {})
+            node.setdefault("", []).append(rule_id)
+        self.anchored = anchored
+        if not self.trie:
+            self.regex = None
+        elif anchored:
+            self.regex = re.compile(_trie_pattern(self.trie))
+        else:
+            self.regex = re.compile(f"(?=({_trie_pattern(self.trie)}))")
+
+    def _rules_along(self, word, found):
+        node = self.trie
+        for ch in word:
+            node = node[ch]
+            if "" in node:
+                found.update(node[""])
+
+    def match(self, text, found):
+        """Add the ids of every rule matching text to the set found"""
+        if self.regex is None:
+            return
+        if self.anchored:
+            m = self.regex.match(text)
+            if m and m.group():
+                self._rules_along(m.group(), found)
+            return
+        seen = set()
+        for m in self.regex.finditer(text):
+            word = m.group(1)
+            if word and word not in seen:
+                seen.add(word)
+                self._rules_along(word, found)
+
+
+class Rules:
+    """Categories, their matching rules and thumbnail overrides from a config file
+
+    Rules are tried in file order. Unless "multi" is set, an item gets the
+    category of the first rule that matches it (like the old if/elif chain);
+    with "multi" it gets every matching category. Items that match nothing
+    go to "default".
+    """
+
+    def __init__(self, config, fingerprint=""):
+        self.categories = list(config.get("categories", []))
+        self.default = config.get("default") or (self.categories[-1] if self.categories else "Others")
+        if self.default not in self.categories:
+            self.categories.append(self.default)
+        self.multi = bool(config.get("multi", False))
+        self.fingerprint = fingerprint
+        self.thumbnails = {t["title"].lower(): t["thumbnail"] for t in config.get("thumbnails", [])}
+
+        self.rules = []
+        words = {(kind, fold): [] for kind in ("prefix", "keyword") for fold in (False, True)}
+        regexes = []
+        self.domains = {}
+        self.columns = []
+        for rule_id, rule in enumerate(config.get("rules", [])):
+            kinds = [kind for kind in RULE_KINDS if kind in rule]
+            if len(kinds) != 1:
+                raise ValueError(f"rule {rule_id} needs exactly one of {', '.join(RULE_KINDS)}: {rule}")
+            kind = kinds[0]
+            value = rule[kind]
+            category = rule.get("category")
+            if kind != "column":
+                if not category:
+                    raise ValueError(f"rule {rule_id} has no category: {rule}")
+                if category not in self.categories:
+                    self.categories.append(category)
+            fold = bool(rule.get("ignore_case", False))
+            self.rules.append(category)
+            if kind in ("prefix", "keyword"):
+                words[kind, fold].append((value.casefold() if fold else value, rule_id))
+            elif kind == "regex":
+                regexes.append((value, fold, rule_id))
+            elif kind == "domain":
+                self.domains.setdefault(value.lower().lstrip("."), []).append(rule_id)
+            else:
+                self.columns.append((value, rule_id))
+
+        self.matchers = [(fold, WordMatcher(pairs, anchored=(kind == "prefix")))
+                         for (kind, fold), pairs in words.items() if pairs]
+        # Free-form regexes cannot share a trie. One combined search tells
+        # whether any of them can match; only then is each one tried. Those
+        # with global inline flags such as (?i), or referring to their own
+        # groups, would break or change meaning in the alternation and are
+        # searched on their own.
+        self.regexes, self.lone_regexes, shared = [], [], []
+        plain = re.compile("").flags
+        for value, fold, rule_id in regexes:
+            flags = re.IGNORECASE if fold else 0
+            regex = re.compile(value, flags)
+            if regex.flags != plain | flags or GROUP_REFERENCE.search(value):
+                self.lone_regexes.append((regex, rule_id))
+            else:
+                self.regexes.append((regex, rule_id))
+                shared.append(f"(?i:{value})" if fold else f"(?:{value})")
+        self.any_regex = re.compile("|".join(shared)) if shared else None
+
+    def _match_ids(self, title, url):
+        found = set()
+        folded = None
+        for fold, matcher in self.matchers:
+            if fold:
+                if folded is None:
+                    folded = title.casefold()
+                matcher.match(folded, found)
+            else:
+                matcher.match(title, found)
+        if self.any_regex is not None and self.any_regex.search(title):
+            for regex, rule_id in self.regexes:
+                if regex.search(title):
+                    found.add(rule_id)
+        for regex, rule_id in self.lone_regexes:
+            if regex.search(title):
+                found.add(rule_id)
+        if self.domains and url:
+            m = URL_HOST.match(url)
+            host = m.group(1).lower() if m else ""
+            while host:
+                found.update(self.domains.get(host, ()))
+                host = host.partition(".")[2]
+        return found
+
+    def classify(self, title, url="", row=None):
+        """Categories of one item, in rule order"""
+        found = self._match_ids(title, url)
+        if self.columns and row:
+            for column, rule_id in self.columns:
+                if (row.get(column) or "").strip():
+                    found.add(rule_id)
+        names = []
+        for rule_id in sorted(found):
+            category = self.rules[rule_id]
+            if category is None:
+                # Explicit CSV column: its value names the categories
+                column = next(c for c, r in self.columns if r == rule_id)
+                candidates = [c.strip() for c in row[column].split(";") if c.strip()]
+            else:
+                candidates = [category]
+            for name in candidates:
+                if name not in names:
+                    names.append(name)
+            if names and not self.multi:
+                return names[:1]
+        return names or [self.default]
+
+    def categorize(self, title, url="", row=None):
+        """The first category of an item"""
+        return self.classify(title, url, row)[0]
+
+    def thumbnail_for(self, title):
+        return self.thumbnails.get(title.lower())
+
+
+def load_rules(path=DEFAULT_RULES):
+    """Load and compile a categories config file"""
+    with open(path, "r", encoding="utf-8") as f:
+        config = json.load(f)
+    return Rules(config, fingerprint=file_hash(path))
+
+
+@lru_cache(maxsize=None)
+def default_rules():
+    return load_rules(DEFAULT_RULES)
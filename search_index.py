@@ -0,0 +1,127 @@
+import json
+import os
+import unicodedata
+
+from renderer import load_template
+
+SEARCH_DIR = "search"
+KEY_LENGTH = 2
+DOC_SHARD_SIZE = 256
+
+_WORD = {"L", "N"}           # may start a token
+_WORD_BODY = {"L", "M", "N"}  # may continue one (Telugu, Devanagari … vowel signs are M)
+_char_kind = {}
+
+
+def _kind(ch):
+    kind = _char_kind.get(ch)
+    if kind is None:
+        category = unicodedata.category(ch)
+        if category == "So":
+            kind = "symbol"
+        elif category[0] in _WORD:
+            kind = "start"
+        elif category[0] in _WORD_BODY:
+            kind = "body"
+        else:
+            kind = ""
+        _char_kind[ch] = kind
+    return kind
+
+
+def tokenize(text):
+    """Lower-cased NFKC tokens: runs of letters/marks/digits, and each emoji
+
+    Separators such as |, #, - and spaces are dropped. The inline search
+    script applies the same rule with /[\\p{L}\\p{N}][\\p{L}\\p{M}\\p{N}]*|\\p{So}/gu.
+    """
+    tokens = []
+    current = []
+    for ch in unicodedata.normalize("NFKC", text).lower():
+        kind = _kind(ch)
+        if kind == "start" or (kind == "body" and current):
+            current.append(ch)
+            continue
+        if current:
+            tokens.append("".join(current))
+            current = []
+        if kind == "symbol":
+            tokens.append(ch)
+    if current:
+        tokens.append("".join(current))
+    return tokens
+
+
+def shard_key(token):
+    return token[:KEY_LENGTH]
+
+
+def shard_name(key):
+    """File-system safe shard name: code points in hex"""
+    return "t-" + "-".join(f"{ord(ch):x}" for ch in key) + ".json"
+
+
+def _dump(path, data):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+
+
+def build_search_index(entries, output_dir):
+    """Write an inverted index of title tokens under <output_dir>/search/
+
+    Token shards t-<key>.json hold the sorted tokens sharing their first two
+    characters, each with a delta-encoded posting list of document ids; a
+    query's last word, matched as a prefix, is only looked up once it has
+    that many.
+    Documents go to d-<n>.json in blocks of DOC_SHARD_SIZE, so the page
+    only fetches the blocks holding the hits it shows. Returns the number
+    of documents indexed.
+    """
+    search_dir = os.path.join(output_dir, SEARCH_DIR)
+    os.makedirs(search_dir, exist_ok=True)
+    written = set()
+
+    postings = {}
+    docs = []
+    doc_id = -1
+    for doc_id, (title, url, thumb, _) in enumerate(entries):
+        for token in set(tokenize(title)):
+            postings.setdefault(token, []).append(doc_id)
+        docs.append([title, url, thumb])
+        if len(docs) == DOC_SHARD_SIZE:
+            name = f"d-{doc_id // DOC_SHARD_SIZE}.json"
+            _dump(os.path.join(search_dir, name), docs)
+            written.add(name)
+            docs = []
+    if docs:
+        name = f"d-{doc_id // DOC_SHARD_SIZE}.json"
+        _dump(os.path.join(search_dir, name), docs)
+        written.add(name)
+
+    # Sorted the way JavaScript compares strings (UTF-16 code units), so the
+    # page can binary-search a shard with plain < comparisons.
+    shards = {}
+    for token in sorted(postings, key=lambda t: t.encode("utf-16-be")):
+        shards.setdefault(shard_key(token), []).append(token)
+    for key, tokens in shards.items():
+        encoded = []
+        for token in tokens:
+            ids = postings[token]
+            encoded.append([ids[0]] + [b - a for a, b in zip(ids, ids[1:])])
+        name = shard_name(key)
+        _dump(os.path.join(search_dir, name), {"t": tokens, "p": encoded})
+        written.add(name)
+
+    for name in os.listdir(search_dir):
+        if name not in written:
+            os.remove(os.path.join(search_dir, name))
+
+    total = doc_id + 1
+    print(f"✅ Search index generated: {total} titles, {len(postings)} tokens in {len(shards)} shards")
+    return total
+
+
+def render_search_widget(limit=10):
+    """The page's search box (templates/widgets.html), configured for this index"""
+    config = {"base": f"{SEARCH_DIR}/", "keyLength": KEY_LENGTH, "docShardSize": DOC_SHARD_SIZE, "limit": limit}
+    return load_template("widgets.html").search_widget(config)
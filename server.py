@@ -0,0 +1,328 @@
+import argparse
+import json
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import parse_qs, quote
+
+import home
+from catalog import is_catalog, open_catalog
+from dedupe import Deduper
+from incremental import row_hash, text_hash
+from rules import DEFAULT_RULES, load_rules
+from shards import SHARD_SIZE
+from streaming import CHUNK_SIZE
+from thumbs import card_priority
+
+CACHE_SIZE = 20_000
+MAX_PAGE_SIZE = 500
+REVALIDATE = "no-cache"
+
+
+class LRUCache:
+    """At most maxsize values, the least recently used dropped first"""
+
+    def __init__(self, maxsize=CACHE_SIZE):
+        self.maxsize = maxsize
+        self.items = OrderedDict()
+        self.hits = self.misses = 0
+
+    def get(self, key, make):
+        value = self.items.get(key)
+        if value is not None:
+            self.items.move_to_end(key)
+            self.hits += 1
+            return value
+        self.misses += 1
+        value = self.items[key] = make()
+        if len(self.items) > self.maxsize:
+            self.items.popitem(last=False)
+        return value
+
+
+class BadRequest(Exception):
+    """A request the server understood the route of but not the parameters"""
+
+
+class LoadedCatalog:
+    """One load of the catalog, never modified afterwards
+
+    A request reads the app's current LoadedCatalog once and uses it to the
+    end, so a reload swapping in a new one never changes a response
+    half way through. ETags come from row hashes: a category's tag only
+    changes when its own rows do. The version also covers the rules and
+    every row's categories, which a rules reload can change while the
+    rows stay the same. total is the card count the swipe page stacks,
+    which, as in a static build, includes merged duplicates.
+    """
+
+    def __init__(self, pairs, rules, total=None):
+        self.rows = []        # (entry, row hash)
+        self.categories = {name: [] for name in rules.categories}
+        tagged = []
+        for i, (entry, names) in enumerate(pairs):
+            h = row_hash(entry)
+            self.rows.append((entry, h))
+            tagged.append(h + "\0" + "\0".join(names))
+            for name in names:
+                self.categories.setdefault(name, []).append(i)
+        self.tags = {name: text_hash(name, *(self.rows[i][1] for i in members))[:16]
+                     for name, members in self.categories.items()}
+        self.total = len(self.rows) if total is None else total
+        self.version = text_hash(rules.fingerprint, str(self.total), *tagged)[:16]
+        # The category index: names in order and their members, through their tags
+        self.index_tag = text_hash(*(f"{name}\0{tag}" for name, tag in self.tags.items()))[:16]
+        self.loaded = time.time()
+
+    @classmethod
+    def load(cls, csv_file, rules):
+        deduper = Deduper()
+        pairs = list(home.read_catalog(csv_file, rules, dedupe=deduper))
+        if is_catalog(csv_file):
+            total = open_catalog(csv_file, rules).source_rows
+        else:
+            total = len(pairs) + deduper.merged
+        return cls(pairs, rules, total)
+
+
+def _etag_matches(header, etag):
+    if not header:
+        return False
+    tags = [tag.strip() for tag in header.split(",")]
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
+
+
+class SwipeApp:
+    """ASGI app serving the swipe site from a catalog held in memory
+
+    Routes:
+        / and /index.html          the swipe page with every card
+        /home.html                 the homepage
+        /category/<name>           a swipe page of one category's cards
+        /api/cards?page=&size=     the catalog as JSON pages
+        /api/categories            {category: row count}
+        /api/categories/<name>     one category as JSON pages
+        /-/stats                   catalog version, reloads, cache hit rate
+
+    Every response carries an ETag and Cache-Control: no-cache, and a
+    matching If-None-Match gets 304. Card bodies and category tiles are
+    rendered once and kept in an LRU cache by row hash, as are whole
+    JSON pages and category views by ETag, so they survive reloads that
+    do not touch them. With watch, a thread reloads the catalog when the
+    CSV or rules change and swaps it in with a single assignment;
+    requests in flight finish on the catalog they started with.
+    """
+
+    def __init__(self, csv_file="videos.csv", rules_file=None, poster=home.DEFAULT_POSTER,
+                 cache_size=CACHE_SIZE, watch=True):
+        self.csv_file = csv_file
+        self.rules_file = rules_file or DEFAULT_RULES
+        self.rules = load_rules(self.rules_file)
+        self.poster = poster
+        self.cache = LRUCache(cache_size)
+        self.catalog = LoadedCatalog.load(csv_file, self.rules)
+        self.reloads = 0
+        self.watch = watch
+        self._watcher = None
+        self._stop = threading.Event()
+        self.homepage = home.render_homepage(poster).encode("utf-8")
+        self.home_tag = f'"{text_hash(self.homepage.decode("utf-8"))[:16]}"'
+
+    def reload(self):
+        """Load the catalog again and swap it in; returns the new LoadedCatalog"""
+        rules = load_rules(self.rules_file)
+        catalog = LoadedCatalog.load(self.csv_file, rules)
+        self.rules, self.catalog = rules, catalog
+        self.reloads += 1
+        return catalog
+
+    def _watch(self):
+        from watch import changes, make_watcher
+
+        watcher = make_watcher([self.csv_file, self.rules_file])
+        try:
+            for changed, _ in changes(watcher):
+                if self._stop.is_set():
+                    return
+                start = time.perf_counter()
+                try:
+                    catalog = self.reload()
+                except Exception as e:
+                    # Keep serving the previous catalog until the file is fixed
+                    print(f"❌ Reload failed after change to {', '.join(sorted(changed))}: {e!r}")
+                    continue
+                print(f"✅ Catalog reloaded: {len(catalog.rows)} rows, version {catalog.version} "
+                      f"({(time.perf_counter() - start) * 1000:.0f} ms)")
+        finally:
+            watcher.close()
+
+    # Rendering
+
+    def _body(self, entry, h, priority):
+        return self.cache.get(("card", h, priority), lambda: home.render_card_body(entry, None, priority))
+
+    def _thumb(self, entry, h):
+        return self.cache.get(("thumb", h), lambda: home.render_thumb(entry))
+
+    def _index(self, catalog):
+        total = catalog.total
+        yield home.SWIPE_HEAD
+        for i, (entry, h) in enumerate(catalog.rows):
+            yield home.render_card_open(i, total)
+            yield self._body(entry, h, card_priority(i))
+        yield home.CATEGORIES_HEAD
+        for name, members in catalog.categories.items():
+            yield home.render_category_head(name)
+            for i in members:
+                yield self._thumb(*catalog.rows[i])
+            yield home.CATEGORY_FOOT
+        yield home.SWIPE_TAIL
+        yield home.PAGE_END
+
+    def _category_page(self, catalog, name):
+        members = catalog.categories[name]
+        parts = [home.SWIPE_HEAD]
+        for k, i in enumerate(members):
+            entry, h = catalog.rows[i]
+            parts.append(home.render_card_open(k, len(members), 0))
+            parts.append(self._body(entry, h, card_priority(k)))
+        parts.append(home.SWIPE.overlays(home.LABELS) + home.SWIPE.script() + home.PAGE_END)
+        return "".join(parts).encode("utf-8")
+
+    def _json_page(self, rows, query, path):
+        try:
+            page = max(0, int(query.get("page", ["0"])[0]))
+            size = min(MAX_PAGE_SIZE, max(1, int(query.get("size", [str(SHARD_SIZE)])[0])))
+        except ValueError:
+            raise BadRequest("page and size must be integers") from None
+        chunk = rows[page * size:(page + 1) * size]
+        more = (page + 1) * size < len(rows)
+        return {"total": len(rows), "page": page, "size": size, "cards": [list(entry) for entry, _ in chunk],
+                "next": f"{path}?page={page + 1}&size={size}" if more else None}, chunk
+
+    # ASGI
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            return
+        method = scope["method"]
+        if method not in ("GET", "HEAD"):
+            await self._send(send, 405, b"", {"allow": "GET, HEAD"})
+            return
+        headers = {name.decode("latin-1"): value.decode("latin-1") for name, value in scope["headers"]}
+        catalog = self.catalog
+        try:
+            route = self._route(catalog, scope["path"], parse_qs(scope["query_string"].decode("latin-1")))
+        except BadRequest as e:
+            await self._send(send, 400, f"{e}\n".encode("utf-8"), {"content-type": "text/plain; charset=utf-8"})
+            return
+        if route is None:
+            await self._send(send, 404, b"not found\n", {"content-type": "text/plain; charset=utf-8"})
+            return
+        etag, content_type, body = route
+        response_headers = {"etag": etag, "cache-control": REVALIDATE}
+        if _etag_matches(headers.get("if-none-match"), etag):
+            await self._send(send, 304, b"", response_headers)
+            return
+        response_headers["content-type"] = content_type
+        await self._send(send, 200, None if method == "HEAD" else body(), response_headers)
+
+    def _route(self, catalog, path, query):
+        """(etag, content type, body thunk) for a path, None if there is nothing there"""
+        html = "text/html; charset=utf-8"
+        if path in ("/", "/index.html"):
+            return f'"{catalog.version}"', html, lambda: self._index(catalog)
+        if path == "/home.html":
+            return self.home_tag, html, lambda: self.homepage
+        if path.startswith("/category/"):
+            # ASGI paths are already percent-decoded
+            name = path[len("/category/"):]
+            if name not in catalog.categories:
+                return None
+            etag = f'"{catalog.tags[name]}"'
+            return etag, html, lambda: self.cache.get(("page", etag), lambda: self._category_page(catalog, name))
+        if path == "/api/categories":
+            counts = {name: len(members) for name, members in catalog.categories.items()}
+            return (f'"{catalog.index_tag}"', "application/json",
+                    lambda: json.dumps(counts, ensure_ascii=False).encode("utf-8"))
+        if path == "/api/cards" or path.startswith("/api/categories/"):
+            if path == "/api/cards":
+                rows = catalog.rows
+            else:
+                name = path[len("/api/categories/"):]
+                if name not in catalog.categories:
+                    return None
+                rows = [catalog.rows[i] for i in catalog.categories[name]]
+            data, chunk = self._json_page(rows, query, quote(path))
+            etag = f'"{text_hash(json.dumps(data["next"]), str(len(rows)), *(h for _, h in chunk))[:16]}"'
+            return etag, "application/json", lambda: self.cache.get(
+                ("json", etag), lambda: json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+        if path == "/-/stats":
+            stats = {"version": catalog.version, "rows": len(catalog.rows), "reloads": self.reloads,
+                     "loaded": catalog.loaded, "cache": {"size": len(self.cache.items),
+                                                          "hits": self.cache.hits, "misses": self.cache.misses}}
+            return f'"{time.time_ns()}"', "application/json", lambda: json.dumps(stats).encode("utf-8")
+        return None
+
+    async def _send(self, send, status, body, headers):
+        """Send a response; body is bytes or an iterable of str fragments, sent in CHUNK_SIZE pieces"""
+        raw = [(name.encode("latin-1"), value.encode("latin-1")) for name, value in headers.items()]
+        if isinstance(body, bytes) or body is None:
+            if body is not None:
+                raw.append((b"content-length", str(len(body)).encode("latin-1")))
+            await send({"type": "http.response.start", "status": status, "headers": raw})
+            await send({"type": "http.response.body", "body": body or b""})
+            return
+        await send({"type": "http.response.start", "status": status, "headers": raw})
+        buffer, buffered = [], 0
+        for fragment in body:
+            buffer.append(fragment)
+            buffered += len(fragment)
+            if buffered >= CHUNK_SIZE:
+                await send({"type": "http.response.body", "body": "".join(buffer).encode("utf-8"),
+                            "more_body": True})
+                buffer, buffered = [], 0
+        await send({"type": "http.response.body", "body": "".join(buffer).encode("utf-8")})
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                if self.watch and self._watcher is None:
+                    self._watcher = threading.Thread(target=self._watch, name="catalog-watch", daemon=True)
+                    self._watcher.start()
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                self._stop.set()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the swipe site from an in-memory catalog (ASGI)")
+    parser.add_argument("--csv", default="videos.csv", help="input catalog (default: %(default)s)")
+    parser.add_argument("--rules", metavar="FILE", help="categories config (default: categories.json)")
+    parser.add_argument("--poster", default=home.DEFAULT_POSTER, help="homepage poster image URL")
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on (default: %(default)s)")
+    parser.add_argument("--port", type=int, default=8000, help="port to listen on (default: %(default)s)")
+    parser.add_argument("--cache-size", type=int, default=CACHE_SIZE,
+                        help="rendered fragments kept in memory (default: %(default)s)")
+    parser.add_argument("--no-watch", action="store_true", help="do not reload the catalog when it changes")
+    args = parser.parse_args(argv)
+    try:
+        import uvicorn
+    except ImportError:
+        raise ImportError("server mode needs an ASGI server: pip install uvicorn") from None
+
+    start = time.perf_counter()
+    app = SwipeApp(args.csv, args.rules, args.poster, args.cache_size, not args.no_watch)
+    print(f"✅ Catalog loaded: {len(app.catalog.rows)} rows in {(time.perf_counter() - start) * 1000:.0f} ms, "
+          f"serving http://{args.host}:{args.port}/")
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+import glob
+import hashlib
+import json
+import os
+
+SHARD_DIR = "shards"
+SHARD_SIZE = 50
+
+
+def _shard_rows(entries, shard_size):
+    rows = []
+    for title, url, thumb, is_youtube in entries:
+        rows.append([title, url, thumb, is_youtube])
+        if len(rows) == shard_size:
+            yield rows
+            rows = []
+    if rows:
+        yield rows
+
+
+def write_shards(entries, output_dir, shard_size=SHARD_SIZE):
+    """Write entries as a chain of content-hashed JSON shards
+
+    Each shard is {"next": <file name or null>, "cards": [[title, url, thumb,
+    is_youtube], ...]}, so the page only needs the first file name and the
+    shard list never has to be shipped up front. Because a shard's name
+    covers the name of its successor, shards are staged in a first pass and
+    hashed back to front in a second; only one shard is in memory at a time.
+
+    Returns (first shard path relative to output_dir, number of entries).
+    """
+    shard_dir = os.path.join(output_dir, SHARD_DIR)
+    os.makedirs(shard_dir, exist_ok=True)
+
+    staged = []
+    total = 0
+    for n, rows in enumerate(_shard_rows(entries, shard_size)):
+        path = os.path.join(shard_dir, f".staged-{n}.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(rows, f, ensure_ascii=False, separators=(",", ":"))
+        staged.append(path)
+        total += len(rows)
+
+    keep = set()
+    next_name = None
+    for path in reversed(staged):
+        with open(path, "r", encoding="utf-8") as f:
+            cards = f.read()
+        content = f'{{"next":{json.dumps(next_name)},"cards":{cards}}}'
+        name = f"cards.{hashlib.blake2b(content.encode('utf-8'), digest_size=8).hexdigest()}.json"
+        with open(os.path.join(shard_dir, name), "w", encoding="utf-8") as f:
+            f.write(content)
+        os.remove(path)
+        keep.add(name)
+        next_name = name
+
+    # Drop shards left behind by earlier builds
+    for stale in glob.glob(os.path.join(shard_dir, "cards.*.json")):
+        if os.path.basename(stale) not in keep:
+            os.remove(stale)
+
+    first = f"{SHARD_DIR}/{next_name}" if next_name else None
+    return first, total
@@ -0,0 +1,112 @@
+import contextlib
+import csv
+import os
+import pickle
+import tempfile
+
+CHUNK_SIZE = 64 * 1024
+# The card stack's z-index counts down from the row count. Rows streamed
+# from a pipe have no count up front, so they count down from a ceiling
+# instead: high enough for any catalog, and below the swipe overlays
+# (2147482000) and the search box (2147483000) that must show over cards.
+STREAM_TOTAL = 2_000_000_000
+
+
+def write_chunks(fragments, output_file, chunk_size=CHUNK_SIZE):
+    """Write HTML fragments to output_file in chunks as they are produced
+
+    output_file may also be an open text stream, e.g. sys.stdout, which
+    is left open.
+    """
+    written = 0
+    buffer = []
+    buffered = 0
+    to_file = isinstance(output_file, (str, os.PathLike))
+    with open(output_file, "w", encoding="utf-8") if to_file else contextlib.nullcontext(output_file) as f:
+        for fragment in fragments:
+            buffer.append(fragment)
+            buffered += len(fragment)
+            if buffered >= chunk_size:
+                f.write("".join(buffer))
+                written += buffered
+                buffer.clear()
+                buffered = 0
+        if buffer:
+            f.write("".join(buffer))
+            written += buffered
+    return written
+
+
+def count_rows(csv_file):
+    """Count the data rows of a CSV file without keeping them in memory"""
+    with open(csv_file, "r", encoding="utf-8") as file:
+        return sum(1 for _ in csv.DictReader(file))
+
+
+class CategorySpool:
+    """Spool categorized entries to temporary files so memory stays flat
+
+    Entries are appended while the swipe cards stream out and read back
+    lazily when the categories card is rendered. They are pickled in
+    batches of batch_size, which bounds memory per category. Categories
+    not in names are added on first use, after the configured ones.
+    """
+
+    def __init__(self, names, batch_size=1024, max_size=CHUNK_SIZE):
+        self.batch_size = batch_size
+        self.max_size = max_size
+        self.files = {}
+        self.pending = {}
+        for name in names:
+            self._open(name)
+
+    def _open(self, name):
+        self.files[name] = tempfile.SpooledTemporaryFile(max_size=self.max_size)
+        self.pending[name] = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        for f in self.files.values():
+            f.close()
+
+    def add(self, name, entry):
+        if name not in self.pending:
+            self._open(name)
+        pending = self.pending[name]
+        pending.append(entry)
+        if len(pending) >= self.batch_size:
+            self.flush(name)
+
+    def flush(self, name):
+        pending = self.pending[name]
+        if pending:
+            pickle.dump(pending, self.files[name], pickle.HIGHEST_PROTOCOL)
+            pending.clear()
+
+    def tee(self, catalog):
+        """Yield the entries of (entry, categories) pairs while spooling each
+        one under every category it belongs to"""
+        for entry, names in catalog:
+            for name in names:
+                self.add(name, entry)
+            yield entry
+
+    def entries(self, name):
+        self.flush(name)
+        f = self.files[name]
+        f.seek(0)
+        while True:
+            try:
+                batch = pickle.load(f)
+            except EOFError:
+                return
+            yield from batch
+
+    def categories(self):
+        """Lazy {category: entries} view in the same shape main() used to build"""
+        return {name: self.entries(name) for name in self.files}
@@ -1,242 +1,39 @@
+import argparse
+import contextlib
 import csv
-import re
+import sys
 
-def extract_video_id(url: str) -> str:
-    """Extract the YouTube video ID from different URL formats"""
-    match = re.search(r"youtu\.be/([A-Za-z0-9_-]{11})", url)
-    if match:
-        return match.group(1)
-    match = re.search(r"v=([A-Za-z0-9_-]{11})", url)
-    if match:
-        return match.group(1)
-    match = re.search(r"embed/([A-Za-z0-9_-]{11})", url)
-    if match:
-        return match.group(1)
-    return None
+from renderer import load_template
+from streaming import STREAM_TOTAL, count_rows, write_chunks
+from video_id import extract_video_id
 
 
-def generate_html(videos, output_file="index.html"):
-    """Generate Tinder-like swipe + Reels-like scroll site without blur background"""
-    html = """
-    <!DOCTYPE html>
-    <html lang="en">
-    <head>
-        <meta charset="UTF-8">
-        <meta name="viewport" content="width=device-width, initial-scale=1.0">
-        <title>YouTube Swipe Website</title>
-        <style>
-            body {
-                margin: 0;
-                height: 100vh;
-                display: flex;
-                justify-content: center;
-                align-items: center;
-                background: #111; /* simple dark background */
-                font-family: Arial, sans-serif;
-                overflow: hidden;
-                position: relative;
-            }
-            .phone {
-                width: 360px;
-                height: 640px; /* 9:16 */
-                background: #222;
-                border-radius: 20px;
-                overflow: hidden;
-                position: relative;
-                box-shadow: 0 6px 20px rgba(0,0,0,0.5);
-            }
-            .card {
-                position: absolute;
-                width: 100%;
-                height: 100%;
-                display: flex;
-                flex-direction: column;
-                justify-content: space-between;
-                align-items: center;
-                padding: 10px;
-                box-sizing: border-box;
-                transition: transform 0.4s ease, opacity 0.4s ease;
-            }
-            img {
-                width: 100%;
-                max-height: 70%;
-                border-radius: 12px;
-                object-fit: cover;
-            }
-            h2 {
-                color: white;
-                margin: 10px 0;
-                text-align: center;
-                font-size: 16px;
-            }
-            .watch-now, .visit-now {
-                width: 90%;
-                text-align: center;
-                padding: 12px;
-                margin-bottom: 20px;
-                border-radius: 10px;
-                font-size: 18px;
-                font-weight: bold;
-                text-decoration: none;
-                transition: background 0.3s;
-                display: inline-block;
-            }
-            .watch-now {
-                background: #e50914;
-                color: white;
-            }
-            .watch-now:hover {
-                background: #b20710;
-            }
-            .visit-now {
-                background: #007bff;
-                color: white;
-            }
-            .visit-now:hover {
-                background: #0056b3;
-            }
-            /* Animated overlays */
-            .overlay {
-                position: fixed;
-                top: 40%;
-                left: 50%;
-                transform: translate(-50%, -50%) scale(0.8);
-                font-size: 42px;
-                font-weight: bold;
-                opacity: 0;
-                pointer-events: none;
-                transition: opacity 0.5s ease, transform 0.5s ease;
-                z-index: 9999;
-                text-align: center;
-                padding: 40px 60px;
-                border-radius: 20px;
-                background: rgba(0, 0, 0, 0.7); /* simple semi-transparent background */
-            }
-            .overlay.show {
-                opacity: 1;
-                transform: translate(-50%, -50%) scale(1);
-            }
-            .overlay.interested {
-                color: #00ff88;
-                text-shadow: 0 0 20px #00ff88;
-            }
-            .overlay.not {
-                color: #ff4444;
-                text-shadow: 0 0 20px #ff4444;
-            }
-        </style>
-    </head>
-    <body>
-        <div class="phone" id="phone">
-    """
-    for i, (title, url, thumb, is_youtube) in enumerate(videos):
-        button_class = "watch-now" if is_youtube else "visit-now"
-        button_text = "▶ Watch Now" if is_youtube else "🌐 Visit Now"
-        html += f"""
-            <div class="card" style="z-index:{len(videos)-i}">
-                <img src="{thumb}" alt="{title}">
-                <h2>{title}</h2>
-                <a href="{url}" target="_blank" class="{button_class}">{button_text}</a>
-            </div>
-        """
-    # Global overlay elements
-    html += """
-        </div>
-        <div class="overlay interested" id="interestedOverlay">INTERESTED</div>
-        <div class="overlay not" id="notOverlay">NOT INTERESTED</div>
-        <script>
-            let cards = document.querySelectorAll('.card');
-            let current = 0;
-            const interestedOverlay = document.getElementById('interestedOverlay');
-            const notOverlay = document.getElementById('notOverlay');
-
-            function showCard(index) {
-                cards.forEach((card, i) => {
-                    if (i === index) {
-                        card.style.transform = 'translateY(0)';
-                        card.style.opacity = '1';
-                        card.style.pointerEvents = "auto";
-                    } else if (i < index) {
-                        card.style.opacity = '0';
-                        card.style.pointerEvents = "none";
-                    } else {
-                        card.style.transform = 'translateY(100%)';
-                        card.style.opacity = '0';
-                        card.style.pointerEvents = "none";
-                    }
-                });
-            }
+# The original standalone page: no categories card, its own overlay labels.
+# It shares the template of the main site; only the options differ.
+PAGE_TITLE = "YouTube Swipe Website"
+LABELS = ("INTERESTED", "NOT INTERESTED")
 
-            function swipeCard(action) {
-                if (current >= cards.length) return;
-                let card = cards[current];
-                if (action === 'right') {
-                    interestedOverlay.classList.add('show');
-                    card.style.transform = 'translateX(100%) rotate(15deg)';
-                } else if (action === 'left') {
-                    notOverlay.classList.add('show');
-                    card.style.transform = 'translateX(-100%) rotate(-15deg)';
-                } else if (action === 'up') {
-                    card.style.transform = 'translateY(-100%)';
-                }
-                setTimeout(() => {
-                    if (action === 'right') interestedOverlay.classList.remove('show');
-                    if (action === 'left') notOverlay.classList.remove('show');
-                    current++;
-                    if (current < cards.length) {
-                        showCard(current);
-                    }
-                }, 500); // overlay now stays for 0.5 seconds
-            }
 
-            showCard(current);
+def iter_html(videos, total=None):
+    """Yield the page as HTML fragments; pass total when videos has no len()"""
+    if total is None:
+        total = len(videos)
+    return load_template("swipe.html").render(videos, total, labels=LABELS, page_title=PAGE_TITLE)
 
-            // Keyboard control
-            document.addEventListener('keydown', (e) => {
-                if (e.key === 'ArrowRight') {
-                    swipeCard('right');
-                } else if (e.key === 'ArrowLeft') {
-                    swipeCard('left');
-                } else if (e.key === 'ArrowUp') {
-                    swipeCard('up'); // skip like reels
-                }
-            });
 
-            // Touch swipe
-            let startX = 0, startY = 0;
-            document.getElementById('phone').addEventListener('touchstart', e => {
-                startX = e.touches[0].clientX;
-                startY = e.touches[0].clientY;
-            });
-            document.getElementById('phone').addEventListener('touchend', e => {
-                let endX = e.changedTouches[0].clientX;
-                let endY = e.changedTouches[0].clientY;
-                let diffX = endX - startX;
-                let diffY = startY - endY;
-                if (Math.abs(diffX) > Math.abs(diffY)) {
-                    if (diffX > 50) {
-                        swipeCard('right');
-                    } else if (diffX < -50) {
-                        swipeCard('left');
-                    }
-                } else {
-                    if (diffY > 50) {
-                        swipeCard('up'); // reels-like skip
-                    }
-                }
-            });
-        </script>
-    </body>
-    </html>
-    """
-    with open(output_file, "w", encoding="utf-8") as f:
-        f.write(html)
+def generate_html(videos, output_file="index.html", total=None):
+    """Generate Tinder-like swipe + Reels-like scroll site without blur background"""
+    write_chunks(iter_html(videos, total), output_file)
     print(f"✅ Website generated: {output_file}")
 
 
-def main():
-    videos = []
-    with open("videos.csv", "r", encoding="utf-8") as file:
+def read_videos(csv_file="videos.csv"):
+    """Yield (title, url, thumb, is_youtube) entries one CSV row at a time
+
+    csv_file may also be an open text stream, e.g. sys.stdin.
+    """
+    opened = isinstance(csv_file, str)
+    with open(csv_file, "r", encoding="utf-8") if opened else contextlib.nullcontext(csv_file) as file:
         reader = csv.DictReader(file)
         for row in reader:
             title = row["title"].strip()
@@ -244,12 +41,30 @@ def main():
             video_id = extract_video_id(url)
             if video_id:
                 thumb = f"https://img.youtube.com/vi/{video_id}/hqdefault.jpg"
-                videos.append((title, url, thumb, True))  # YouTube
+                yield (title, url, thumb, True)  # YouTube
             else:
                 # Use a placeholder thumbnail for non-YouTube links
                 thumb = "https://via.placeholder.com/360x200.png?text=Website+Preview"
-                videos.append((title, url, thumb, False))  # Non-YouTube
-    generate_html(videos)
+                yield (title, url, thumb, False)  # Non-YouTube
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate the standalone swipe page from a CSV of videos")
+    parser.add_argument("csv", nargs="?", default="videos.csv", help="input CSV, - for stdin (default: %(default)s)")
+    parser.add_argument("-o", "--output", default="index.html",
+                        help="page to write, - for stdout (default: %(default)s)")
+    args = parser.parse_args(argv)
+    if args.csv == "-":
+        # Rows from a pipe are rendered as they arrive, with no count up front
+        sys.stdin.reconfigure(encoding="utf-8", newline="")
+        videos, total = read_videos(sys.stdin), STREAM_TOTAL
+    else:
+        videos, total = read_videos(args.csv), count_rows(args.csv)
+    if args.output == "-":
+        sys.stdout.reconfigure(encoding="utf-8")
+        write_chunks(iter_html(videos, total), sys.stdout)
+    else:
+        generate_html(videos, args.output, total)
 
 
 if __name__ == "__main__":
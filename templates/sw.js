@@ -0,0 +1,120 @@
+{# The service worker offline.py writes next to the pages: the precached
+   app shell, refreshed entry by entry as content hashes change, pages
+   stale-while-revalidate and images cache-first under an LRU limit. #}
+{% from json import dumps %}
+{% args version, precache, pages, max_images %}
+// Generated by offline.py, build {{ version }}
+const PRECACHE = {{ dumps(precache, indent=1)|safe }};
+const PAGES = new Set({{ dumps(pages)|safe }});
+const MAX_IMAGES = {{ max_images|safe }};
+const FETCH_CONCURRENCY = 6;
+
+// Cache storage is per origin, so every site built into its own
+// directory keeps its own caches
+const SCOPE = self.registration.scope;
+const SHELL_CACHE = `swipe-shell ${SCOPE}`;
+const IMAGE_CACHE = `swipe-images ${SCOPE}`;
+// The hashes of the copies in SHELL_CACHE, stored there as one more entry
+const HASHES = new URL('precache-hashes.json', SCOPE).href;
+
+const absolute = key => new URL(key, SCOPE).href;
+const KEYS = new Map(Object.keys(PRECACHE).map(key => [absolute(key), key]));
+
+async function refetch(cache, keys) {
+  const queue = keys.slice();
+  async function worker() {
+    while (queue.length) {
+      const url = absolute(queue.shift());
+      const sameOrigin = new URL(url).origin === location.origin;
+      const mode = sameOrigin ? 'same-origin' : 'no-cors';
+      // Skip the HTTP cache, which may still hold the previous build
+      const response = await fetch(new Request(url, { cache: 'reload', mode }));
+      if (!response.ok && response.type !== 'opaque') throw new Error(`${url}: HTTP ${response.status}`);
+      await cache.put(url, response);
+    }
+  }
+  await Promise.all(Array.from({ length: FETCH_CONCURRENCY }, worker));
+}
+
+self.addEventListener('install', event => {
+  event.waitUntil((async () => {
+    const cache = await caches.open(SHELL_CACHE);
+    const stored = await cache.match(HASHES);
+    const previous = stored ? await stored.json() : {};
+    const changed = [];
+    for (const [key, hash] of Object.entries(PRECACHE)) {
+      if (previous[key] !== hash || !(await cache.match(absolute(key)))) changed.push(key);
+    }
+    // Only the entries whose hash changed are fetched again
+    await refetch(cache, changed);
+    const hashes = new Response(JSON.stringify(PRECACHE), { headers: { 'Content-Type': 'application/json' } });
+    await cache.put(HASHES, hashes);
+    await self.skipWaiting();
+  })());
+});
+
+self.addEventListener('activate', event => {
+  event.waitUntil((async () => {
+    const cache = await caches.open(SHELL_CACHE);
+    for (const request of await cache.keys()) {
+      if (request.url !== HASHES && !KEYS.has(request.url)) await cache.delete(request);
+    }
+    await self.clients.claim();
+  })());
+});
+
+function shellKey(request) {
+  const url = new URL(request.url);
+  url.search = url.hash = '';
+  if (request.mode === 'navigate' && url.href === SCOPE) return 'index.html';
+  return KEYS.get(url.href);
+}
+
+async function staleWhileRevalidate(event, key) {
+  const cache = await caches.open(SHELL_CACHE);
+  const cached = await cache.match(absolute(key));
+  const network = fetch(event.request).then(response => {
+    if (response.ok) return cache.put(absolute(key), response.clone()).then(() => response);
+    return response;
+  });
+  if (!cached) return network;
+  event.waitUntil(network.catch(() => {}));
+  return cached;
+}
+
+async function cacheFirst(request, key) {
+  const cache = await caches.open(SHELL_CACHE);
+  return (await cache.match(absolute(key))) || fetch(request);
+}
+
+async function trimImages(cache) {
+  // keys() lists entries in insertion order, and hits are re-inserted,
+  // so the least recently used come first
+  const keys = await cache.keys();
+  for (const request of keys.slice(0, Math.max(0, keys.length - MAX_IMAGES))) await cache.delete(request);
+}
+
+async function cachedImage(event) {
+  const cache = await caches.open(IMAGE_CACHE);
+  const cached = await cache.match(event.request);
+  if (cached) {
+    const copy = cached.clone();
+    event.waitUntil(cache.delete(event.request).then(() => cache.put(event.request, copy)));
+    return cached;
+  }
+  const response = await fetch(event.request);
+  // Thumbnails from other hosts are opaque, which is still worth keeping
+  if (response.ok || response.type === 'opaque') {
+    event.waitUntil(cache.put(event.request, response.clone()).then(() => trimImages(cache)));
+  }
+  return response;
+}
+
+self.addEventListener('fetch', event => {
+  const request = event.request;
+  if (request.method !== 'GET') return;
+  const key = shellKey(request);
+  if (key && PAGES.has(key)) event.respondWith(staleWhileRevalidate(event, key));
+  else if (key) event.respondWith(cacheFirst(request, key));
+  else if (request.destination === 'image') event.respondWith(cachedImage(event));
+});
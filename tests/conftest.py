@@ -0,0 +1,40 @@
+import csv
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+
+def write_csv(path, rows, header=("title", "url")):
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        writer.writerows(rows)
+    return str(path)
+
+
+def catalog_rows(n=60):
+    """Rows for every category, with markup in titles, YouTube and plain links and repeats"""
+    rows = []
+    for i in range(n):
+        kind = i % 4
+        if kind == 0:
+            rows.append((f"MV Song {i} <live> & more", f"https://youtu.be/vid{i:08d}?si=tracking{i}"))
+        elif kind == 1:
+            rows.append((f"M-Trailer {i} \"final\"", f"https://www.youtube.com/watch?v=mov{i:08d}"))
+        elif kind == 2:
+            rows.append((f"OG merch drop {i}", f"https://shop.example.com/item/{i}?utm_source=x"))
+        else:
+            rows.append((f"Interview {i}", f"https://news.example.com/{i}"))
+    # The same videos and pages again, through other URL forms
+    rows.append(("MV Song 0 again", "https://www.youtube.com/watch?v=vid00000000&feature=share"))
+    rows.append(("OG merch drop 2 again", "https://shop.example.com/item/2"))
+    return rows
+
+
+@pytest.fixture
+def videos_csv(tmp_path):
+    return write_csv(tmp_path / "videos.csv", catalog_rows())
@@ -0,0 +1,52 @@
+import os
+
+import pytest
+
+import home
+from catalog import Catalog, compile_catalog, is_catalog, open_catalog
+from rules import Rules
+
+
+def site_files(site):
+    """{relative path: bytes} of a built site, the incremental build's own records left out"""
+    files = {}
+    for root, _, names in os.walk(site):
+        for name in names:
+            if not name.startswith(".build-"):
+                path = os.path.join(root, name)
+                with open(path, "rb") as f:
+                    files[os.path.relpath(path, site)] = f.read()
+    return files
+
+
+def test_catalog_holds_what_the_csv_reads(videos_csv):
+    path = compile_catalog(videos_csv)
+    assert is_catalog(path) and not is_catalog(videos_csv)
+    catalog = open_catalog(path)
+    expected = list(home.read_catalog(videos_csv))
+    assert list(catalog.pairs()) == expected
+    assert [catalog[i] for i in range(len(catalog))] == [entry for entry, _ in expected]
+    assert {name: list(rows) for name, rows in catalog.categories().items() if rows} == {
+        name: [entry for entry, names in expected if name in names]
+        for name in dict.fromkeys(n for _, names in expected for n in names)}
+    with pytest.raises(IndexError):
+        catalog[len(catalog)]
+
+
+def test_source_rows_count_merged_duplicates(videos_csv):
+    catalog = Catalog(compile_catalog(videos_csv))
+    assert catalog.source_rows == len(catalog) + 2
+
+
+@pytest.mark.parametrize("options", [{}, {"mode": "virtual"}, {"incremental": True}])
+def test_catalog_build_matches_csv_build(videos_csv, tmp_path, options):
+    path = compile_catalog(videos_csv)
+    home.build_site(videos_csv, str(tmp_path / "csv"), **options)
+    home.build_site(path, str(tmp_path / "catalog"), **options)
+    assert site_files(tmp_path / "csv") == site_files(tmp_path / "catalog")
+
+
+def test_catalog_compiled_with_other_rules_is_refused(videos_csv):
+    path = compile_catalog(videos_csv)
+    with pytest.raises(ValueError, match="other category rules"):
+        open_catalog(path, Rules({"categories": ["All"]}, fingerprint="other"))
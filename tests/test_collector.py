@@ -0,0 +1,115 @@
+import asyncio
+import csv
+import json
+import os
+
+import pytest
+
+from collector import Collector, EventLog, RollingCounts, parse_batch
+from rank import LOG_FIELDS
+
+
+def read_log(path):
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        return list(csv.reader(f))
+
+
+def test_parse_batch():
+    events = [["https://e.com/a", "right", 1], ["https://e.com/b", "up", 2]]
+    body = json.dumps({"segment": "s1", "events": events})
+    assert parse_batch(body, 100.0) == [("https://e.com/a", 1, 0, 0, 100.0, "s1"),
+                                        ("https://e.com/b", 0, 0, 1, 100.0, "s1")]
+
+
+@pytest.mark.parametrize("body", [
+    "[]", "{}", '{"events": [["u"]]}', '{"events": [["", "right"]]}', '{"events": [["u", "down"]]}',
+    '{"events": [[1, "left"]]}', "not json",
+])
+def test_parse_batch_rejects_bad_batches(body):
+    with pytest.raises(ValueError):
+        parse_batch(body, 0.0)
+
+
+def test_event_log_rotates_past_max_bytes(tmp_path):
+    path = str(tmp_path / "swipes.csv")
+    log = EventLog(path, max_bytes=200, fsync=False)
+    rows = [(f"https://e.com/{i:03d}", 1, 0, 0, 1.5, "") for i in range(12)]
+    for i in range(0, 12, 3):
+        log.write(rows[i:i + 3])
+    log.close()
+    assert log.rotated
+    files = log.rotated + [path]
+    written = []
+    for name in files:
+        assert os.path.getsize(name) <= 200
+        header, *lines = read_log(name)
+        assert header == list(LOG_FIELDS)
+        written += lines
+    assert [line[0] for line in written] == [row[0] for row in rows]
+
+
+def test_event_log_appends_to_an_existing_log(tmp_path):
+    path = str(tmp_path / "swipes.csv")
+    for url in ("https://e.com/a", "https://e.com/b"):
+        log = EventLog(path, fsync=False)
+        log.write([(url, 0, 1, 0, 2.0, "s")])
+        log.close()
+    assert read_log(path) == [list(LOG_FIELDS), ["https://e.com/a", "0", "1", "0", "2.0", "s"],
+                              ["https://e.com/b", "0", "1", "0", "2.0", "s"]]
+
+
+def test_rolling_counts_drop_buckets_past_the_window():
+    counts = RollingCounts(window=120, bucket=60)
+    counts.add([("u", 1, 0, 0, 10.0, "")], now=10)
+    counts.add([("u", 0, 1, 0, 70.0, ""), ("v", 1, 0, 0, 70.0, "")], now=70)
+    assert counts.totals(now=100) == {("", "u"): [1, 1, 0, 70.0], ("", "v"): [1, 0, 0, 70.0]}
+    assert counts.totals(now=150) == {("", "u"): [0, 1, 0, 70.0], ("", "v"): [1, 0, 0, 70.0]}
+
+
+def test_rolling_counts_window_shorter_than_a_bucket():
+    counts = RollingCounts(window=1, bucket=60)
+    counts.add([("u", 1, 0, 0, 5.0, "")], now=5)
+    assert counts.totals(now=5.5) == {("", "u"): [1, 0, 0, 5.0]}
+    assert counts.totals(now=7) == {}
+
+
+async def request(port, method, path, body=b"", headers=""):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: x\r\nContent-Length: {len(body)}\r\n{headers}"
+                 f"Connection: close\r\n\r\n".encode("latin-1") + body)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, payload = response.partition(b"\r\n\r\n")
+    return int(head.split()[1]), json.loads(payload) if payload else None
+
+
+def test_beacons_are_logged_counted_and_acknowledged(tmp_path):
+    path = str(tmp_path / "swipes.csv")
+
+    async def run():
+        collector = Collector(EventLog(path, fsync=False))
+        server = await asyncio.start_server(collector.handle, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            events = [["https://e.com/a", "right", 1], ["https://e.com/b", "left", 2]]
+            batch = {"segment": "s", "events": events}
+            # Beacons send text/plain; every batch is on disk once acknowledged
+            statuses = await asyncio.gather(*(
+                request(port, "POST", "/events", json.dumps(batch).encode(), "Content-Type: text/plain\r\n")
+                for _ in range(5)))
+            assert [status for status, _ in statuses] == [204] * 5
+            assert len(read_log(path)) == 1 + 10
+            assert collector.commits <= 5 and collector.events == 10
+
+            status, counts = await request(port, "GET", "/counts?top=1")
+            assert status == 200
+            assert counts["items"] == [{"url": "https://e.com/a", "right": 5, "left": 0, "up": 0,
+                                        "last_seen": counts["items"][0]["last_seen"], "segment": "s"}]
+            assert (await request(port, "POST", "/events", b'{"events": 1}'))[0] == 400
+            assert (await request(port, "GET", "/events"))[0] == 405
+            assert (await request(port, "OPTIONS", "/events"))[0] == 204
+            assert (await request(port, "GET", "/nope"))[0] == 404
+        await collector.close()
+
+    asyncio.run(run())
@@ -0,0 +1,71 @@
+import pytest
+
+import home
+from conftest import write_csv
+from dedupe import BloomFilter, Deduper, canonical_url
+from video_id import extract_video_id
+
+ID = "dQw4w9WgXcQ"
+
+
+@pytest.mark.parametrize("url", [
+    f"https://youtu.be/{ID}?si=abc",
+    f"https://www.youtube.com/watch?v={ID}&feature=share",
+    f"https://m.youtube.com/watch?feature=share&v={ID}",
+    f"https://www.youtube.com/embed/{ID}",
+    f"https://youtube.com/shorts/{ID}?si=x",
+])
+def test_youtube_forms_become_one_watch_url(url):
+    assert canonical_url(url, extract_video_id(url)) == f"https://www.youtube.com/watch?v={ID}"
+
+
+def test_youtube_start_time_is_kept():
+    url = f"https://youtu.be/{ID}?si=abc&t=42"
+    assert canonical_url(url, extract_video_id(url)) == f"https://www.youtube.com/watch?v={ID}&t=42"
+
+
+def test_other_urls_lose_tracking_parameters_only():
+    assert (canonical_url("HTTPS://Shop.Example.com/Item?b=2&utm_source=x&a=1&fbclid=y#Top")
+            == "https://shop.example.com/Item?b=2&a=1#Top")
+    assert canonical_url("not a url") == "not a url"
+
+
+def pairs(*entries):
+    return [(entry, ["Others"]) for entry in entries]
+
+
+def test_first_entry_wins_and_merges_are_counted():
+    watch = f"https://www.youtube.com/watch?v={ID}"
+    deduper = Deduper()
+    kept = list(deduper.filter(pairs(("a", watch, "", True), ("b", watch + "&t=5", "", True),
+                                     ("c", "https://e.com/x", "", False), ("d", "https://e.com/x", "", False),
+                                     ("e", "https://e.com/y", "", False))))
+    assert [entry[0] for entry, _ in kept] == ["a", "c", "e"]
+    assert (deduper.by_video, deduper.by_url, deduper.merged) == (1, 1, 2)
+    assert deduper.examples == [("b", watch), ("d", "https://e.com/x")]
+    assert "Merged 2 duplicate rows (1 same video, 1 same URL)" in deduper.summary()
+
+
+def test_bloom_filter_merges_the_same_rows():
+    entries = [(str(i), f"https://e.com/{i % 700}", "", False) for i in range(1000)]
+    exact, bloom = Deduper(), Deduper(bloom_capacity=1000)
+    assert list(exact.filter(pairs(*entries))) == list(bloom.filter(pairs(*entries)))
+    assert bloom.merged == exact.merged == 300
+    assert "Bloom filter" in bloom.summary()
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(100)
+    assert not any(bloom.add(f"key{i}") for i in range(100))
+    assert all(bloom.add(f"key{i}") for i in range(100))
+
+
+def test_reading_a_catalog_merges_duplicates(tmp_path):
+    csv_file = write_csv(tmp_path / "videos.csv", [
+        ("first", f"https://youtu.be/{ID}?si=1"),
+        ("again", f"https://www.youtube.com/watch?v={ID}"),
+        ("page", "https://Example.com/p?utm_medium=mail"),
+        ("page again", "https://example.com/p"),
+    ])
+    assert [title for title, *_ in home.read_videos(csv_file)] == ["first", "page"]
+    assert len(list(home.read_videos(csv_file, dedupe=False))) == 4
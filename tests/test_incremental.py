@@ -0,0 +1,54 @@
+import os
+
+import pytest
+
+import home
+from conftest import catalog_rows, write_csv
+from incremental import MANIFEST_FILE, BuildManifest
+
+
+def read(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def assert_same_site(a, b):
+    for page in ("index.html", "home.html"):
+        assert read(os.path.join(a, page)) == read(os.path.join(b, page)), page
+
+
+def test_first_incremental_build_matches_full_build(videos_csv, tmp_path):
+    home.build_site(videos_csv, str(tmp_path / "full"))
+    home.build_site(videos_csv, str(tmp_path / "incremental"), incremental=True)
+    assert_same_site(tmp_path / "full", tmp_path / "incremental")
+
+
+def test_rebuild_after_edit_matches_full_build(tmp_path):
+    rows = catalog_rows()
+    csv_file = write_csv(tmp_path / "videos.csv", rows)
+    site = str(tmp_path / "incremental")
+    home.build_site(csv_file, site, incremental=True)
+
+    rows[5] = ("M-Trailer 5 <recut>", rows[5][1])
+    del rows[10]
+    rows.append(("MV Encore & outro", "https://youtu.be/enc00000001"))
+    write_csv(tmp_path / "videos.csv", rows)
+    home.build_site(csv_file, site, incremental=True)
+    home.build_site(csv_file, str(tmp_path / "full"))
+    assert_same_site(tmp_path / "full", site)
+
+
+def test_unchanged_rebuild_writes_nothing(videos_csv, tmp_path, capsys):
+    site = str(tmp_path / "site")
+    home.build_site(videos_csv, site, incremental=True)
+    before = os.stat(os.path.join(site, "index.html")).st_mtime_ns
+    capsys.readouterr()
+    home.build_site(videos_csv, site, incremental=True)
+    assert "unchanged" in capsys.readouterr().out
+    assert os.stat(os.path.join(site, "index.html")).st_mtime_ns == before
+    assert BuildManifest(os.path.join(site, MANIFEST_FILE)).rows
+
+
+def test_incremental_rejects_virtual_mode(videos_csv, tmp_path):
+    with pytest.raises(ValueError, match="incremental"):
+        home.build_site(videos_csv, str(tmp_path), mode="virtual", incremental=True)
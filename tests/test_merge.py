@@ -0,0 +1,76 @@
+import random
+
+import pytest
+
+from conftest import write_csv
+from merge import SourceMerger
+
+
+def sources(tmp_path, count=3, rows=200, seed=0):
+    """Source CSVs of random priorities and dates; returns paths and every row in source order"""
+    rng = random.Random(seed)
+    paths, everything = [], []
+    for s in range(count):
+        rows_of = []
+        for i in range(rows):
+            priority = rng.choice(["", "0", "1", "2.5", "-1"])
+            date = rng.choice(["", "2024-01-05", "2024-03-01", "2023-12-31"])
+            rows_of.append((f"s{s} row {i}", f"https://e.com/{s}/{i}", priority, date))
+        paths.append(write_csv(tmp_path / f"source-{s}.csv", rows_of, ("title", "url", "priority", "date")))
+        everything += rows_of
+    return paths, everything
+
+
+def expected_order(rows):
+    # Highest priority, then newest; ties in source order (sorted() is stable, reversed too)
+    by_date = sorted(rows, key=lambda row: row[3], reverse=True)
+    return sorted(by_date, key=lambda row: float(row[2] or 0), reverse=True)
+
+
+@pytest.mark.parametrize("run_rows, fan_in", [(10_000, 64), (50, 64), (7, 2)])
+def test_rows_come_out_by_priority_then_date(tmp_path, run_rows, fan_in):
+    paths, rows = sources(tmp_path)
+    merger = SourceMerger(paths, run_rows=run_rows, fan_in=fan_in, tmp_dir=str(tmp_path))
+    titles = [row["title"] for row in merger.rows()]
+    assert titles == [row[0] for row in expected_order(rows)]
+    assert merger.rows_read == len(rows)
+    if run_rows < len(rows):
+        assert merger.runs == -(-len(rows) // run_rows)
+    if fan_in == 2:
+        assert merger.passes > 1
+    # Later passes replay the sorted rows instead of sorting again
+    assert [row["title"] for row in merger.rows()] == titles
+    assert merger.rows_read == len(rows)
+
+
+def test_single_source_keeps_its_order(tmp_path):
+    path = write_csv(tmp_path / "videos.csv", [(f"row {i}", f"https://e.com/{i}") for i in range(30)])
+    merger = SourceMerger([path], run_rows=4, fan_in=2)
+    assert [row["title"] for row in merger.rows()] == [f"row {i}" for i in range(30)]
+    assert merger.count() == 30
+
+
+def test_sources_with_different_columns(tmp_path):
+    a = write_csv(tmp_path / "a.csv", [("low", "https://e.com/a")])
+    b = write_csv(tmp_path / "b.csv", [("high", "https://e.com/b", "5", "https://img/b.jpg")],
+                  ("title", "url", "priority", "thumbnail"))
+    assert list(SourceMerger([a, b]).rows()) == [
+        {"title": "high", "url": "https://e.com/b", "priority": "5", "thumbnail": "https://img/b.jpg"},
+        {"title": "low", "url": "https://e.com/a"}]
+
+
+def test_edited_source_is_sorted_again(tmp_path):
+    path = write_csv(tmp_path / "a.csv", [("a", "https://e.com/a", "1"), ("b", "https://e.com/b", "2")],
+                     ("title", "url", "priority"))
+    merger = SourceMerger([path])
+    assert [row["title"] for row in merger.rows()] == ["b", "a"]
+    write_csv(tmp_path / "a.csv", [("a", "https://e.com/a", "3"), ("b", "https://e.com/b", "2"),
+                                   ("c", "https://e.com/c", "")], ("title", "url", "priority"))
+    assert [row["title"] for row in merger.rows()] == ["a", "b", "c"]
+
+
+def test_bad_priority_names_the_line(tmp_path):
+    path = write_csv(tmp_path / "a.csv", [("a", "https://e.com/a", "1"), ("b", "https://e.com/b", "high")],
+                     ("title", "url", "priority"))
+    with pytest.raises(ValueError, match=r"a\.csv:3: priority 'high'"):
+        list(SourceMerger([path]).rows())
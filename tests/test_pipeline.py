@@ -0,0 +1,88 @@
+import io
+import os
+import subprocess
+import sys
+
+import pytest
+
+import home
+from conftest import ROOT, catalog_rows
+from pipeline import InputError, normalize, read_rows, render, write_ndjson
+from streaming import count_rows
+
+PIPELINE = os.path.join(ROOT, "pipeline.py")
+
+
+def read(path):
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        return f.read()
+
+
+def normalized(text, **options):
+    out = io.StringIO()
+    write_ndjson(normalize(read_rows(io.StringIO(text)), **options), out)
+    return out.getvalue()
+
+
+def rendered(text, **options):
+    out = io.StringIO()
+    render(normalize(read_rows(io.StringIO(text))), out, **options)
+    return out.getvalue()
+
+
+def test_normalized_entries_pass_through_unchanged(videos_csv):
+    entries = normalized(read(videos_csv))
+    assert len(entries.splitlines()) == len(catalog_rows()) - 2
+    assert normalized(entries) == entries
+    assert normalized(entries, dedupe=False) == entries
+
+
+def test_normalize_then_render_is_the_static_page(videos_csv, tmp_path):
+    home.build_site(videos_csv, str(tmp_path))
+    page = read(tmp_path / "index.html")
+    categories = home.default_rules().categories
+    total = count_rows(videos_csv)
+    assert rendered(normalized(read(videos_csv)), categories=categories, total=total) == page
+    assert rendered(read(videos_csv), categories=categories, total=total) == page
+
+
+def test_format_is_told_by_the_first_line():
+    row = {"title": "a", "url": "u"}
+    assert list(read_rows(io.StringIO("title,url\r\na,u\r\n"))) == [row]
+    assert list(read_rows(io.StringIO('{"title": "a", "url": "u"}\n'))) == [row]
+    assert list(read_rows(io.StringIO('\n{"title": "a", "url": "u"}\n'), "ndjson")) == [row]
+    assert list(read_rows(io.StringIO(""))) == []
+
+
+@pytest.mark.parametrize("text, message", [
+    ("name,url\r\nx,y\r\n", "CSV header without a title column"),
+    ("title,url\r\nonly a title\r\n", "CSV line 2: no url value"),
+    ('{"title": "a"}\n', "NDJSON line 1: no url field"),
+    ('{"title": 1, "url": "x"}\n', "NDJSON line 1: title is not a string"),
+    ('{"title": "a", "url": "x"}\n{"title": "a", "url": \n', "NDJSON line 2: "),
+    ('{"title": "a", "url": "x"}\n[1]\n', "NDJSON line 2: no title or url field"),
+])
+def test_bad_input_raises_input_error(text, message):
+    with pytest.raises(InputError, match=message):
+        list(read_rows(io.StringIO(text)))
+
+
+def run(*args, stdin=""):
+    return subprocess.run([sys.executable, PIPELINE, *args], input=stdin.encode("utf-8"), capture_output=True)
+
+
+def test_command_line_pipeline(videos_csv, tmp_path):
+    home.build_site(videos_csv, str(tmp_path))
+    normalize_stage = run("normalize", videos_csv)
+    assert normalize_stage.returncode == 0
+    assert normalize_stage.stderr.decode("utf-8").startswith("🔗 Merged 2 duplicate rows")
+    total = str(count_rows(videos_csv))
+    render_stage = run("render", "--total", total, stdin=normalize_stage.stdout.decode("utf-8"))
+    assert render_stage.returncode == 0
+    assert render_stage.stdout.decode("utf-8") == read(tmp_path / "index.html")
+
+
+def test_command_line_reports_bad_input_without_a_traceback():
+    result = run("normalize", stdin='{"title": 1, "url": "x"}\n')
+    assert result.returncode == 1
+    assert result.stderr.decode("utf-8") == "❌ NDJSON line 1: title is not a string\n"
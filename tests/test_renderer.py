@@ -0,0 +1,59 @@
+import pytest
+
+from renderer import Template, TemplateSyntaxError, compile_template, escape, load_template
+
+
+def template(source):
+    namespace = {"_e": escape}
+    exec(compile(compile_template(source, "test"), "<template test>", "exec"), namespace)
+    return Template("test", namespace)
+
+
+def test_escape():
+    assert escape("plain") == "plain"
+    assert escape("<a href=\"x\">Tom & Jerry's</a>") == (
+        "&lt;a href=&quot;x&quot;&gt;Tom &amp; Jerry&#x27;s&lt;/a&gt;")
+    assert escape(3) == "3"
+
+
+def test_expressions_are_escaped_unless_safe():
+    t = template("{% args title %}<h2>{{ title }}</h2><p>{{ title|safe }}</p>")
+    assert t.render_string("<b>&") == "<h2>&lt;b&gt;&amp;</h2><p><b>&</p>"
+
+
+def test_block_tags_on_their_own_lines_leave_no_trace():
+    t = template("{% args items %}\n<ul>\n{% for item in items %}\n{% if item %}\n  <li>{{ item }}</li>\n"
+                 "{% endif %}\n{% endfor %}\n</ul>\n")
+    assert t.render_string(["a", "", "<b>"]) == "<ul>\n  <li>a</li>\n  <li>&lt;b&gt;</li>\n</ul>\n"
+
+
+def test_defs_return_strings_and_dash_drops_the_line_break():
+    t = template('{% def tile(title, href="#") %}\n<a href="{{ href }}">{{ title }}</a>\n{% enddef %}\n'
+                 "{% args titles %}\n{% for title in titles %}\n{{ tile(title)|safe -}}\n{% endfor %}\n")
+    assert t.tile("x&y", "/a?b=1&c=2") == '<a href="/a?b=1&amp;c=2">x&amp;y</a>\n'
+    assert t.render_string(["a", "b"]) == '<a href="#">a</a>\n<a href="#">b</a>\n'
+
+
+def test_comments_and_braces_in_text():
+    t = template("{# note #}\ncss { color: red; }{{ 1 + 1 }}\n")
+    assert t.render_string() == "css { color: red; }2\n"
+
+
+@pytest.mark.parametrize("source, message", [
+    ("{% if x %}", "never closed"),
+    ("{% endfor %}", "unexpected"),
+    ("{% else %}", "outside"),
+    ("{% whatever %}", "unknown tag"),
+    ("{% for x %}{% endfor %}", "bad loop"),
+])
+def test_syntax_errors(source, message):
+    with pytest.raises(TemplateSyntaxError, match=message):
+        compile_template(source, "test")
+
+
+def test_swipe_cards_escape_titles_and_urls():
+    swipe = load_template("swipe.html")
+    html = swipe.card_body(('<img src=x onerror="alert(1)">', 'https://e.com/?q="x"&r=<y>', "t.jpg", False))
+    assert "<img src=x" not in html
+    assert "&lt;img src=x onerror=&quot;alert(1)&quot;&gt;" in html
+    assert 'href="https://e.com/?q=&quot;x&quot;&amp;r=&lt;y&gt;"' in html
@@ -0,0 +1,82 @@
+import pytest
+
+from rules import Rules, default_rules
+
+
+def rules(*rule_list, multi=False, categories=("Music", "Movies", "Shop", "Others")):
+    return Rules({"categories": list(categories), "default": "Others", "multi": multi,
+                  "rules": list(rule_list)})
+
+
+def test_default_rules_match_the_old_chain():
+    r = default_rules()
+    assert r.classify("MV Song") == ["🎵 Music"]
+    assert r.classify("M-Trailer") == ["🎬 Movies"]
+    assert r.classify("The OG MERCH store") == ["🛍 Merchandise"]
+    assert r.classify("Interview") == ["⭐ Others"]
+
+
+def test_first_matching_rule_wins_in_file_order():
+    r = rules({"category": "Music", "prefix": "MV"}, {"category": "Movies", "prefix": "M"})
+    assert r.classify("MV Song") == ["Music"]
+    assert r.classify("Movie") == ["Movies"]
+    assert r.classify("A Movie") == ["Others"]
+
+
+def test_multi_collects_every_category_in_rule_order():
+    r = rules({"category": "Shop", "keyword": "merch", "ignore_case": True},
+              {"category": "Music", "keyword": "song"}, multi=True)
+    assert r.classify("song MERCH") == ["Shop", "Music"]
+
+
+def test_keywords_sharing_a_start_all_match():
+    r = rules({"category": "Music", "keyword": "live"}, {"category": "Movies", "keyword": "liveaction"},
+              multi=True)
+    assert r.classify("a liveaction remake") == ["Music", "Movies"]
+
+
+def test_shared_regexes():
+    r = rules({"category": "Music", "regex": r"\bEP\d+"},
+              {"category": "Movies", "regex": r"trailer", "ignore_case": True})
+    assert r.any_regex is not None and len(r.regexes) == 2 and not r.lone_regexes
+    assert r.classify("Show EP12") == ["Music"]
+    assert r.classify("TRAILER cut") == ["Movies"]
+    assert r.classify("EP") == ["Others"]
+
+
+@pytest.mark.parametrize("pattern, title, other", [
+    (r"(?i)^teaser", "TEASER one", "a teaser"),
+    (r"(\w)\1\1", "wooow", "wow"),
+    (r"(?P<word>ab)(?P=word)", "abab", "abba"),
+])
+def test_regexes_with_flags_or_backreferences_are_searched_alone(pattern, title, other):
+    r = rules({"category": "Music", "regex": r"^zzz"}, {"category": "Movies", "regex": pattern})
+    assert len(r.lone_regexes) == 1 and len(r.regexes) == 1
+    assert r.classify(title) == ["Movies"]
+    assert r.classify(other) == ["Others"]
+    # The shared alternation still works next to the lone regex
+    assert r.classify("zzz " + title) == ["Music"]
+
+
+def test_domains_match_subdomains_but_not_lookalikes():
+    r = rules({"category": "Shop", "domain": "shop.example.com"})
+    assert r.classify("x", "https://shop.example.com/item") == ["Shop"]
+    assert r.classify("x", "https://www.shop.example.com/item") == ["Shop"]
+    assert r.classify("x", "https://user@SHOP.example.com:8080/") == ["Shop"]
+    assert r.classify("x", "https://notshop.example.com/") == ["Others"]
+
+
+def test_column_rules_name_categories_from_the_row():
+    r = rules({"column": "category"}, multi=True)
+    assert r.classify("x", row={"category": "Music; Live"}) == ["Music", "Live"]
+    assert r.classify("x", row={"category": "  "}) == ["Others"]
+    # A short CSV row leaves the column out, or None
+    assert r.classify("x", row={"category": None}) == ["Others"]
+    assert r.classify("x", row={}) == ["Others"]
+
+
+def test_bad_rules_are_rejected():
+    with pytest.raises(ValueError, match="exactly one"):
+        rules({"category": "Music", "prefix": "MV", "keyword": "song"})
+    with pytest.raises(ValueError, match="no category"):
+        rules({"prefix": "MV"})
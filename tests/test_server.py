@@ -0,0 +1,119 @@
+import asyncio
+import json
+import shutil
+
+import pytest
+
+import home
+from catalog import compile_catalog
+from conftest import catalog_rows, write_csv
+from rules import DEFAULT_RULES
+from server import SwipeApp
+
+
+class Client:
+    """Calls an ASGI app directly; responses are (status, headers, body)"""
+
+    def __init__(self, app):
+        self.app = app
+
+    def get(self, path, query=b"", etag=None, method="GET"):
+        headers = [(b"if-none-match", etag.encode("latin-1"))] if etag else []
+        scope = {"type": "http", "method": method, "path": path, "query_string": query, "headers": headers}
+        sent = []
+
+        async def send(message):
+            sent.append(message)
+
+        asyncio.run(self.app(scope, None, send))
+        start, *bodies = sent
+        headers = {name.decode("latin-1"): value.decode("latin-1") for name, value in start["headers"]}
+        return start["status"], headers, b"".join(message["body"] for message in bodies)
+
+
+@pytest.fixture
+def client(videos_csv):
+    return Client(SwipeApp(videos_csv, watch=False))
+
+
+def test_index_is_the_static_page(client, videos_csv, tmp_path):
+    home.build_site(videos_csv, str(tmp_path))
+    status, headers, body = client.get("/")
+    with open(tmp_path / "index.html", "rb") as f:
+        assert (status, body) == (200, f.read())
+    assert headers["cache-control"] == "no-cache" and headers["etag"].startswith('"')
+
+
+def test_catalog_file_serves_the_same_page(client, videos_csv, tmp_path):
+    catalog = compile_catalog(videos_csv, str(tmp_path / "videos.catalog"))
+    assert Client(SwipeApp(catalog, watch=False)).get("/") == client.get("/")
+
+
+@pytest.mark.parametrize("path, query", [
+    ("/", b""), ("/home.html", b""), ("/category/🎵 Music", b""), ("/api/categories", b""),
+    ("/api/cards", b"page=1&size=5"), ("/api/categories/🛍 Merchandise", b""),
+])
+def test_matching_etag_gets_304(client, path, query):
+    status, headers, body = client.get(path, query)
+    assert status == 200 and body
+    etag = headers["etag"]
+    assert client.get(path, query, etag)[:1] == (304,)
+    assert client.get(path, query, etag)[2] == b""
+    assert client.get(path, query, f"W/{etag}")[0] == 304
+    assert client.get(path, query, f'"other", {etag}')[0] == 304
+    assert client.get(path, query, "*")[0] == 304
+    assert client.get(path, query, '"other"')[0] == 200
+
+
+def test_head_sends_no_body(client):
+    status, headers, body = client.get("/", method="HEAD")
+    assert (status, body) == (200, b"") and "etag" in headers
+    assert client.get("/", method="POST")[0] == 405
+
+
+def test_json_pages(client):
+    status, _, body = client.get("/api/cards", b"page=1&size=5")
+    data = json.loads(body)
+    assert status == 200 and data["page"] == 1 and len(data["cards"]) == 5
+    assert data["total"] == 60 and data["next"] == "/api/cards?page=2&size=5"
+    assert json.loads(client.get("/api/cards", b"page=11&size=5")[2])["next"] is None
+    counts = json.loads(client.get("/api/categories")[2])
+    assert sum(counts.values()) == 60 and counts["🎵 Music"] == 15
+
+
+@pytest.mark.parametrize("path, query, status", [
+    ("/api/cards", b"page=x", 400), ("/api/cards", b"size=1.5", 400), ("/nope", b"", 404),
+    ("/category/Nope", b"", 404), ("/api/categories/Nope", b"", 404),
+])
+def test_errors(client, path, query, status):
+    assert client.get(path, query)[0] == status
+
+
+def test_reload_changes_only_the_tags_of_what_changed(tmp_path):
+    rows = catalog_rows()
+    csv_file = write_csv(tmp_path / "videos.csv", rows)
+    app = SwipeApp(csv_file, watch=False)
+    client = Client(app)
+    paths = ("/", "/category/🎵 Music", "/category/🎬 Movies")
+    before = {path: client.get(path)[1]["etag"] for path in paths}
+    rows[1] = ("M-Trailer 1 recut", rows[1][1])
+    write_csv(tmp_path / "videos.csv", rows)
+    app.reload()
+    after = {path: client.get(path)[1]["etag"] for path in paths}
+    assert after["/category/🎵 Music"] == before["/category/🎵 Music"]
+    assert after["/category/🎬 Movies"] != before["/category/🎬 Movies"]
+    assert after["/"] != before["/"]
+
+
+def test_rules_reload_changes_the_index_tag(tmp_path, videos_csv):
+    rules_file = tmp_path / "rules.json"
+    shutil.copy(DEFAULT_RULES, rules_file)
+    app = SwipeApp(videos_csv, str(rules_file), watch=False)
+    etag = Client(app).get("/")[1]["etag"]
+    with open(rules_file, "r", encoding="utf-8") as f:
+        config = json.load(f)
+    config["multi"] = True
+    with open(rules_file, "w", encoding="utf-8") as f:
+        json.dump(config, f)
+    app.reload()
+    assert Client(app).get("/", etag=etag)[0] == 200
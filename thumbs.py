@@ -0,0 +1,227 @@
+import base64
+import hashlib
+import io
+import json
+import os
+import re
+
+from renderer import escape
+
+THUMB_DIR = "thumbs"
+MANIFEST_NAME = "manifest.json"
+WIDTHS = (160, 320, 480, 640)
+LQIP_WIDTH = 16
+SOURCE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp")
+
+# Rendered widths in the phone frame: two-column grid tiles and full cards
+GRID_SIZES = "165px"
+CARD_SIZES = "340px"
+
+# Cards whose images load with the page; the swipe script fetches the rest
+# PREFETCH_CARDS ahead of the card on top, so the page costs the same few
+# images up front however long the catalog is
+EAGER_CARDS = 3
+PREFETCH_CARDS = 3
+
+# Attributes by loading priority; "deferred" images carry data-src and
+# data-srcset instead, for the page script to swap in when it wants them
+PRIORITY_HINTS = {
+    "high": ' fetchpriority="high"',
+    "auto": ' decoding="async"',
+    "deferred": ' decoding="async"',
+}
+
+YOUTUBE_THUMB = re.compile(r"img\.youtube\.com/vi/([A-Za-z0-9_-]{11})/")
+
+
+def card_priority(i):
+    """Loading priority of the image on swipe card i"""
+    return "high" if i == 0 else "auto" if i < EAGER_CARDS else "deferred"
+
+
+def cache_key(thumb_url):
+    """Name under which a thumbnail is expected in the local image directory
+
+    YouTube thumbnails are cached as <video id>.<ext>, everything else under
+    a short hash of its URL.
+    """
+    match = YOUTUBE_THUMB.search(thumb_url)
+    if match:
+        return match.group(1)
+    return hashlib.blake2b(thumb_url.encode("utf-8"), digest_size=8).hexdigest()
+
+
+def find_source(image_dir, key):
+    for ext in SOURCE_EXTENSIONS:
+        path = os.path.join(image_dir, key + ext)
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def _hashed_name(key, width, data, ext):
+    return f"{key}-{width}.{hashlib.blake2b(data, digest_size=6).hexdigest()}.{ext}"
+
+
+def process_image(source, key, output_dir, widths=WIDTHS):
+    """Resize one image into JPEG and WebP variants plus a blurred placeholder
+
+    Runs in a worker process. Returns the manifest record for the image.
+    """
+    from PIL import Image, ImageFilter
+
+    with Image.open(source) as im:
+        im = im.convert("RGB")
+        variants = []
+        for width in widths:
+            if width > im.width and variants:
+                break
+            w = min(width, im.width)
+            h = max(1, round(im.height * w / im.width))
+            resized = im.resize((w, h), Image.LANCZOS)
+            files = {}
+            for fmt, ext, opts in (("JPEG", "jpg", {"quality": 80, "optimize": True, "progressive": True}),
+                                   ("WEBP", "webp", {"quality": 75, "method": 4})):
+                buf = io.BytesIO()
+                resized.save(buf, fmt, **opts)
+                data = buf.getvalue()
+                name = _hashed_name(key, w, data, ext)
+                path = os.path.join(output_dir, name)
+                if not os.path.exists(path):
+                    with open(path, "wb") as f:
+                        f.write(data)
+                files[ext] = name
+            variants.append({"width": w, "height": h, "jpg": files["jpg"], "webp": files["webp"]})
+
+        tiny = im.resize((LQIP_WIDTH, max(1, round(im.height * LQIP_WIDTH / im.width))), Image.BILINEAR)
+        tiny = tiny.filter(ImageFilter.GaussianBlur(1))
+        buf = io.BytesIO()
+        tiny.save(buf, "JPEG", quality=40)
+        lqip = "data:image/jpeg;base64," + base64.b64encode(buf.getvalue()).decode("ascii")
+
+    return {"variants": variants, "lqip": lqip}
+
+
+def _source_hash(path):
+    with open(path, "rb") as f:
+        return hashlib.blake2b(f.read(), digest_size=16).hexdigest()
+
+
+def build_thumbnails(thumb_urls, image_dir, output_dir, workers=None, widths=WIDTHS, metrics=None):
+    """Process the local copies of thumb_urls on a process pool
+
+    Variants land in <output_dir>/thumbs/ with content-hashed names. Sources
+    whose content hash is already in the manifest are not processed again;
+    metrics records those as cache hits.
+    Returns {thumb_url: ImageSet} for every URL that has a local source.
+    """
+    try:
+        import PIL  # noqa: F401
+    except ImportError:
+        raise ImportError("the thumbnail stage needs Pillow: pip install Pillow") from None
+
+    thumb_dir = os.path.join(output_dir, THUMB_DIR)
+    os.makedirs(thumb_dir, exist_ok=True)
+    manifest_path = os.path.join(thumb_dir, MANIFEST_NAME)
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        manifest = {}
+
+    keys = {}
+    for url in thumb_urls:
+        keys.setdefault(cache_key(url), []).append(url)
+
+    jobs = {}
+    current = {}
+    for key in keys:
+        source = find_source(image_dir, key)
+        if not source:
+            continue
+        digest = _source_hash(source)
+        record = manifest.get(key)
+        if record and record.get("source") == digest and record.get("widths") == list(widths):
+            current[key] = record
+        else:
+            jobs[key] = (source, digest)
+    if metrics:
+        metrics.cache("thumbnails", len(current), len(jobs))
+
+    if jobs:
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {key: pool.submit(process_image, source, key, thumb_dir, widths)
+                       for key, (source, _) in jobs.items()}
+            for key, future in futures.items():
+                record = future.result()
+                record["source"] = jobs[key][1]
+                record["widths"] = list(widths)
+                current[key] = record
+
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump(current, f, indent=1)
+
+    # Drop variants that no current source refers to any more
+    referenced = {v[ext] for record in current.values() for v in record["variants"] for ext in ("jpg", "webp")}
+    for name in os.listdir(thumb_dir):
+        if name != MANIFEST_NAME and name not in referenced:
+            os.remove(os.path.join(thumb_dir, name))
+
+    print(f"✅ Thumbnails ready: {len(current)} images ({len(jobs)} processed) in {thumb_dir}")
+    return {url: ImageSet(record, THUMB_DIR) for key, record in current.items() for url in keys[key]}
+
+
+class ImageSet:
+    """Responsive variants of one thumbnail, as rendered into the templates"""
+
+    __slots__ = ("variants", "lqip", "base")
+
+    def __init__(self, record, base):
+        self.variants = record["variants"]
+        self.lqip = record["lqip"]
+        self.base = base
+
+    def rebased(self, prefix):
+        """The same variants linked from a page elsewhere, e.g. prefix "../" one directory down"""
+        image = ImageSet.__new__(ImageSet)
+        image.variants, image.lqip, image.base = self.variants, self.lqip, prefix + self.base
+        return image
+
+    def srcset(self, ext):
+        return ", ".join(f"{self.base}/{v[ext]} {v['width']}w" for v in self.variants)
+
+    def src(self, max_width):
+        fitting = [v for v in self.variants if v["width"] <= max_width] or self.variants[:1]
+        return f"{self.base}/{fitting[-1]['jpg']}"
+
+    def render(self, alt, sizes, max_width, priority="auto"):
+        """<picture> with a WebP source, a JPEG fallback and a blurred placeholder"""
+        first = self.variants[0]
+        lazy = "data-" if priority == "deferred" else ""
+        return (
+            f'<picture style="display:contents">'
+            f'<source type="image/webp" {lazy}srcset="{self.srcset("webp")}" sizes="{sizes}">'
+            f'<img {lazy}src="{self.src(max_width)}" {lazy}srcset="{self.srcset("jpg")}" '
+            f'sizes="{sizes}" '
+            f'width="{first["width"]}" height="{first["height"]}" '
+            f'style="background:url({self.lqip}) center/cover" alt="{alt}"{PRIORITY_HINTS[priority]}>'
+            f'</picture>'
+        )
+
+
+def img_tag(thumb, alt, images, sizes, max_width, priority="auto"):
+    """Responsive markup for thumb when the image stage has it, a plain <img> otherwise
+
+    alt must already be HTML-escaped; the templates escape each title once
+    and use it for both the alt text and the caption. priority is "high"
+    for the image the page shows first, "auto", or "deferred" for images
+    the page script loads later (see PRIORITY_HINTS).
+    """
+    image = images.get(thumb) if images else None
+    if image is None:
+        lazy = "data-" if priority == "deferred" else ""
+        return f'<img {lazy}src="{escape(thumb)}" alt="{alt}"{PRIORITY_HINTS[priority]}>'
+    return image.render(alt, sizes, max_width, priority)
+
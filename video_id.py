@@ -0,0 +1,34 @@
+import re
+from functools import lru_cache
+
+# One search over the URL covers every form we link to: youtu.be short links,
+# watch?v= (at any position in the query), embed/, shorts/, live/ and v/
+# paths, on www., m., music. and the youtube-nocookie.com domain. The
+# literal host prefix lets non-YouTube URLs fail fast.
+VIDEO_URL = re.compile(
+    r"""
+    (?:
+        youtu\.be/
+      | youtube(?:-nocookie)?\.com/
+        (?:embed/|shorts/|live/|v/|e/|watch\?(?:[^#&]*&)*v=)
+    )
+    ([A-Za-z0-9_-]{11})
+    """,
+    re.VERBOSE,
+)
+
+CACHE_SIZE = 4096
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def extract_video_id(url: str) -> str | None:
+    """Extract the YouTube video ID from different URL formats"""
+    match = VIDEO_URL.search(url)
+    if match:
+        return match.group(1)
+    return None
+
+
+def extract_video_ids(urls):
+    """Extract video IDs for an iterable of URLs (None where there is no ID)"""
+    return [extract_video_id(url) for url in urls]
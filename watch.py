@@ -0,0 +1,392 @@
+import argparse
+import csv
+import ctypes
+import ctypes.util
+import importlib
+import os
+import select
+import struct
+import sys
+import time
+
+import home
+from catalog import is_catalog, open_catalog
+from dedupe import Deduper
+from incremental import row_hash
+from renderer import clear_cache, template_files
+from thumbs import card_priority
+from rules import DEFAULT_RULES, load_rules
+
+DEBOUNCE = 0.03
+POLL_INTERVAL = 0.2
+
+# <sys/inotify.h>: editors either rewrite a file in place (close after
+# write) or write a temporary file and rename it over the original.
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+INOTIFY_MASK = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+_EVENT = struct.Struct("iIII")
+
+
+class InotifyWatcher:
+    """Kernel change notifications for a few files, through libc's inotify
+
+    The directories are watched rather than the files themselves, so a file
+    replaced by rename is still seen. Linux only; raises OSError elsewhere.
+    """
+
+    def __init__(self, paths):
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        try:
+            init, add_watch = libc.inotify_init1, libc.inotify_add_watch
+        except AttributeError:
+            raise OSError("inotify is not available on this platform") from None
+        self.fd = init(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.watched = {}
+        for path in paths:
+            directory, name = os.path.split(os.path.abspath(path))
+            wd = add_watch(self.fd, os.fsencode(directory), INOTIFY_MASK)
+            if wd < 0:
+                errno = ctypes.get_errno()
+                os.close(self.fd)
+                raise OSError(errno, f"cannot watch {directory}")
+            self.watched.setdefault(wd, {})[os.fsencode(name)] = path
+
+    def read(self, timeout=None):
+        """Watched paths changed within timeout seconds (None: wait for one)"""
+        changed = set()
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return changed
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return changed
+        offset = 0
+        while offset < len(data):
+            wd, _, _, length = _EVENT.unpack_from(data, offset)
+            offset += _EVENT.size
+            name = data[offset:offset + length].rstrip(b"\0")
+            offset += length
+            path = self.watched.get(wd, {}).get(name)
+            if path:
+                changed.add(path)
+        return changed
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollingWatcher:
+    """Portable fallback: compares each file's mtime and size every interval"""
+
+    def __init__(self, paths, interval=POLL_INTERVAL):
+        self.interval = interval
+        self.stamps = {path: self._stamp(path) for path in paths}
+
+    @staticmethod
+    def _stamp(path):
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def read(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            changed = set()
+            for path, stamp in self.stamps.items():
+                current = self._stamp(path)
+                if current != stamp:
+                    self.stamps[path] = current
+                    changed.add(path)
+            if changed:
+                return changed
+            wait = self.interval
+            if deadline is not None:
+                wait = min(wait, deadline - time.monotonic())
+                if wait <= 0:
+                    return changed
+            time.sleep(wait)
+
+    def close(self):
+        pass
+
+
+def make_watcher(paths, polling=False):
+    """inotify where the platform has it, polling otherwise"""
+    if not polling:
+        try:
+            return InotifyWatcher(paths)
+        except OSError as e:
+            print(f"⚠️ inotify unavailable ({e}), polling every {POLL_INTERVAL}s instead")
+    return PollingWatcher(paths)
+
+
+def changes(watcher, debounce=DEBOUNCE):
+    """Yield (changed paths, first notice in ns) once per burst of edits
+
+    A burst ends when no further change arrives for debounce seconds.
+    """
+    while True:
+        changed = watcher.read()
+        noticed = time.time_ns()
+        while changed:
+            more = watcher.read(debounce)
+            if not more:
+                break
+            changed |= more
+        if changed:
+            yield changed, noticed
+
+
+def _write(path, parts):
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.writelines(parts)
+    os.replace(tmp, path)
+
+
+class LiveSite:
+    """A static site kept in memory between rebuilds
+
+    Parsed and classified rows are cached by their raw CSV values, rendered
+    cards by row hash and category sections by category. A save re-parses
+    only the rows whose values changed and re-renders their cards and the
+    sections they leave or join; the rest of the page is reassembled from
+    memory. Outputs whose inputs did not change are not touched.
+    """
+
+    def __init__(self, csv_file="videos.csv", output_dir=".", poster=home.DEFAULT_POSTER, rules_file=None):
+        os.makedirs(output_dir, exist_ok=True)
+        self.csv_file = csv_file
+        self.rules_file = rules_file or DEFAULT_RULES
+        self.template_files = [home.__file__, *template_files()]
+        self.poster = poster
+        self.swipe_file = os.path.join(output_dir, "index.html")
+        self.home_file = os.path.join(output_dir, "home.html")
+        self.rules = load_rules(self.rules_file)
+        self.homepage = None
+        self._reset()
+
+    def _reset(self):
+        self.header = None
+        self.rows = {}       # raw CSV values -> (entry, categories, row hash)
+        self.items = []      # those tuples in CSV order, as last written
+        self.parts = []      # the page as last written
+        self.section_at = {}  # category -> index of its block in parts
+        self.bodies = {}     # (row hash, image priority) -> rendered card body
+        self.thumbs = {}     # row hash -> rendered category thumbnail
+        self.opens = []      # card openings; their z-index depends on the row count
+
+    @property
+    def inputs(self):
+        return [self.csv_file, self.rules_file, *self.template_files]
+
+    def _read(self):
+        """Current rows in CSV order and how many of them had to be parsed"""
+        items, rows = [], {}
+        parsed = 0
+        if is_catalog(self.csv_file):
+            # Compiled catalogs come parsed and classified already
+            for entry, names in open_catalog(self.csv_file, self.rules).pairs():
+                item = rows.get(entry) or self.rows.get(entry)
+                if item is None:
+                    item = (entry, names, row_hash(entry))
+                    parsed += 1
+                rows[entry] = item
+                items.append(item)
+            self.rows = rows
+            return items, parsed
+        with open(self.csv_file, "r", encoding="utf-8") as file:
+            reader = csv.reader(file)
+            header = next(reader, [])
+            if header != self.header:
+                self.header, self.rows = header, {}
+            for values in reader:
+                if not values:
+                    continue
+                key = tuple(values)
+                item = rows.get(key) or self.rows.get(key)
+                if item is None:
+                    entry, names = home.parse_row(dict(zip(header, values)), self.rules)
+                    item = (entry, names, row_hash(entry))
+                    parsed += 1
+                rows[key] = item
+                items.append(item)
+        self.rows = rows
+        deduper = Deduper()
+        return [item for item in items if not deduper.is_duplicate(item[0])], parsed
+
+    def _body(self, entry, h, i):
+        key = (h, card_priority(i))
+        body = self.bodies.get(key)
+        if body is None:
+            body = self.bodies[key] = home.render_card_body(entry, None, key[1])
+        return body
+
+    def _section(self, category, members):
+        html = [home.render_category_head(category)]
+        for entry, h in members:
+            thumb = self.thumbs.get(h)
+            if thumb is None:
+                thumb = self.thumbs[h] = home.render_thumb(entry)
+            html.append(thumb)
+        html.append(home.CATEGORY_FOOT)
+        return "".join(html)
+
+    def _assemble(self, items):
+        """The whole page from cached fragments; drops fragments no row uses"""
+        total = len(items)
+        if len(self.opens) != total:
+            self.opens = [home.render_card_open(i, total) for i in range(total)]
+        parts = [home.SWIPE_HEAD]
+        groups = {name: [] for name in self.rules.categories}
+        for i, (opening, (entry, names, h)) in enumerate(zip(self.opens, items)):
+            parts.append(opening)
+            parts.append(self._body(entry, h, i))
+            for name in names:
+                groups.setdefault(name, []).append((entry, h))
+        parts.append(home.CATEGORIES_HEAD)
+        self.section_at = {}
+        for category, members in groups.items():
+            self.section_at[category] = len(parts)
+            parts.append(self._section(category, members))
+        parts.append(home.SWIPE_TAIL)
+        parts.append(home.PAGE_END)
+
+        used = {h for _, _, h in items}
+        self.bodies = {key: body for key, body in self.bodies.items() if key[0] in used}
+        self.thumbs = {h: thumb for h, thumb in self.thumbs.items() if h in used}
+        self.items, self.parts = items, parts
+        return parts
+
+    def _swipe_parts(self, items):
+        """Page fragments for items, or None when the page would not change
+
+        When rows were only edited in place, their cards and the categories
+        they leave or join are patched into the previous page. Added or
+        removed rows shift every z-index, so the page is then reassembled
+        from the cached fragments.
+        """
+        if len(items) != len(self.items) or not self.parts:
+            return self._assemble(items)
+        changed = [i for i, (new, old) in enumerate(zip(items, self.items)) if new is not old]
+        if not changed:
+            return None
+        touched = set()
+        for i in changed:
+            touched.update(self.items[i][1], items[i][1])
+        if not touched.issubset(self.rules.categories):
+            # Categories named by a CSV column come and go with their rows
+            return self._assemble(items)
+        for i in changed:
+            entry, _, h = items[i]
+            self.parts[2 + 2 * i] = self._body(entry, h, i)
+        for category in touched:
+            members = [(entry, h) for entry, names, h in items if category in names]
+            self.parts[self.section_at[category]] = self._section(category, members)
+        self.items = items
+        return self.parts
+
+    def rebuild(self, changed=None):
+        """Re-render the outputs whose inputs are in changed (default: all)
+
+        Returns a list of (output, detail) for the files actually rewritten.
+        """
+        changed = set(self.inputs if changed is None else changed)
+        swipe = home_page = False
+        if changed.intersection(self.template_files):
+            clear_cache()
+            importlib.reload(home)
+            self._reset()
+            swipe = home_page = True
+        if self.rules_file in changed:
+            self.rules = load_rules(self.rules_file)
+            self._reset()
+            swipe = True
+        if self.csv_file in changed:
+            swipe = True
+        if not os.path.exists(self.swipe_file):
+            self._reset()
+            swipe = True
+
+        written = []
+        if home_page or not os.path.exists(self.home_file):
+            homepage = home.render_homepage(self.poster)
+            if homepage != self.homepage or not os.path.exists(self.home_file):
+                _write(self.home_file, [homepage])
+                self.homepage = homepage
+                written.append((self.home_file, "homepage"))
+        if swipe:
+            items, parsed = self._read()
+            parts = self._swipe_parts(items)
+            if parts is not None:
+                _write(self.swipe_file, parts)
+                written.append((self.swipe_file, f"{len(items)} rows, {parsed} parsed"))
+        return written
+
+
+def _saved_at(paths, noticed):
+    """When the burst was saved: the newest mtime, unless the save left it untouched"""
+    stamps = []
+    for path in paths:
+        try:
+            stamps.append(os.stat(path).st_mtime_ns)
+        except OSError:
+            pass
+    saved = max(stamps, default=noticed)
+    return saved if noticed - saved < 1_000_000_000 else noticed
+
+
+def watch(csv_file="videos.csv", output_dir=".", poster=home.DEFAULT_POSTER, rules_file=None,
+          debounce=DEBOUNCE, polling=False):
+    """Build once, then rebuild on every change to the CSV, rules or templates until interrupted"""
+    site = LiveSite(csv_file, output_dir, poster, rules_file)
+    start = time.perf_counter()
+    for output, detail in site.rebuild():
+        print(f"✅ {output} written ({detail})")
+    print(f"👀 Initial build in {(time.perf_counter() - start) * 1000:.0f} ms; watching "
+          f"{', '.join(site.inputs)} (Ctrl+C to stop)")
+
+    watcher = make_watcher(site.inputs, polling)
+    try:
+        for changed, noticed in changes(watcher, debounce):
+            saved = _saved_at(changed, noticed)
+            try:
+                written = site.rebuild(changed)
+            except Exception as e:
+                # Keep watching: the next save usually fixes a half-edited file
+                print(f"❌ Rebuild failed after change to {', '.join(sorted(changed))}: {e!r}")
+                continue
+            latency = (time.time_ns() - saved) / 1e6
+            for output, detail in written:
+                print(f"✅ {output} written {latency:.0f} ms after save ({detail})")
+            if not written:
+                print(f"⏭ {', '.join(sorted(changed))} changed, outputs unchanged ({latency:.0f} ms)")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rebuild the swipe site and homepage whenever their inputs change")
+    parser.add_argument("--csv", default="videos.csv", help="input catalog (default: %(default)s)")
+    parser.add_argument("--output-dir", default=".", help="where to write the pages (default: %(default)s)")
+    parser.add_argument("--poster", default=home.DEFAULT_POSTER, help="homepage poster image URL")
+    parser.add_argument("--rules", metavar="FILE", help="categories config (default: categories.json)")
+    parser.add_argument("--debounce", type=float, default=DEBOUNCE * 1000, metavar="MS",
+                        help="quiet period that ends a burst of edits (default: %(default)g ms)")
+    parser.add_argument("--poll", action="store_true", help="poll for changes instead of using inotify")
+    args = parser.parse_args(argv)
+
+    watch(args.csv, args.output_dir, args.poster, args.rules, args.debounce / 1000, args.poll)
+
+
+if __name__ == "__main__":
+    sys.exit(main())